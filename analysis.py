@@ -0,0 +1,263 @@
+"""
+Footage analysis for the magic edit planner.
+
+One streaming pass over the video (downscaled grayscale frames piped out of
+FFmpeg, processed a chunk at a time with NumPy) and the extracted audio track
+produces three per-frame curves:
+
+  cut      : histogram distance to the previous frame (shot changes spike to ~1)
+  motion   : mean absolute pixel change to the previous frame (0..1)
+  loudness : RMS level of the audio under each frame, in dBFS
+
+Memory stays bounded by CHUNK_FRAMES downscaled frames plus the curves
+(a few bytes per frame). The result is saved as an .npz stamped with the
+video's size/mtime and the analysis settings, so re-running is a no-op.
+
+Usage:
+    python analysis.py --input input.mp4 --output analysis.npz [--audio audio_16k.f32]
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+
+import media
+import telemetry
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+ANALYSIS_WIDTH = 64       # Frames are scaled to this width (grayscale) before any math
+ANALYSIS_FPS = 0          # 0 = every source frame (frame-accurate cuts); e.g. 10 to subsample long videos
+CHUNK_FRAMES = 256        # Frames decoded per vectorized step (bounds memory to CHUNK_FRAMES * w * h bytes)
+HISTOGRAM_BINS = 16
+CUT_THRESHOLD = 0.4       # Histogram distance (0..1) between consecutive frames that counts as a shot change
+MIN_SHOT_SECONDS = 0.5    # A cut this close after the previous one is ignored (flashes, strobes)
+SILENCE_DB = -45.0        # Audio below this RMS level counts as silence
+# ==============================================================================
+
+SETTINGS = {"width": ANALYSIS_WIDTH, "fps": ANALYSIS_FPS, "bins": HISTOGRAM_BINS}
+
+
+class Analysis:
+    """Per-frame curves of one video, with the time-window queries the planner needs"""
+
+    def __init__(self, fps, cut, motion, loudness, cut_threshold=CUT_THRESHOLD, min_shot=MIN_SHOT_SECONDS):
+        self.fps = float(fps)
+        self.cut = cut
+        self.motion = motion
+        self.loudness = loudness
+        self.cuts = detect_cuts(cut, self.fps, cut_threshold, min_shot)
+        voiced = loudness[loudness > SILENCE_DB]
+        self.median_loudness = float(np.median(voiced)) if len(voiced) else SILENCE_DB
+
+    def __len__(self):
+        return len(self.cut)
+
+    @property
+    def duration(self):
+        return len(self) / self.fps
+
+    def _frames(self, t0, t1):
+        a = min(max(int(round(t0 * self.fps)), 0), len(self))
+        b = min(max(int(round(t1 * self.fps)), a + 1), len(self))
+        return slice(a, b)
+
+    def has_cut(self, t0, t1):
+        """True if a shot change falls strictly inside (t0, t1)"""
+        i = np.searchsorted(self.cuts, t0, side="right")
+        return i < len(self.cuts) and self.cuts[i] < t1
+
+    def nearest_cut(self, t, max_distance):
+        """Time of the shot change closest to t within max_distance, else None"""
+        i = np.searchsorted(self.cuts, t)
+        near = [c for c in self.cuts[max(i - 1, 0):i + 1] if abs(c - t) <= max_distance]
+        return float(min(near, key=lambda c: abs(c - t))) if near else None
+
+    def mean_loudness(self, t0, t1):
+        window = self.loudness[self._frames(t0, t1)]
+        return float(window.mean()) if len(window) else SILENCE_DB
+
+    def mean_motion(self, t0, t1):
+        window = self.motion[self._frames(t0, t1)]
+        return float(window.mean()) if len(window) else 0.0
+
+    def silent_fraction(self, t0, t1):
+        window = self.loudness[self._frames(t0, t1)]
+        return float((window <= SILENCE_DB).mean()) if len(window) else 1.0
+
+    def save(self, path, stamp=None):
+        partial = path + ".part.npz"
+        np.savez(partial, fps=self.fps, cut=self.cut, motion=self.motion, loudness=self.loudness,
+                 stamp=np.frombuffer(json.dumps(stamp).encode(), dtype=np.uint8))
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            analysis = cls(float(data["fps"]), data["cut"], data["motion"], data["loudness"])
+            analysis.stamp = json.loads(data["stamp"].tobytes().decode())
+        return analysis
+
+
+# --- VIDEO ---
+
+def stream_frames(video_path, size, fps=None, chunk_frames=CHUNK_FRAMES):
+    """
+    Yields (n, h, w) uint8 grayscale chunks decoded and scaled by FFmpeg.
+    The same buffer is reused for every chunk: consume each one before the next.
+    """
+    w, h = size
+    vf = f"scale={w}:{h}:flags=area,format=gray"
+    if fps:
+        vf = f"fps={fps}," + vf
+    cmd = [media.find_ffmpeg(), "-nostdin", "-loglevel", "error", "-i", video_path, "-an",
+           "-vf", vf, "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1"]
+    buffer = np.empty((chunk_frames, h, w), dtype=np.uint8)
+    view = memoryview(buffer).cast("B")
+    # stderr goes to a file: an undrained pipe fills up on a chatty decode and deadlocks FFmpeg
+    stderr = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+    try:
+        while True:
+            filled = 0
+            while filled < len(view):
+                n = proc.stdout.readinto(view[filled:])
+                if not n:
+                    break
+                filled += n
+            frames = filled // (w * h)
+            if frames:
+                yield buffer[:frames]
+            if filled < len(view):
+                break
+        if proc.wait() != 0:
+            stderr.seek(0)
+            message = stderr.read().decode(errors="replace").strip()
+            raise RuntimeError(f"FFmpeg could not decode '{video_path}': {message}")
+    finally:
+        if proc.poll() is None:   # Consumer stopped early
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        stderr.close()
+
+
+def frame_curves(chunks, bins=HISTOGRAM_BINS):
+    """(cut, motion) float32 curves from an iterator of (n, h, w) uint8 chunks; frame 0 scores 0"""
+    cut_parts, motion_parts = [], []
+    prev_frame, prev_hist = None, None
+    shift = 8 - int(np.log2(bins))
+    for chunk in chunks:
+        n = len(chunk)
+        pixels = chunk[0].size
+        flat = chunk.reshape(n, -1)
+
+        # Per-frame histograms in one bincount: offset each frame's bin ids into its own range
+        ids = (flat >> shift).astype(np.int64) + (np.arange(n, dtype=np.int64) * bins)[:, None]
+        hist = np.bincount(ids.ravel(), minlength=n * bins).reshape(n, bins).astype(np.float32) / pixels
+
+        first_hist = hist[:1] if prev_hist is None else prev_hist[None]
+        hists = np.concatenate([first_hist, hist])
+        cut_parts.append(0.5 * np.abs(np.diff(hists, axis=0)).sum(axis=1))
+
+        first = flat[:1] if prev_frame is None else prev_frame[None]
+        frames = np.concatenate([first, flat]).astype(np.int16)
+        motion_parts.append(np.abs(np.diff(frames, axis=0)).mean(axis=1, dtype=np.float32) / 255.0)
+
+        prev_frame, prev_hist = flat[-1].copy(), hist[-1]
+    if not cut_parts:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+    return (np.concatenate(cut_parts).astype(np.float32), np.concatenate(motion_parts).astype(np.float32))
+
+
+def detect_cuts(cut, fps, threshold=CUT_THRESHOLD, min_shot=MIN_SHOT_SECONDS):
+    """Shot-change times (frame-accurate) from the cut curve"""
+    cuts, last = [], -np.inf
+    for i in np.flatnonzero(cut >= threshold):
+        t = i / fps
+        if t - last >= min_shot:
+            cuts.append(t)
+            last = t
+    return np.array(cuts, dtype=np.float64)
+
+
+# --- AUDIO ---
+
+def loudness_curve(samples, sample_rate, frames, fps, chunk_frames=CHUNK_FRAMES):
+    """RMS dBFS of the samples under each frame; walks the (memory-mapped) track a chunk at a time"""
+    edges = np.minimum(np.round(np.arange(frames + 1) * (sample_rate / fps)).astype(np.int64), len(samples))
+    out = np.full(frames, -120.0, dtype=np.float32)
+    for a in range(0, frames, chunk_frames):
+        b = min(a + chunk_frames, frames)
+        window = np.asarray(samples[edges[a]:edges[b]], dtype=np.float64)
+        energy = np.concatenate([[0.0], np.cumsum(window * window)])
+        lo, hi = edges[a:b] - edges[a], edges[a + 1:b + 1] - edges[a]
+        counts = hi - lo
+        rms = np.sqrt((energy[hi] - energy[lo]) / np.maximum(counts, 1))
+        out[a:b] = np.where(counts > 0, 20 * np.log10(np.maximum(rms, 1e-6)), -120.0)
+    return out
+
+
+# --- DRIVER ---
+
+def _stamp(video_path):
+    st = os.stat(video_path)
+    return {"size": st.st_size, "mtime": st.st_mtime, **SETTINGS}
+
+
+def analyze(video_path, output_path, audio_path=None):
+    """Runs (or reuses) the analysis of one video and returns it"""
+    stamp = _stamp(video_path)
+    if os.path.exists(output_path):
+        try:
+            cached = Analysis.load(output_path)
+            if cached.stamp == stamp:
+                print(f"✅ Analysis up to date: '{output_path}'")
+                return cached
+        except (OSError, ValueError, KeyError):
+            pass
+
+    meta = media.probe(video_path)
+    fps = ANALYSIS_FPS or meta["fps"]
+    w = ANALYSIS_WIDTH
+    h = max(2, int(round(w * meta["height"] / meta["width"] / 2)) * 2)
+
+    with telemetry.span("analysis_video", width=w, height=h, fps=fps) as info:
+        cut, motion = frame_curves(stream_frames(video_path, (w, h), ANALYSIS_FPS or None))
+        info["frames"] = len(cut)
+
+    with telemetry.span("analysis_audio"), tempfile.TemporaryDirectory() as tmp:
+        if not (audio_path and os.path.exists(audio_path)) and meta["has_audio"]:
+            audio_path = media.extract_audio(video_path, os.path.join(tmp, "audio.f32"))
+        if audio_path and os.path.exists(audio_path):
+            loudness = loudness_curve(media.load_audio(audio_path), media.AUDIO_SAMPLE_RATE, len(cut), fps)
+        else:
+            loudness = np.full(len(cut), -120.0, dtype=np.float32)
+
+    analysis = Analysis(fps, cut, motion, loudness)
+    analysis.save(output_path, stamp)
+    print(f"✅ Analyzed {len(analysis)} frames ({analysis.duration:.1f}s): {len(analysis.cuts)} shot changes, "
+          f"median loudness {analysis.median_loudness:.1f} dBFS")
+    return analysis
+
+
+def main(argv=None):
+    """CLI entry point; also what stage_pool workers call in-process"""
+    parser = argparse.ArgumentParser(description="Shot change, motion and loudness curves for a video.")
+    parser.add_argument("--input", default="input.mp4")
+    parser.add_argument("--output", default="analysis.npz")
+    parser.add_argument("--audio", default=None, help="Already extracted mono float32 track (media.extract_audio)")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.input):
+        analyze(args.input, args.output, args.audio)
+    else:
+        print(f"❌ '{args.input}' not found!")
+
+
+if __name__ == "__main__":
+    main()
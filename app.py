@@ -1,10 +1,12 @@
 import streamlit as st
 import os
-import subprocess
-import json
-import shutil
+import queue
 import time
-from moviepy.editor import VideoFileClip
+import media
+import pipeline
+import stage_pool
+import telemetry
+from jobs import JobScheduler, JOBS_DIR
 
 # --- UI CONFIG ---
 st.set_page_config(page_title="Mirage AI Editor", page_icon="⚡", layout="wide")
@@ -33,160 +35,147 @@ font_options = [
 ]
 selected_font = st.sidebar.selectbox("Caption Font", font_options, index=0)
 
-# 2. POSITION SLIDER
+# 2. CAPTION STYLE
+caption_modes = {"Phrases (highlight spoken word)": "phrase", "One word at a time": "word"}
+caption_mode = st.sidebar.selectbox("Caption Style", list(caption_modes), index=0)
+
+# 3. POSITION SLIDER
 caption_pos = st.sidebar.slider("Caption Vertical Position (%)", 0.1, 0.9, 0.8, 
                                 help="0.1 = Top, 0.5 = Center, 0.9 = Bottom")
 
-# 3. TOGGLES
+# 4. TOGGLES
 use_magic_edit = st.sidebar.checkbox("✨ Enable Magic Edit (B-Roll & Zooms)", value=True)
-
-# --- HELPER FUNCTION: LOGGING ---
-def write_log(message):
-    with open("process_log.txt", "a") as log_file:
-        log_file.write(f"{message}\n")
+profile_render = st.sidebar.checkbox("🔬 Profile Render (cProfile)", value=False,
+                                     help="Always re-renders and offers a .prof download (open with snakeviz)")
+
+# --- JOB SCHEDULER (shared by every browser session) ---
+@st.cache_resource
+def get_scheduler():
+    if stage_pool.ENABLED:
+        stage_pool.warm_up()   # spaCy/MoviePy load in the background while the first video uploads
+    return JobScheduler(pipeline.run_job, jobs_dir=os.path.join(pipeline.APP_DIR, JOBS_DIR))
+
+scheduler = get_scheduler()
+
+def current_job():
+    job_id = st.session_state.get("job_id")
+    return scheduler.get(job_id) if job_id else None
+
+def show_telemetry(job):
+    """Per-stage timings, in-stage spans, per-frame histograms and peak memory from telemetry.jsonl"""
+    summary = telemetry.summarize(job.paths["telemetry"])
+    if not (summary["stages"] or summary["spans"]):
+        return
+    with st.expander("📈 Performance", expanded=False):
+        st.markdown("**Stages**")
+        st.table([{
+            "stage": r["name"],
+            "seconds": round(r["ms"] / 1000, 2),
+            "cache": "HIT" if r["cache_hit"] else "MISS",
+            "slot wait (s)": round(r["slot_wait_ms"] / 1000, 2),
+            "peak RSS (MB)": round(summary["peak_rss_mb"].get(r["name"], 0), 1),
+        } for r in summary["stages"]])
+
+        if summary["spans"]:
+            st.markdown("**Spans**")
+            st.table([{
+                "stage": r["stage"],
+                "span": r["name"],
+                "ms": r["ms"],
+                **{k: v for k, v in r.items() if k not in ("type", "name", "stage", "pid", "ts", "ms")},
+            } for r in summary["spans"]])
+
+        if summary["histograms"]:
+            st.markdown("**Per-frame / per-request timings (ms)**")
+            st.table([{
+                "metric": name,
+                "count": h["count"],
+                "mean": round(h["mean_ms"], 2),
+                "p50 ≤": h["p50_ms"],
+                "p90 ≤": h["p90_ms"],
+                "p99 ≤": h["p99_ms"],
+                "max": round(h["max_ms"], 2),
+            } for name, h in sorted(summary["histograms"].items())])
+
+        with open(job.paths["telemetry"], "rb") as f:
+            st.download_button("⬇️ Download telemetry.jsonl", f, file_name="telemetry.jsonl")
+        if os.path.exists(job.paths["profile"]):
+            with open(job.paths["profile"], "rb") as f:
+                st.download_button("⬇️ Download render.prof", f, file_name="render.prof")
 
 # --- MAIN WORKFLOW ---
 uploaded_file = st.file_uploader("📂 Upload Video (MP4)", type=["mp4", "mov"])
 
 if uploaded_file:
-    # Save input file
-    with open("input.mp4", "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    
-    st.video("input.mp4")
-    
-    if st.button("🚀 START PROCESSING"):
-        # Reset Log File
-        if os.path.exists("process_log.txt"):
-            os.remove("process_log.txt")
-        
-        start_total_time = time.time()
-        write_log("=== MIRAGE AI PROCESSING LOG ===")
-        
-        # 0. ANALYZE VIDEO METADATA
-        try:
-            clip = VideoFileClip("input.mp4")
-            duration = clip.duration
-            fps = clip.fps
-            total_frames = int(duration * fps) if fps else 0
-            clip.close()
-            
-            write_log(f"VIDEO METADATA:")
-            write_log(f" - Duration: {duration:.2f} seconds")
-            write_log(f" - FPS: {fps}")
-            write_log(f" - Total Frames: {total_frames}")
-            write_log("-" * 30)
-        except Exception as e:
-            write_log(f"⚠️ Could not analyze video metadata: {e}")
-
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        # 1. SAVE SETTINGS
-        settings = {
+    # Every new upload gets its own workspace, so concurrent users never share files
+    upload_id = f"{uploaded_file.name}:{uploaded_file.size}"
+    job = current_job()
+    if job is None or st.session_state.get("upload_id") != upload_id:
+        job = scheduler.create_job()
+        media.save_upload(uploaded_file, job.paths["input"])
+        st.session_state["job_id"] = job.id
+        st.session_state["upload_id"] = upload_id
+
+    st.video(job.paths["input"])
+
+    busy = job.status in ("queued", "running")
+    if st.button("🚀 START PROCESSING", disabled=busy):
+        job.settings = {
             "font": selected_font,
-            "position": caption_pos
+            "position": caption_pos,
+            "caption_mode": caption_modes[caption_mode],
         }
-        with open("settings.json", "w") as f:
-            json.dump(settings, f)
-
-        # 2. TRANSCRIBE (Step 1)
-        status_text.text("🎧 AI is listening (Transcribing)...")
-        t0 = time.time()
+        job.use_magic_edit = use_magic_edit
+        job.profile_render = profile_render
         try:
-            subprocess.run(["python", "transcribe.py"], check=True)
-            elapsed = time.time() - t0
-            write_log(f"STEP 1: TRANSCRIPTION")
-            write_log(f" - Execution Time: {elapsed:.2f} seconds")
-            
-            # Count detected words
-            if os.path.exists("transcription_data.json"):
-                with open("transcription_data.json", "r") as f:
-                    data = json.load(f)
-                    word_count = len(data)
-                write_log(f" - Words Detected: {word_count}")
-            
-            progress_bar.progress(33)
-        except subprocess.CalledProcessError:
-            st.error("❌ Transcription Failed! Check terminal for details.")
-            write_log("❌ ERROR: Transcription Failed.")
-            st.stop()
-
-        # 3. MAGIC EDIT (Step 2 - Optional)
-        if use_magic_edit:
-            status_text.text("🧠 AI Director is finding B-Roll...")
-            t0 = time.time()
-            try:
-                subprocess.run(["python", "magic_edit.py"], check=True)
-                elapsed = time.time() - t0
-                write_log(f"STEP 2: MAGIC EDIT")
-                write_log(f" - Execution Time: {elapsed:.2f} seconds")
-                
-                # Count visual events
-                if os.path.exists("visual_plan.json"):
-                    with open("visual_plan.json", "r") as f:
-                        plan = json.load(f)
-                        write_log(f" - Visual Events Planned: {len(plan)}")
-            except subprocess.CalledProcessError:
-                st.warning("⚠️ Magic Edit had an issue, skipping visuals.")
-                write_log("⚠️ WARNING: Magic Edit failed or was skipped.")
+            scheduler.submit(job)
+        except queue.Full:
+            st.error("❌ Too many videos are waiting right now. Please try again in a few minutes.")
+        st.rerun()
+
+    if job.status in ("queued", "running"):
+        position = scheduler.queue_position(job)
+        if position:
+            st.info(f"⏳ Queued: {position} job(s) ahead of yours (including this one).")
+        st.progress(job.progress)
+        st.text(job.message)
+        time.sleep(1)
+        st.rerun()
+
+    elif job.status == "done":
+        st.progress(100)
+        st.success(job.message)
+
+        # Show Result
+        if os.path.exists(job.paths["output"]):
+            st.video(job.paths["output"])
+
+            # Display Log content in UI for quick check
+            with open(job.paths["log"], "r", encoding="utf-8") as f:
+                st.text_area("📋 Execution Log", f.read(), height=200)
+
+            # Download Button
+            with open(job.paths["output"], "rb") as f:
+                st.download_button("⬇️ Download Video", f, file_name="mirage_output.mp4")
+            show_telemetry(job)
         else:
-            # If disabled, remove old visual plan to prevent using old images
-            if os.path.exists("visual_plan.json"):
-                os.remove("visual_plan.json")
-            write_log("STEP 2: MAGIC EDIT (Skipped by User)")
-        
-        progress_bar.progress(66)
-
-        # 4. RENDER (Step 3)
-        status_text.text("🔥 Rendering final video (This takes time)...")
-        t0 = time.time()
-        try:
-            subprocess.run(["python", "render.py"], check=True)
-            elapsed = time.time() - t0
-            write_log(f"STEP 3: RENDERING")
-            write_log(f" - Execution Time: {elapsed:.2f} seconds")
-            
-            progress_bar.progress(100)
-            status_text.success("✅ DONE! Processing Complete.")
-            
-            # Final Stats
-            total_elapsed = time.time() - start_total_time
-            write_log("-" * 30)
-            write_log(f"TOTAL PROCESS TIME: {total_elapsed:.2f} seconds")
-            
-            # Show Result
-            if os.path.exists("final_overlay_edit.mp4"):
-                st.video("final_overlay_edit.mp4")
-                
-                # Display Log content in UI for quick check
-                with open("process_log.txt", "r") as f:
-                    st.text_area("📋 Execution Log", f.read(), height=200)
-
-                # Download Button
-                with open("final_overlay_edit.mp4", "rb") as f:
-                    st.download_button("⬇️ Download Video", f, file_name="mirage_output.mp4")
-            else:
-                st.error("❌ Output file not found. Check terminal logs.")
-                
-        except subprocess.CalledProcessError:
-            st.error("❌ Rendering Failed! Check terminal for details.")
-            write_log("❌ ERROR: Rendering Failed.")
+            st.error("❌ Output file not found. Check terminal logs.")
+
+    elif job.status == "failed":
+        st.error(f"❌ Processing Failed! {job.error}")
+        if os.path.exists(job.paths["log"]):
+            with open(job.paths["log"], "r", encoding="utf-8") as f:
+                st.text_area("📋 Execution Log", f.read(), height=200)
+        show_telemetry(job)
 
 # Cleanup instructions
 st.sidebar.markdown("---")
 if st.sidebar.button("🧹 Clear Temporary Files"):
-    files_to_clean = [
-        "input.mp4", 
-        "transcription_data.json", 
-        "visual_plan.json", 
-        "settings.json", 
-        "final_overlay_edit.mp4",
-        "process_log.txt"  # Added log file here
-    ]
-    for file in files_to_clean:
-        if os.path.exists(file):
-            os.remove(file)
-    if os.path.exists("assets"):
-        shutil.rmtree("assets")
-    st.sidebar.success("Cleaned!")
\ No newline at end of file
+    # Only this session's workspace; the shared caches (.mirage_cache/, broll_cache/) survive cleanup
+    job = current_job()
+    if job and not scheduler.remove(job):
+        st.sidebar.warning("This job is still processing.")
+    else:
+        st.session_state.pop("job_id", None)
+        st.session_state.pop("upload_id", None)
+        st.sidebar.success("Cleaned!")
@@ -0,0 +1,138 @@
+import ast
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+CACHE_DIR = ".mirage_cache"
+MAX_CACHE_BYTES = 5 * 1024 ** 3   # 5 GB, least-recently-used entries are evicted first
+HASH_CHUNK = 1024 * 1024
+# ==============================================================================
+
+
+def hash_file(path):
+    """sha256 of a file's bytes, streamed in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_inputs(**inputs):
+    """sha256 of a JSON-serializable description of a stage's inputs"""
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def code_version(*scripts):
+    """Short hash of the given source files, so a code change invalidates that stage's entries"""
+    return hash_inputs(**{script: hash_file(script) for script in scripts})[:16]
+
+
+def read_constants(script_path, names):
+    """Reads top-level constant assignments from a script without importing it (no heavy imports)"""
+    with open(script_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id in names:
+                    try:
+                        values[target.id] = ast.literal_eval(node.value)
+                    except ValueError:
+                        values[target.id] = ast.unparse(node.value)
+    return values
+
+
+class ArtifactCache:
+    """
+    Content-addressed store for pipeline stage outputs.
+
+    Each entry is a directory named after the hash of the stage's inputs and
+    holds copies of the files the stage produced (by relative name). An
+    entry's mtime is bumped on every hit, which is what eviction orders by.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, stage, **inputs):
+        return f"{stage}-{hash_inputs(stage=stage, **inputs)[:32]}"
+
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+
+    def restore(self, key, outputs, base_dir="."):
+        """
+        Copies a cached entry's files to their destinations.
+        `outputs` maps artifact name -> destination path; any other file in the
+        entry is restored to base_dir/<name>. Returns True on a hit.
+        """
+        entry = self._entry(key)
+        manifest_path = os.path.join(entry, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return False
+
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        if not all(name in manifest["files"] for name in outputs):
+            return False
+
+        for name in manifest["files"]:
+            dest = outputs.get(name, os.path.join(base_dir, name))
+            if os.path.dirname(dest):
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+            shutil.copyfile(os.path.join(entry, "files", name), dest)
+
+        os.utime(entry)
+        return True
+
+    def store(self, key, outputs):
+        """Saves files into the cache. `outputs` maps artifact name -> source path."""
+        tmp = self._entry(f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(os.path.join(tmp, "files"))
+        for name, src in outputs.items():
+            dest = os.path.join(tmp, "files", name)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            shutil.copyfile(src, dest)
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump({"key": key, "created": time.time(), "files": sorted(outputs)}, f, indent=4)
+
+        entry = self._entry(key)
+        if os.path.exists(entry):
+            shutil.rmtree(entry)
+        os.replace(tmp, entry)
+        self.evict()
+
+    def _entry_size(self, entry):
+        total = 0
+        for folder, _, files in os.walk(entry):
+            for name in files:
+                total += os.path.getsize(os.path.join(folder, name))
+        return total
+
+    def evict(self):
+        """Removes least-recently-used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.root):
+            path = self._entry(name)
+            if os.path.isdir(path) and not name.startswith(".tmp-"):
+                entries.append((os.path.getmtime(path), self._entry_size(path), path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        return total
@@ -0,0 +1,283 @@
+"""
+Headless batch runner: processes a directory (or manifest) of videos through
+the same pipeline as the app, without Streamlit.
+
+Videos move through the stages concurrently (video N+1 transcribes while
+video N renders) using the app's JobScheduler, with each stage's slot count
+sized to the CPU count. Every video gets a stable workspace under --out, and
+the pipeline leaves a marker per finished stage, so re-running the same
+command after a crash skips finished videos and finished stages.
+
+Manifest: a JSON list of paths or of objects
+    [{"input": "talk.mp4", "name": "talk", "settings": {"font": "Impact"}, "magic_edit": false}, ...]
+(relative paths are relative to the manifest; per-video settings override the CLI ones).
+
+Usage:
+    python batch.py videos/ --out batch_out [--font "Hormozi (The Bold Font)"] [--caption-mode word]
+    python batch.py manifest.json --out batch_out --no-magic-edit
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+import pipeline
+import stage_pool
+import telemetry
+import transcribe_worker
+from jobs import JobScheduler
+from render import DEFAULT_SETTINGS, FONT_MAPPING
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v", ".mkv")
+CPUS_PER_RENDER = 2       # A render process plus its FFmpeg encoder
+CPUS_PER_ANALYSIS = 4     # Mostly FFmpeg decode; leave room for the renders
+MAGIC_EDIT_SLOTS = 2      # Network bound (Pexels rate limit), not CPU bound
+STATE_NAME = "batch.json"             # Per-video state in its workspace
+SUMMARY_NAME = "batch_summary.json"   # Throughput summary in --out
+OUTPUT_SUFFIX = "_edit.mp4"           # Finished videos are copied to --out as <name>_edit.mp4
+POLL_SECONDS = 2
+# ==============================================================================
+
+STAGES = ["transcribe", "analysis", "magic_edit", "render"]
+
+
+def stage_limits(cpus):
+    """Concurrent jobs per stage for this machine"""
+    return {
+        "transcribe": 1,   # One warm whisper model (transcribe_worker)
+        "analysis": max(1, cpus // CPUS_PER_ANALYSIS),
+        "magic_edit": MAGIC_EDIT_SLOTS,
+        "render": max(1, cpus // CPUS_PER_RENDER),
+    }
+
+
+def safe_name(name):
+    """Workspace/output name that stays inside --out: no separators, "..", or odd characters"""
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(name.replace("\\", "/")))
+    return "_" + name if name.strip(".") == "" else name
+
+
+def load_entries(source, settings, magic_edit):
+    """[{"input", "name", "settings", "magic_edit"}] from a directory or a manifest"""
+    if os.path.isdir(source):
+        items = [name for name in sorted(os.listdir(source)) if name.lower().endswith(VIDEO_EXTENSIONS)]
+        base = source
+    else:
+        with open(source, "r") as f:
+            items = json.load(f)
+        base = os.path.dirname(os.path.abspath(source))
+
+    entries, names = [], set()
+    for item in items:
+        item = {"input": item} if isinstance(item, str) else dict(item)
+        path = os.path.join(base, item["input"])
+        name = safe_name(item.get("name") or os.path.splitext(os.path.basename(path))[0])
+        unique, n = name, 2
+        while unique in names:   # Same file name in different folders
+            unique, n = f"{name}_{n}", n + 1
+        names.add(unique)
+        entries.append({
+            "input": os.path.abspath(path),
+            "name": unique,
+            "settings": {**settings, **item.get("settings", {})},
+            "magic_edit": item.get("magic_edit", magic_edit),
+        })
+    return entries
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+
+def _link_input(src, dest):
+    """Hard-links the source into the workspace (copies across file systems)"""
+    if os.path.exists(dest):
+        if os.path.getsize(dest) == os.path.getsize(src) and os.path.getmtime(dest) >= os.path.getmtime(src):
+            return
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+def _read_state(job):
+    path = os.path.join(job.workspace, STATE_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(job, state):
+    path = os.path.join(job.workspace, STATE_NAME)
+    with open(path + ".part", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".part", path)
+
+
+def _state_for(entry):
+    """What a finished run must match to be skipped on resume"""
+    return {"input": entry["input"], "source": _stamp(entry["input"]), "settings": entry["settings"],
+            "magic_edit": entry["magic_edit"]}
+
+
+def summarize(runs, wall, limits):
+    """Videos/hour, media processed and per-stage utilization (busy slot-seconds / available slot-seconds)"""
+    busy = {stage: 0.0 for stage in STAGES}
+    waits = {stage: 0.0 for stage in STAGES}
+    hits = {stage: 0 for stage in STAGES}
+    for run in runs:
+        if run.get("skipped"):
+            continue   # Its telemetry is from the earlier run
+        for record in telemetry.summarize(run["job"].paths["telemetry"])["stages"]:
+            stage = record["name"]
+            if stage not in busy:
+                continue
+            wait = record.get("slot_wait_ms", 0) / 1000
+            busy[stage] += record["ms"] / 1000 - wait
+            waits[stage] += wait
+            hits[stage] += bool(record.get("cache_hit"))
+
+    done = [r for r in runs if r["status"] == "done"]
+    processed = [r for r in done if not r.get("skipped")]
+    media_s = sum(r.get("duration") or 0 for r in processed)
+    return {
+        "videos": len(runs),
+        "done": len(done),
+        "skipped": len(done) - len(processed),
+        "failed": [{"name": r["name"], "error": r.get("error")} for r in runs if r["status"] == "failed"],
+        "wall_s": wall,
+        "videos_per_hour": len(processed) / wall * 3600 if wall else 0.0,
+        "media_s": media_s,
+        "realtime_factor": media_s / wall if wall else 0.0,
+        "stages": {stage: {
+            "slots": limits[stage],
+            "busy_s": round(busy[stage], 2),
+            "slot_wait_s": round(waits[stage], 2),
+            "cache_hits": hits[stage],
+            "utilization": busy[stage] / (wall * limits[stage]) if wall else 0.0,
+        } for stage in STAGES},
+    }
+
+
+def run_batch(entries, out_dir, cpus, force=False):
+    limits = stage_limits(cpus)
+    stage_pool.size_for(limits)   # One warm worker per slot, in a pool per stage
+    scheduler = JobScheduler(pipeline.run_job, jobs_dir=out_dir, max_active=sum(limits.values()),
+                             max_queued=len(entries) + 1, stage_limits=limits)
+    print(f"⚙️ {cpus} CPUs -> slots per stage: " + ", ".join(f"{s} {n}" for s, n in limits.items()))
+    if stage_pool.ENABLED:
+        stage_pool.warm_up()
+    transcribe_worker.ensure_worker()   # The model loads while the first videos are probed
+
+    t0 = time.time()
+    runs = []
+    for entry in entries:
+        job = scheduler.create_job(entry["name"])
+        run = {"name": entry["name"], "job": job, "status": "queued"}
+        runs.append(run)
+        state = _read_state(job)
+        wanted = _state_for(entry)
+        output = os.path.join(out_dir, entry["name"] + OUTPUT_SUFFIX)
+        if not force and state.get("status") == "done" and state.get("run") == wanted and os.path.exists(output):
+            run.update(status="done", skipped=True)
+            print(f"⏭️ {entry['name']}: already done")
+            continue
+        _link_input(entry["input"], job.paths["input"])
+        job.settings = entry["settings"]
+        job.use_magic_edit = entry["magic_edit"]
+        _write_state(job, {"status": "running", "run": wanted})
+        run["wanted"] = wanted
+        scheduler.submit(job)
+
+    pending = [r for r in runs if r["status"] == "queued"]
+    print(f"🚀 {len(pending)} videos queued ({len(runs) - len(pending)} already done)")
+    last = {}
+    while pending:
+        time.sleep(POLL_SECONDS)
+        for run in list(pending):
+            job = run["job"]
+            line = f"{job.status}:{job.stage}"
+            if job.status in ("done", "failed"):
+                pending.remove(run)
+                run.update(status=job.status, error=job.error,
+                           duration=job.meta["duration"] if job.meta else None)
+                if job.status == "done":
+                    shutil.copyfile(job.paths["output"], os.path.join(out_dir, run["name"] + OUTPUT_SUFFIX))
+                    _write_state(job, {"status": "done", "run": run["wanted"], "finished": time.time()})
+                    print(f"✅ {run['name']}: done ({len(runs) - len(pending)}/{len(runs)})")
+                else:
+                    _write_state(job, {"status": "failed", "run": run["wanted"], "error": job.error})
+                    print(f"❌ {run['name']}: {job.error}")
+            elif last.get(run["name"]) != line and job.stage:
+                print(f"   {run['name']}: {job.stage} ({job.progress}%)")
+            last[run["name"]] = line
+    scheduler.wait()
+    stage_pool.shutdown()
+
+    summary = summarize(runs, time.time() - t0, limits)
+    with open(os.path.join(out_dir, SUMMARY_NAME), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def print_summary(summary, out_dir):
+    print("-" * 30)
+    print(f"📊 {summary['done']}/{summary['videos']} videos done ({summary['skipped']} skipped) "
+          f"in {summary['wall_s']:.1f}s: {summary['videos_per_hour']:.1f} videos/hour, "
+          f"{summary['realtime_factor']:.2f}x realtime")
+    print(f"{'stage':<11} {'slots':>5} {'busy s':>8} {'wait s':>8} {'hits':>5} {'util':>6}")
+    for stage, s in summary["stages"].items():
+        print(f"{stage:<11} {s['slots']:>5} {s['busy_s']:>8.1f} {s['slot_wait_s']:>8.1f} "
+              f"{s['cache_hits']:>5} {s['utilization']:>6.0%}")
+    for failure in summary["failed"]:
+        print(f"❌ {failure['name']}: {failure['error']}")
+    print(f"📄 Summary written to '{os.path.join(out_dir, SUMMARY_NAME)}'")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of videos or a JSON manifest")
+    parser.add_argument("--out", default="batch_out", help="Workspaces, finished videos and the summary")
+    parser.add_argument("--font", default=DEFAULT_SETTINGS["font"], choices=sorted(FONT_MAPPING))
+    parser.add_argument("--position", type=float, default=DEFAULT_SETTINGS["position"],
+                        help="Caption vertical position (0.1 = top, 0.9 = bottom)")
+    parser.add_argument("--caption-mode", default=DEFAULT_SETTINGS["caption_mode"], choices=["phrase", "word"])
+    parser.add_argument("--no-magic-edit", action="store_true", help="Captions only (no B-roll or zooms)")
+    parser.add_argument("--cpus", type=int, default=os.cpu_count() or 1, help="Size stage slots for this many CPUs")
+    parser.add_argument("--force", action="store_true", help="Re-run videos already marked done")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"❌ '{args.source}' not found!")
+        return 1
+    settings = {"font": args.font, "position": args.position, "caption_mode": args.caption_mode}
+    entries = load_entries(args.source, settings, not args.no_magic_edit)
+    missing = [e["input"] for e in entries if not os.path.exists(e["input"])]
+    if missing:
+        print("❌ Missing inputs:\n   " + "\n   ".join(missing))
+        return 1
+    if not entries:
+        print(f"❌ No videos ({', '.join(VIDEO_EXTENSIONS)}) in '{args.source}'")
+        return 1
+
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+    summary = run_batch(entries, out_dir, args.cpus, args.force)
+    print_summary(summary, out_dir)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Render backends: MoviePy (frames through Python) vs. the single ffmpeg filter graph.
+
+Run it from a folder that already has input.mp4, transcription_data.json,
+visual_plan.json (and settings.json). Each backend runs in a fresh process;
+wall time, peak RSS (largest process in that run's tree) and the backend that
+actually rendered are reported: `auto` may fall back to MoviePy, and a plan the
+filter graph can't express makes `ffmpeg` fail rather than time MoviePy.
+POSIX only (uses resource.getrusage).
+
+Usage:
+    python benchmarks/bench_backends.py [--backends moviepy ffmpeg] [--repeat 1]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+RENDER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "render.py")
+FALLBACK_MARKER = "Falling back to MoviePy"   # Printed by ffmpeg_render.render_ffmpeg
+
+# Runs the render in a child and reports the peak RSS of everything it spawned (KiB on Linux)
+MEASURE = (
+    "import resource, subprocess, sys, json;"
+    "subprocess.run(sys.argv[1:], check=True);"
+    "print(json.dumps({'max_rss_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss}))"
+)
+
+
+def run_backend(backend):
+    """(wall s, peak RSS MB, backend that rendered); (None, None, error) if the render failed"""
+    cmd = [sys.executable, "-c", MEASURE, sys.executable, RENDER_SCRIPT, "--backend", backend]
+    t0 = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - t0
+    if result.returncode != 0:
+        error = (result.stderr.strip().splitlines() or ["render failed"])[-1]
+        return None, None, f"failed: {error}"
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    rendered_by = "moviepy" if backend == "moviepy" or FALLBACK_MARKER in result.stdout else "ffmpeg"
+    return elapsed, report["max_rss_kb"] / 1024, rendered_by
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["moviepy", "ffmpeg"])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    if not os.path.exists("input.mp4"):
+        sys.exit("❌ Run this from a folder containing input.mp4 + transcription_data.json")
+
+    print(f"{'backend':>10} {'wall s':>9} {'peak RSS MB':>12}  rendered by")
+    for backend in args.backends:
+        for _ in range(args.repeat):
+            elapsed, rss_mb, rendered_by = run_backend(backend)
+            if elapsed is None:
+                print(f"{backend:>10} {'-':>9} {'-':>12}  {rendered_by}")
+            else:
+                print(f"{backend:>10} {elapsed:>9.2f} {rss_mb:>12.1f}  {rendered_by}")
+
+
+if __name__ == "__main__":
+    main()
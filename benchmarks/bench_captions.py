@@ -0,0 +1,78 @@
+"""
+Caption modes: one layer per word (FontAtlas) vs. one layer per phrase (caption_layout).
+
+Reports layer count, setup time (atlas preload / phrase layout), bitmaps
+rasterized and compositing cost per frame over the whole synthetic transcript,
+with a real bundled font at 1080x1920.
+
+Usage:
+    python benchmarks/bench_captions.py [--seconds 120] [--font fonts/THEBOLDFONT-FREEVERSION.ttf]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+sys.path.insert(0, REPO)
+sys.path.insert(0, HERE)
+from caption_engine import FontAtlas  # noqa: E402
+from caption_layout import PhraseAtlas, PhraseLayout, phrase_layers  # noqa: E402
+from compositor import TimelineCompositor  # noqa: E402
+from fixtures import SPEECH, WORDS_PER_SECOND  # noqa: E402
+from render import make_caption_layers  # noqa: E402
+
+FRAME_W, FRAME_H = 1080, 1920
+Y_POS = int(FRAME_H * 0.8)
+
+
+def synthetic_words(seconds):
+    words = " ".join(SPEECH).split()
+    step = 1.0 / WORDS_PER_SECOND
+    return [{"word": words[i % len(words)], "start": i * step, "end": i * step + step * 0.8}
+            for i in range(int(seconds * WORDS_PER_SECOND))]
+
+
+def run_frames(layers, seconds, fps):
+    compositor = TimelineCompositor(layers)
+    base = np.zeros((FRAME_H, FRAME_W, 3), dtype=np.uint8)
+    frames = int(seconds * fps)
+    t0 = time.perf_counter()
+    for i in range(frames):
+        compositor.composite(lambda t: base, i / fps)
+    return (time.perf_counter() - t0) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--font", default=os.path.join(REPO, "fonts", "THEBOLDFONT-FREEVERSION.ttf"))
+    args = parser.parse_args()
+
+    words = synthetic_words(args.seconds)
+    print(f"{len(words)} words, {args.seconds:.0f}s @ {args.fps:.0f} fps")
+    print(f"{'mode':>7} {'layers':>7} {'setup ms':>9} {'rasterized':>11} {'ms/frame':>9}")
+
+    t0 = time.perf_counter()
+    atlas = FontAtlas(args.font)
+    layers = make_caption_layers(words, atlas, FRAME_W, Y_POS)
+    setup = time.perf_counter() - t0
+    per_frame = run_frames(layers, args.seconds, args.fps)
+    print(f"{'word':>7} {len(layers):>7} {setup * 1000:>9.1f} {atlas.misses:>11} {per_frame * 1000:>9.3f}")
+
+    t0 = time.perf_counter()
+    layout = PhraseLayout(args.font, FRAME_W)
+    phrase_atlas = PhraseAtlas(layout)
+    layers = phrase_layers(layout.group(words), phrase_atlas, FRAME_W, Y_POS)
+    setup = time.perf_counter() - t0
+    per_frame = run_frames(layers, args.seconds, args.fps)   # Phrase bitmaps are drawn lazily, inside this
+    rasterized = phrase_atlas.misses + phrase_atlas.highlights.misses
+    print(f"{'phrase':>7} {len(layers):>7} {setup * 1000:>9.1f} {rasterized:>11} {per_frame * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
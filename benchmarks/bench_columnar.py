@@ -0,0 +1,92 @@
+"""
+Transcript storage: JSON vs. the columnar .npz sidecar (columnar.py).
+
+For a synthetic transcript of each length, reports file size, open time and
+Python heap (tracemalloc peak) for `json.load` vs. opening the memory-mapped
+sidecar, the time to build the sidecar once, a batch of 5 s range queries
+(linear scan over the JSON rows vs. binary search) and the JSON export.
+
+Usage:
+    python benchmarks/bench_columnar.py [--seconds 600 3600 14400] [--queries 200]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+import columnar  # noqa: E402
+from fixtures import make_transcript  # noqa: E402
+
+WINDOW = 5.0
+
+
+def measure(fn):
+    """(result, seconds, peak traced MB)"""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def load_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def scan(words, starts):
+    return [[w for w in words if "start" in w and w["start"] < t + WINDOW and w["end"] > t] for t in starts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, nargs="+", default=[600, 3600, 14400])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'media':>7} {'words':>7} {'format':>6} {'size MB':>8} {'open ms':>8} {'heap MB':>8} "
+          f"{'count ms':>9} {'{:.0f}s query ms'.format(WINDOW):>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for seconds in args.seconds:
+            path = os.path.join(tmp, f"transcript_{seconds:.0f}.json")
+            make_transcript(path, seconds)
+            starts = [seconds * i / args.queries for i in range(args.queries)]
+
+            words, json_s, json_mb = measure(lambda: load_json(path))
+            _, json_count_s, _ = measure(lambda: len(load_json(path)))
+            t0 = time.perf_counter()
+            expected = scan(words, starts)
+            json_query_s = time.perf_counter() - t0
+            del words
+
+            _, build_s, _ = measure(lambda: columnar.open_table(path))   # One-time parse + sidecar write
+            table, open_s, open_mb = measure(lambda: columnar.open_table(path))
+            _, count_s, _ = measure(lambda: len(columnar.open_table(path)))
+            t0 = time.perf_counter()
+            found = [table.between(t, t + WINDOW) for t in starts]
+            query_s = time.perf_counter() - t0
+            assert found == expected, "range query disagrees with the linear scan"
+
+            export_path = os.path.join(tmp, "export.json")
+            _, export_s, _ = measure(lambda: columnar.export_json(table, export_path))
+            assert load_json(export_path) == load_json(path), "export does not round-trip"
+
+            label = f"{seconds / 60:.0f}m"
+            print(f"{label:>7} {len(table):>7} {'json':>6} {os.path.getsize(path) / 1e6:>8.2f} {json_s * 1000:>8.1f} "
+                  f"{json_mb:>8.2f} {json_count_s * 1000:>9.1f} {json_query_s * 1000 / args.queries:>11.3f}")
+            print(f"{'':>7} {'':>7} {'npz':>6} {os.path.getsize(columnar.sidecar_path(path)) / 1e6:>8.2f} "
+                  f"{open_s * 1000:>8.1f} {open_mb:>8.2f} {count_s * 1000:>9.1f} "
+                  f"{query_s * 1000 / args.queries:>11.3f}")
+            print(f"{'':>7} {'':>7} {'':>6} sidecar build {build_s * 1000:.0f} ms, JSON export {export_s * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
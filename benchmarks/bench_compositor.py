@@ -0,0 +1,83 @@
+"""
+Per-frame compositing cost vs. transcript length.
+
+Builds a synthetic timeline (one caption layer per word, a B-roll image every
+~10 words) and times `TimelineCompositor.composite` over every frame of a
+sample window. With an indexed timeline the per-frame cost should stay flat
+from 100 to 10,000 words; the "scan" column shows what walking the full
+layer list on every frame (the old CompositeVideoClip behaviour) costs.
+
+Usage:
+    python benchmarks/bench_compositor.py [--sizes 100 1000 10000] [--fps 30]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from caption_engine import Bitmap  # noqa: E402
+from compositor import TimelineCompositor, bitmap_layer, image_layer  # noqa: E402
+
+FRAME_W, FRAME_H = 1080, 1920
+WORD_DURATION = 0.35
+
+
+def build_layers(word_count, rng):
+    word_bitmap = Bitmap(rng.integers(0, 255, size=(90, 260, 4), dtype=np.uint8))
+    broll = rng.integers(0, 255, size=(810, 1080, 3), dtype=np.uint8)
+
+    layers = []
+    for i in range(word_count):
+        start = i * WORD_DURATION
+        layers.append(bitmap_layer(word_bitmap, start, start + WORD_DURATION, 410, 1500, z=1))
+        if i % 10 == 0:
+            layers.append(image_layer(broll, start, start + 2.5, 0, 555, z=0))
+    return layers
+
+
+def time_frames(composite, times, base_frame):
+    get_frame = lambda t: base_frame  # noqa: E731
+    t0 = time.perf_counter()
+    for t in times:
+        composite(get_frame, t)
+    return (time.perf_counter() - t0) / len(times)
+
+
+def scan_composite(layers):
+    """Reference: visit every layer on every frame, like a flat layer list"""
+    def composite(get_frame, t):
+        frame = np.array(get_frame(t), copy=True)
+        for layer in layers:
+            if layer.start <= t < layer.end:
+                layer.draw(frame, t)
+        return frame
+    return composite
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--frames", type=int, default=150, help="frames sampled per size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base_frame = np.zeros((FRAME_H, FRAME_W, 3), dtype=np.uint8)
+
+    print(f"{'words':>8} {'layers':>8} {'indexed ms/frame':>18} {'scan ms/frame':>15}")
+    for size in args.sizes:
+        layers = build_layers(size, rng)
+        # Sample a window from the middle of the timeline
+        mid = size * WORD_DURATION / 2
+        times = [mid + i / args.fps for i in range(args.frames)]
+
+        indexed = time_frames(TimelineCompositor(layers).composite, times, base_frame)
+        scan = time_frames(scan_composite(layers), times, base_frame)
+        print(f"{size:>8} {len(layers):>8} {indexed * 1000:>18.3f} {scan * 1000:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+B-roll fetching: serial one-keyword-at-a-time vs. BrollFetcher.fetch_many, against the local stub.
+
+Usage:
+    python benchmarks/bench_fetch.py [--keywords 40] [--latency 0.1] [--concurrency 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+from broll_fetch import BrollFetcher  # noqa: E402
+from stub_pexels import start_stub_server  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keywords", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency, rate_limit_every=args.rate_limit_every)
+    search_url = f"{server.base_url}/v1/search"
+
+    with tempfile.TemporaryDirectory() as folder:
+        jobs = [(f"keyword{i}", os.path.join(folder, f"kw{i}.jpg")) for i in range(args.keywords)]
+
+        serial = BrollFetcher("stub-key", concurrency=1, search_url=search_url)
+        t0 = time.perf_counter()
+        serial_ok = sum(bool(serial.fetch(query, filename)) for query, filename in jobs)
+        serial_time = time.perf_counter() - t0
+        serial.close()
+
+        pooled = BrollFetcher("stub-key", concurrency=args.concurrency, search_url=search_url)
+        t0 = time.perf_counter()
+        results = pooled.fetch_many(jobs)
+        pooled_time = time.perf_counter() - t0
+        pooled.close()
+
+    server.shutdown()
+    print(f"keywords={args.keywords} latency={args.latency}s")
+    print(f"  serial      : {serial_time:6.2f}s  ({serial_ok} ok)")
+    print(f"  concurrent  : {pooled_time:6.2f}s  ({sum(map(bool, results.values()))} ok, "
+          f"{pooled.stats['retries']} retries, {pooled.stats['rate_limited']} rate-limited)")
+    print(f"  speedup     : {serial_time / pooled_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Keyword analysis throughput: per-word `nlp(word)` loop vs. one batched `nlp.pipe` pass.
+
+The per-word loop is what generate_visual_plan used to do (one single-token
+Doc per word). The batched path is magic_edit.select_keywords, which rebuilds
+sentences and runs them through nlp.pipe with unused components disabled.
+
+Usage:
+    python benchmarks/bench_nlp.py [--words 500 5000] [--mode pos]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import magic_edit  # noqa: E402
+
+SAMPLE_SPEECH = (
+    "So last year I moved to London and started a small coffee business. "
+    "Most people think money is the hardest part, but honestly the brain is the bottleneck. "
+    "You wake up, check your phone, answer emails and the whole day is gone. "
+    "Then I read a book by Cal Newport about deep work and everything changed! "
+    "Now I block three hours every morning for the one thing that actually grows the company. "
+)
+
+
+def synthetic_segments(word_count):
+    words = SAMPLE_SPEECH.split()
+    return [
+        {"word": words[i % len(words)], "start": i * 0.35, "end": i * 0.35 + 0.3}
+        for i in range(word_count)
+    ]
+
+
+def per_word_loop(segments):
+    nlp = magic_edit.get_nlp()
+    hits = 0
+    for segment in segments:
+        token = nlp(segment["word"].strip(".,!?\"'"))[0]
+        hits += token.pos_ in ("NOUN", "PROPN") and not token.is_stop
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--mode", choices=sorted(magic_edit.MODE_COMPONENTS), default="pos")
+    args = parser.parse_args()
+
+    magic_edit.get_nlp()  # Model load stays out of the timings
+    print(f"{'words':>8} {'per-word words/s':>18} {'batched words/s':>17} {'speedup':>9}")
+    for count in args.words:
+        segments = synthetic_segments(count)
+
+        t0 = time.perf_counter()
+        per_word_loop(segments)
+        loop_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        magic_edit.select_keywords(segments, mode=args.mode)
+        batch_time = time.perf_counter() - t0
+
+        print(f"{count:>8} {count / loop_time:>18.0f} {count / batch_time:>17.0f} {loop_time / batch_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
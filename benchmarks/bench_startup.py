@@ -0,0 +1,110 @@
+"""
+Stage startup latency: what a job pays before a stage does any real work.
+
+  cold : fresh interpreter (what `python <stage>.py` pays per job).
+         import = `import <stage>`, ready = import + loading its heavy deps
+         (whisperx/torch, spaCy model, MoviePy). Heaviest imports come from
+         `python -X importtime`.
+  warm : stage_pool dispatch of the same CLI to a preloaded worker, with a
+         missing input so only the startup path runs (magic_edit, render;
+         transcription's warm path is transcribe_worker, which keeps the model).
+
+Usage:
+    python benchmarks/bench_startup.py [--stages transcribe magic_edit render] [--repeat 3] [--top 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+import stage_pool  # noqa: E402
+
+LOADERS = {"transcribe": "load_whisperx", "magic_edit": "get_nlp", "render": "moviepy_editor"}
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import {module} as stage
+t1 = time.perf_counter()
+error = None
+try:
+    stage.{loader}()
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+t2 = time.perf_counter()
+print(json.dumps({{"import_s": t1 - t0, "ready_s": t2 - t0, "error": error}}))
+"""
+
+
+def heaviest_imports(stderr, top):
+    """Top-level packages by cumulative import time from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):   # Nested imports are indented further; only count top-level ones
+            rows.append((int(cumulative_us) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def cold_start(module, top):
+    code = PROBE.format(module=module, loader=LOADERS[module])
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    result = json.loads(lines[-1])
+    result.update(process_s=wall, heaviest=heaviest_imports(proc.stderr, top))
+    return result
+
+
+def warm_start(module, repeat):
+    """Round trip of a no-op stage run on an already preloaded pool worker"""
+    argv = ["--transcript", os.path.join(REPO, "__missing__.json")]
+    stage_pool.run(module, module, argv)   # First dispatch may still be waiting on the preload
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        stage_pool.run(module, module, argv)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=sorted(LOADERS), default=list(LOADERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'stage':<11} {'process s':>10} {'import s':>9} {'ready s':>8} {'warm ms':>8}")
+    details = []
+    for module in args.stages:
+        runs = [cold_start(module, args.top) for _ in range(args.repeat)]
+        ok = [r for r in runs if "import_s" in r]
+        if not ok:
+            print(f"{module:<11} ❌ {runs[0]['error']}")
+            continue
+        cold = min(ok, key=lambda r: r["ready_s"])
+        warm = f"{warm_start(module, args.repeat) * 1000:8.1f}" if module in stage_pool.PRELOAD else f"{'n/a':>8}"
+        print(f"{module:<11} {cold['process_s']:>10.2f} {cold['import_s']:>9.2f} {cold['ready_s']:>8.2f} {warm}")
+        details.append((module, cold))
+
+    stage_pool.shutdown()
+    for module, cold in details:
+        if cold["error"]:
+            print(f"\n⚠️ {module}: heavy deps not loaded ({cold['error']}), 'ready' only covers the import")
+        print(f"\n{module}: heaviest imports (cumulative)")
+        for seconds, name in cold["heaviest"]:
+            print(f"   {seconds:6.3f}s  {name}")
+
+
+if __name__ == "__main__":
+    main()
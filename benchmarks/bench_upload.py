@@ -0,0 +1,103 @@
+"""
+Peak RSS of input handling: old in-memory paths vs. the streaming ones in media.py.
+
+  upload: f.write(getbuffer())  vs.  media.save_upload (chunked copy), both from the same
+          in-memory upload object, like Streamlit's UploadedFile (already a BytesIO).
+          Expect the same peak: the upload is already in memory and both write it zero-copy,
+          so save_upload saves no memory in the app; what it adds is the atomic .part ->
+          rename (no half-written input.mp4).
+  audio:  decode the track into one in-memory array (whisperx.load_audio)
+          vs.  media.extract_audio to disk + np.memmap, then one pass over the samples
+
+Each case runs in a fresh process so its peak RSS is its own. Without --input a
+sparse file of --size-mb is generated for the upload case (audio needs a real video).
+POSIX only (uses resource.getrusage).
+
+Usage:
+    python benchmarks/bench_upload.py [--size-mb 2048] [--input big.mp4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "upload/getbuffer": (
+        "import io, media  # Same imports as the stream case, so the baselines match\n"
+        "with open(SRC, 'rb') as f: upload = io.BytesIO(f.read())\n"
+        "with open(DEST, 'wb') as f: f.write(upload.getbuffer())\n"
+    ),
+    "upload/stream": (
+        "import io, media\n"
+        "with open(SRC, 'rb') as f: upload = io.BytesIO(f.read())\n"
+        "media.save_upload(upload, DEST)\n"
+    ),
+    "audio/in-memory": (
+        "import subprocess, numpy as np, media\n"
+        "cmd = [media.find_ffmpeg(), '-nostdin', '-loglevel', 'error', '-i', SRC,\n"
+        "       '-ac', '1', '-ar', '16000', '-f', 'f32le', '-']\n"
+        "audio = np.frombuffer(subprocess.run(cmd, capture_output=True, check=True).stdout, np.float32)\n"
+        "float(np.abs(audio).max())\n"
+    ),
+    "audio/memmap": (
+        "import numpy as np, media\n"
+        "audio = media.load_audio(media.extract_audio(SRC, DEST))\n"
+        "peak = 0.0\n"
+        "for i in range(0, len(audio), 16000 * 30):\n"
+        "    peak = max(peak, float(np.abs(audio[i:i + 16000 * 30]).max()))\n"
+    ),
+}
+
+RUNNER = (
+    "import json, resource, sys\n"
+    "sys.path.insert(0, {root!r})\n"
+    "SRC, DEST = {src!r}, {dest!r}\n"
+    "{body}"
+    "print(json.dumps({{'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))\n"
+)
+
+
+def run_case(name, src, dest):
+    code = RUNNER.format(root=ROOT, src=src, dest=dest, body=CASES[name])
+    t0 = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    elapsed = time.perf_counter() - t0
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return elapsed, report["max_rss_kb"] / 1024
+
+
+def make_sparse_file(path, size_mb):
+    with open(path, "wb") as f:
+        f.truncate(size_mb * 1024**2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--input", default=None, help="Real video (also enables the audio cases)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = args.input
+        if src is None:
+            src = os.path.join(tmp, "upload.bin")
+            make_sparse_file(src, args.size_mb)
+        size_mb = os.path.getsize(src) / 1024**2
+
+        names = [n for n in CASES if args.input or n.startswith("upload/")]
+        print(f"Input: {src} ({size_mb:.0f} MB)")
+        print(f"{'case':>18} {'wall s':>9} {'peak RSS MB':>12}")
+        for name in names:
+            dest = os.path.join(tmp, name.replace("/", "_") + ".out")
+            elapsed, rss_mb = run_case(name, src, dest)
+            print(f"{name:>18} {elapsed:>9.2f} {rss_mb:>12.1f}")
+            os.remove(dest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Zoom throughput (frames/sec) at 1080x1920.
+
+  moviepy-pil : what render.apply_zoom used to do per frame without OpenCV
+                (numpy crop, then PIL resize with ANTIALIAS/LANCZOS + array copy)
+  pil-bilinear: same, bilinear filter
+  numpy-static: zoom_engine.ZoomMap, maps computed once, preallocated buffers
+  numpy-kenburns: ZoomMap with the crop rectangle re-interpolated every frame
+  opencv-*    : same two with cv2.warpAffine (only if OpenCV is installed)
+
+Usage:
+    python benchmarks/bench_zoom.py [--frames 60] [--size 1080x1920]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import zoom_engine  # noqa: E402
+from zoom_engine import ZOOM_CROP, ZoomMap, zoom_filter  # noqa: E402
+
+
+def pil_zoom(resample):
+    def run(frame, i):
+        h, w = frame.shape[:2]
+        x, y = int(w * (1 - ZOOM_CROP) / 2), int(h * (1 - ZOOM_CROP) / 2)
+        crop = frame[y:y + int(h * ZOOM_CROP), x:x + int(w * ZOOM_CROP)]
+        return np.array(Image.fromarray(crop).resize((w, h), resample))
+    return run
+
+
+def engine_zoom(size, animated, use_opencv, fps=30):
+    zoom_engine.USE_OPENCV = use_opencv
+    event = {"start": 0, "duration": 3.0}
+    if animated:
+        event.update(zoom_from=1.0, zoom_to=1.3)
+    apply = zoom_filter(event, size)
+
+    def run(frame, i):
+        return apply(lambda t: frame, (i / fps) % event["duration"])
+    return run
+
+
+def time_case(run, frame, frames):
+    run(frame, 0)  # Warm-up (first call allocates)
+    t0 = time.perf_counter()
+    for i in range(frames):
+        run(frame, i)
+    return frames / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--size", default="1080x1920")
+    args = parser.parse_args()
+
+    w, h = (int(v) for v in args.size.split("x"))
+    frame = np.random.default_rng(0).integers(0, 255, size=(h, w, 3), dtype=np.uint8)
+
+    cases = {
+        "moviepy-pil": pil_zoom(Image.LANCZOS),
+        "pil-bilinear": pil_zoom(Image.BILINEAR),
+        "numpy-static": engine_zoom((w, h), animated=False, use_opencv=False),
+        "numpy-kenburns": engine_zoom((w, h), animated=True, use_opencv=False),
+    }
+    if zoom_engine.cv2 is not None:
+        cases["opencv-static"] = engine_zoom((w, h), animated=False, use_opencv=True)
+        cases["opencv-kenburns"] = engine_zoom((w, h), animated=True, use_opencv=True)
+
+    print(f"{w}x{h}, {args.frames} frames")
+    print(f"{'path':>16} {'fps':>8} {'ms/frame':>9}")
+    for name, run in cases.items():
+        fps = time_case(run, frame, args.frames)
+        print(f"{name:>16} {fps:>8.1f} {1000 / fps:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
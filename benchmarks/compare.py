@@ -0,0 +1,77 @@
+"""
+Flags performance regressions between two run.py result files.
+
+A case regresses when it got slower (elapsed time) or hungrier (peak RSS of
+the case process or its ffmpeg child) by more than the threshold. Cases that
+passed in the baseline but fail now are regressions too. Exits with status 1
+if anything regressed, so it can gate CI.
+
+Usage:
+    python benchmarks/compare.py baseline.json benchmark_results.json [--threshold 0.10]
+"""
+import argparse
+import json
+import sys
+
+METRICS = ["elapsed_s", "peak_rss_mb", "child_peak_rss_mb"]   # Lower is better for all of them
+MIN_ABSOLUTE = {"elapsed_s": 0.5, "peak_rss_mb": 20, "child_peak_rss_mb": 20}  # Ignore noise below these deltas
+
+
+def load_results(path):
+    with open(path, "r") as f:
+        report = json.load(f)
+    return report.get("meta", {}), {(r["case"], r["seconds"], r.get("size")): r for r in report["results"]}
+
+
+def compare(baseline, current, threshold=0.10):
+    """Yields (key, metric, old, new, change, regressed) for every case present in both files"""
+    for key in sorted(set(baseline) & set(current), key=str):
+        old, new = baseline[key], current[key]
+        if not old.get("ok") or not new.get("ok"):
+            if old.get("ok") and not new.get("ok"):
+                yield key, "ok", True, False, None, True
+            continue
+        for metric in METRICS:
+            a, b = old.get(metric), new.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            regressed = change > threshold and b - a > MIN_ABSOLUTE[metric]
+            yield key, metric, a, b, change, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative increase (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    base_meta, baseline = load_results(args.baseline)
+    cur_meta, current = load_results(args.current)
+    print(f"baseline: {base_meta.get('commit')} ({base_meta.get('timestamp')})  "
+          f"current: {cur_meta.get('commit')} ({cur_meta.get('timestamp')})")
+    if base_meta.get("cpu_count") != cur_meta.get("cpu_count"):
+        print(f"⚠️ Different machines? cpu_count {base_meta.get('cpu_count')} vs {cur_meta.get('cpu_count')}")
+
+    regressions = 0
+    print(f"{'case':<12} {'len':>5} {'metric':<18} {'baseline':>10} {'current':>10} {'change':>8}")
+    for (case, seconds, _), metric, old, new, change, regressed in compare(baseline, current, args.threshold):
+        regressions += regressed
+        flag = "  ❌ REGRESSION" if regressed else ""
+        if change is None:
+            print(f"{case:<12} {seconds:>4}s {metric:<18} {'passed':>10} {'FAILED':>10} {'':>8}{flag}")
+        else:
+            print(f"{case:<12} {seconds:>4}s {metric:<18} {old:>10.2f} {new:>10.2f} {change:>+8.1%}{flag}")
+
+    for key in sorted(set(baseline) - set(current), key=str):
+        print(f"⚠️ {key[0]} {key[1]}s is missing from the current run")
+
+    if regressions:
+        print(f"❌ {regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"✅ No regressions above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Synthetic, deterministic inputs for the benchmark suite.
+
+  video:      ffmpeg testsrc2 (moving pattern) + a 220 Hz tone that pauses for
+              0.6 s every 4 s, so audio windowing has real silences to cut on
+  transcript: transcription_data.json-shaped words at ~2.6 words/sec, built
+              from sentences with plenty of nouns for the keyword picker
+  plan:       visual_plan.json with a zoom every ~10 s and a B-roll image every
+              ~7 s (images generated locally, no network)
+
+Fixtures are cached under benchmarks/.fixtures/<params>/ so repeated runs
+measure the pipeline, not fixture generation.
+
+Usage:
+    python benchmarks/fixtures.py --seconds 30 [--size 1080x1920] [--fps 30]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+from media import find_ffmpeg  # noqa: E402
+from stub_pexels import make_jpeg  # noqa: E402
+
+FIXTURE_DIR = os.path.join(HERE, ".fixtures")
+WORDS_PER_SECOND = 2.6
+SPEECH = [
+    "So last year I moved to London and started a small coffee business.",
+    "Most people think money is the hardest part, but honestly the brain is the bottleneck.",
+    "You wake up, check your phone, answer emails and the whole day is gone.",
+    "Then I read a book about deep work and everything changed!",
+    "Now I block three hours every morning for the one thing that grows the company.",
+    "My team works from a tiny office next to the river.",
+    "We ship a new product every month and talk to customers every week.",
+    "The best marketing is a happy customer telling a friend.",
+]
+
+
+def make_video(path, seconds, size=(1080, 1920), fps=30):
+    """Moving test pattern with a pulsed tone (speech-like pauses) as AAC audio"""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise RuntimeError("FFmpeg not found (install it or imageio-ffmpeg) - needed to generate fixture videos")
+    w, h = size
+    tone = "0.3*sin(2*PI*220*t)*gt(mod(t\\,4)\\,0.6)"
+    cmd = [
+        ffmpeg, "-y", "-nostdin", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={w}x{h}:rate={fps}:duration={seconds}",
+        "-f", "lavfi", "-i", f"aevalsrc='{tone}':s=44100:d={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest", path,
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def make_transcript(path, seconds, seed=0):
+    """Word segments with start/end/score, paced like natural speech"""
+    rng = random.Random(seed)
+    words = " ".join(SPEECH).split()
+    segments, t, i = [], 0.0, 0
+    while t < seconds - 0.5:
+        duration = rng.uniform(0.18, 0.45)
+        segments.append({"word": words[i % len(words)], "start": round(t, 3),
+                         "end": round(t + duration, 3), "score": round(rng.uniform(0.6, 1.0), 3)})
+        t += 1.0 / WORDS_PER_SECOND
+        i += 1
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(segments, f, indent=4)
+    return segments
+
+
+def make_plan(path, seconds, image_dir, image_every=7.0, zoom_every=10.0, broll_duration=2.5):
+    """Alternating image/zoom events that never overlap, with locally generated JPEGs"""
+    os.makedirs(image_dir, exist_ok=True)
+    events, t, n = [], 1.0, 0
+    next_zoom = zoom_every / 2
+    while t + broll_duration < seconds:
+        if t >= next_zoom:
+            events.append({"type": "zoom", "start": round(t, 3), "duration": 3.0})
+            next_zoom += zoom_every
+            t += 3.0 + 1.0
+            continue
+        src = os.path.join(image_dir, f"broll_{n}.jpg")
+        if not os.path.exists(src):
+            with open(src, "wb") as f:
+                f.write(make_jpeg(f"broll_{n}"))
+        events.append({"type": "image", "start": round(t, 3), "duration": broll_duration,
+                       "src": src, "is_placeholder": False, "keyword": f"broll_{n}"})
+        n += 1
+        t += image_every
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(events, f, indent=4)
+    return events
+
+
+def build_fixture(seconds, size=(1080, 1920), fps=30, root=FIXTURE_DIR):
+    """Returns paths for a cached fixture set, generating whatever is missing"""
+    folder = os.path.join(root, f"{seconds}s_{size[0]}x{size[1]}_{fps}fps")
+    os.makedirs(folder, exist_ok=True)
+    paths = {
+        "folder": folder,
+        "video": os.path.join(folder, "input.mp4"),
+        "transcript": os.path.join(folder, "transcription_data.json"),
+        "plan": os.path.join(folder, "visual_plan.json"),
+        "settings": os.path.join(folder, "settings.json"),
+        "seconds": seconds,
+        "fps": fps,
+        "size": list(size),
+    }
+    if not os.path.exists(paths["video"]):
+        make_video(paths["video"], seconds, size, fps)
+    if not os.path.exists(paths["transcript"]):
+        make_transcript(paths["transcript"], seconds)
+    if not os.path.exists(paths["plan"]):
+        make_plan(paths["plan"], seconds, os.path.join(folder, "images"))
+    if not os.path.exists(paths["settings"]):
+        with open(paths["settings"], "w") as f:
+            json.dump({"font": "Hormozi (The Bold Font)", "position": 0.8}, f)
+    return paths
+
+
+def parse_size(text):
+    w, h = (int(v) for v in text.lower().split("x"))
+    return w, h
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=int, nargs="+", default=[30])
+    parser.add_argument("--size", default="1080x1920")
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+
+    for seconds in args.seconds:
+        paths = build_fixture(seconds, parse_size(args.size), args.fps)
+        print(f"✅ {seconds}s fixture ready in {paths['folder']}")
+
+
+if __name__ == "__main__":
+    main()
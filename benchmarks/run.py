@@ -0,0 +1,191 @@
+"""
+End-to-end benchmark suite on synthetic fixtures (see fixtures.py).
+
+Each case runs in a fresh Python process, so import time, model loads and peak
+memory are measured the way the pipeline actually pays them:
+
+  transcribe : transcribe.run_batch_transcription on the fixture video
+  analysis   : analysis.analyze (streamed shot/motion/loudness curves), uncached
+  magic_edit : magic_edit.generate_visual_plan against the local stub Pexels
+               server, with an empty B-roll cache (cold) in a scratch directory
+  render     : render.create_video (MoviePy path) with the fixture plan
+
+Results go to a JSON file with elapsed time, throughput (frames/sec, words/sec,
+media seconds per second) and peak RSS of the case process and its largest
+child (ffmpeg). Compare two result files with compare.py.
+
+Usage:
+    python benchmarks/run.py [--durations 10 30 60] [--cases render magic_edit]
+                             [--size 1080x1920] [--repeat 3] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+sys.path.insert(0, REPO)
+sys.path.insert(0, HERE)
+from fixtures import build_fixture, parse_size  # noqa: E402
+
+CASES = ["transcribe", "analysis", "magic_edit", "render"]
+
+
+# --- CHILD SIDE (one case, one process) ---
+
+def _run_case(case, fixture, workdir):
+    """Runs one case inside the current process; returns case-specific counters"""
+    if case == "transcribe":
+        import transcribe
+        output = os.path.join(workdir, "transcription_data.json")
+        transcribe.run_batch_transcription(fixture["video"], output)
+        with open(output, "r") as f:
+            return {"words": len(json.load(f))}
+
+    if case == "analysis":
+        import analysis
+        result = analysis.analyze(fixture["video"], os.path.join(workdir, "analysis.npz"))
+        return {"frames": len(result), "cuts": len(result.cuts)}
+
+    if case == "magic_edit":
+        import magic_edit
+        output = os.path.join(workdir, "visual_plan.json")
+        magic_edit.generate_visual_plan(fixture["transcript"], output, os.path.join(workdir, "assets"),
+                                        os.path.join(workdir, "broll_stats.json"))
+        with open(fixture["transcript"], "r") as f:
+            words = len(json.load(f))
+        with open(output, "r") as f:
+            return {"words": words, "events": len(json.load(f))}
+
+    if case == "render":
+        import render
+        render.create_video(fixture["video"], fixture["transcript"], fixture["plan"],
+                            os.path.join(workdir, "render.mp4"), fixture["settings"])
+        return {"frames": int(round(fixture["seconds"] * fixture["fps"]))}
+
+    raise ValueError(f"unknown case '{case}'")
+
+
+def child_main(case, fixture_json, workdir):
+    from telemetry import peak_rss_mb
+
+    fixture = json.loads(fixture_json)
+    os.chdir(workdir)   # Relative caches (broll_cache/) start empty for every run
+    t0 = time.perf_counter()
+    counters = _run_case(case, fixture, workdir)
+    elapsed = time.perf_counter() - t0
+    # Last stdout line is the result; everything above it is the case's own logging
+    print(json.dumps({"elapsed_s": elapsed, "peak_rss_mb": peak_rss_mb(),
+                      "child_peak_rss_mb": peak_rss_mb(children=True), **counters}))
+
+
+# --- PARENT SIDE ---
+
+def run_isolated(case, fixture, env):
+    """Runs a case in a fresh interpreter and a scratch directory; returns its result dict"""
+    with tempfile.TemporaryDirectory(prefix=f"bench_{case}_") as workdir:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "_child", case,
+                               json.dumps(fixture), workdir],
+                              capture_output=True, text=True, env=env)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode == 0 and lines:
+        try:
+            return json.loads(lines[-1])
+        except ValueError:
+            pass  # The case bailed out early (e.g. magic_edit's exit() on a missing spaCy model)
+    tail = (proc.stderr.strip() or proc.stdout.strip()).splitlines()[-5:]
+    raise RuntimeError("\n".join(tail) or f"exit code {proc.returncode}")
+
+
+def throughput(result, seconds):
+    rates = {"media_s_per_s": seconds / result["elapsed_s"]}
+    if "frames" in result:
+        rates["frames_per_s"] = result["frames"] / result["elapsed_s"]
+    if "words" in result:
+        rates["words_per_s"] = result["words"] / result["elapsed_s"]
+    return rates
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=int, nargs="+", default=[10, 30, 60],
+                        help="Fixture lengths in seconds")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--size", default="1080x1920")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is reported")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub image server latency (s)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop("MIRAGE_TELEMETRY", None)   # Don't append benchmark runs to a job's telemetry
+    server = None
+    if "magic_edit" in args.cases:
+        from stub_pexels import start_stub_server
+        server = start_stub_server(latency=args.latency)
+        env["PEXELS_API_URL"] = f"{server.base_url}/v1/search"
+
+    size = parse_size(args.size)
+    results = []
+    try:
+        for seconds in args.durations:
+            print(f"🎞️ Building {seconds}s fixture ({args.size} @ {args.fps} fps)...")
+            fixture = build_fixture(seconds, size, args.fps)
+            for case in args.cases:
+                entry = {"case": case, "seconds": seconds, "size": args.size, "fps": args.fps}
+                runs = []
+                try:
+                    for _ in range(args.repeat):
+                        runs.append(run_isolated(case, fixture, env))
+                except Exception as e:
+                    entry.update(ok=False, error=str(e))
+                    print(f"   ❌ {case:<10} {seconds:>4}s  failed: {(str(e).splitlines() or [repr(e)])[-1]}")
+                    results.append(entry)
+                    continue
+
+                best = min(runs, key=lambda r: r["elapsed_s"])
+                entry.update(ok=True, runs=len(runs), **best, **throughput(best, seconds))
+                # Memory is reported as the worst run, not the fastest one
+                for key in ("peak_rss_mb", "child_peak_rss_mb"):
+                    entry[key] = max(r[key] or 0 for r in runs)
+                results.append(entry)
+                print(f"   ⏱️ {case:<10} {seconds:>4}s  {best['elapsed_s']:7.2f}s  "
+                      f"{entry['media_s_per_s']:5.2f}x realtime  peak {entry['peak_rss_mb']:.0f} MB")
+    finally:
+        if server:
+            server.shutdown()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "_child":
+        child_main(*sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,154 @@
+"""
+Local stand-in for the Pexels search API, so B-roll fetching can be exercised offline.
+
+    GET /v1/search?query=...&per_page=1  -> Pexels-shaped JSON pointing at /images/<query>.jpg
+    GET /images/<name>.jpg               -> a small generated JPEG
+
+Latency and rate limiting (every Nth request, or the first N, with a chosen
+Retry-After) are configurable so backoff paths get exercised too.
+
+Usage:
+    python benchmarks/stub_pexels.py --port 8765 --latency 0.2 --rate-limit-every 10
+    PEXELS_API_URL=http://127.0.0.1:8765/v1/search python magic_edit.py
+"""
+import argparse
+import hashlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Smallest valid JPEG (1x1 grey), used when Pillow isn't installed
+TINY_JPEG = bytes.fromhex(
+    "ffd8ffe000104a46494600010100000100010000ffdb004300080606070605080707070909080a0c140d0c0b0b0c1912130f"
+    "141d1a1f1e1d1a1c1c20242e2720222c231c1c2837292c30313434341f27393d38323c2e333432ffc0000b080001000101"
+    "011100ffc4001f0000010501010101010100000000000000000102030405060708090a0bffc400b5100002010303020403"
+    "050504040000017d01020300041105122131410613516107227114328191a1082342b1c11552d1f02433627282090a1617"
+    "18191a25262728292a3435363738393a434445464748494a535455565758595a636465666768696a737475767778797a83"
+    "8485868788898a92939495969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6c7c8c9cad2d3d4d5d6d7"
+    "d8d9dae1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9faffda0008010100003f00fbd3ffd9"
+)
+
+
+def make_jpeg(name, size=(1280, 853)):
+    """Deterministic solid-colour JPEG per name (colour derived from the name's hash)"""
+    if Image is None:
+        return TINY_JPEG
+    color = tuple(hashlib.md5(name.encode()).digest()[:3])
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+class StubPexelsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, rate_limit_every=0, empty_queries=(), rate_limit_first=0,
+                 retry_after="0"):
+        super().__init__(address, StubPexelsHandler)
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.rate_limit_first = rate_limit_first
+        self.retry_after = retry_after
+        self.empty_queries = set(empty_queries)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0   # Most requests inside their latency window at the same time
+        self.search_count = 0
+        self.image_count = 0
+        self._images = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def image_bytes(self, name):
+        with self.lock:
+            if name not in self._images:
+                self._images[name] = make_jpeg(name)
+            return self._images[name]
+
+
+class StubPexelsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            count = server.request_count
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+        finally:
+            # Before the response goes out: the client may send its next request the moment it arrives
+            with server.lock:
+                server.in_flight -= 1
+        self._respond(server, count)
+
+    def _respond(self, server, count):
+        if count <= server.rate_limit_first or (server.rate_limit_every and count % server.rate_limit_every == 0):
+            return self._send(429, b'{"error": "rate limited"}', headers={"Retry-After": server.retry_after})
+
+        url = urlparse(self.path)
+        if url.path == "/v1/search":
+            with server.lock:
+                server.search_count += 1
+            query = parse_qs(url.query).get("query", [""])[0]
+            photos = []
+            if query and query not in server.empty_queries:
+                src = f"{server.base_url}/images/{quote(query)}.jpg"
+                photos = [{"id": 1, "src": {"large": src, "original": src}}]
+            return self._send(200, json.dumps({"photos": photos}).encode())
+
+        if url.path.startswith("/images/"):
+            with server.lock:
+                server.image_count += 1
+            return self._send(200, server.image_bytes(url.path), content_type="image/jpeg")
+
+        return self._send(404, b'{"error": "not found"}')
+
+
+def start_stub_server(port=0, **kwargs):
+    """Starts the stub in a background thread. Returns the server; call .shutdown() when done."""
+    server = StubPexelsServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="answer every Nth request with 429")
+    args = parser.parse_args()
+
+    server = StubPexelsServer(("127.0.0.1", args.port), latency=args.latency,
+                              rate_limit_every=args.rate_limit_every)
+    print(f"🧪 Stub Pexels API on {server.base_url}/v1/search")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+BROLL_CACHE_DIR = "broll_cache"        # Shared across jobs; NOT wiped by "Clear Temporary Files"
+MAX_BROLL_CACHE_BYTES = 2 * 1024 ** 3  # 2 GB of images + prepared buffers, least-recently-used evicted first
+NEGATIVE_TTL = 7 * 24 * 3600           # Re-ask Pexels about keywords with no results after a week
+EVICT_GRACE_SECONDS = 6 * 3600         # Images used this recently may belong to a job still rendering; never evicted
+# ==============================================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS keywords (
+    lemma       TEXT PRIMARY KEY,
+    query       TEXT NOT NULL,
+    image_hash  TEXT,               -- NULL = Pexels had nothing for this keyword
+    source_url  TEXT,
+    fetched_at  REAL NOT NULL,
+    last_used   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS images (
+    hash        TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    last_used   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prepared (
+    path        TEXT PRIMARY KEY,   -- broll_prep buffer, relative to the cache root
+    source_hash TEXT NOT NULL,      -- sha256 of the image it was cut from (= images.hash for cached images)
+    size        INTEGER NOT NULL,
+    last_used   REAL NOT NULL
+);
+"""
+
+
+def normalize_keyword(lemma):
+    return " ".join(lemma.lower().split())
+
+
+class BrollCache:
+    """
+    Keyword -> image cache shared by every job.
+
+    Keywords are indexed by their normalized lemma ("cars" and "car" share an
+    entry); image bytes are stored once under their sha256, so two keywords
+    that resolve to the same photo share a file. Metadata lives in SQLite.
+    """
+
+    def __init__(self, root=BROLL_CACHE_DIR, max_bytes=MAX_BROLL_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.image_dir = os.path.join(root, "images")
+        os.makedirs(self.image_dir, exist_ok=True)
+
+        self.db = sqlite3.connect(os.path.join(root, "index.sqlite3"))
+        self.db.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def image_path(self, image_hash):
+        return os.path.join(self.image_dir, f"{image_hash}.jpg")
+
+    def lookup(self, lemma):
+        """
+        Returns the cached image path, False if the keyword is known to have no
+        image, or None on a miss (never searched, expired, or file evicted).
+        """
+        lemma = normalize_keyword(lemma)
+        row = self.db.execute(
+            "SELECT image_hash, fetched_at FROM keywords WHERE lemma = ?", (lemma,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        image_hash, fetched_at = row
+        now = time.time()
+        if image_hash is None:
+            if now - fetched_at > NEGATIVE_TTL:
+                self.misses += 1
+                return None
+            path = False
+        else:
+            path = self.image_path(image_hash)
+            if not os.path.exists(path):
+                self.misses += 1
+                return None
+            self.db.execute("UPDATE images SET last_used = ? WHERE hash = ?", (now, image_hash))
+
+        self.db.execute("UPDATE keywords SET last_used = ? WHERE lemma = ?", (now, lemma))
+        self.db.commit()
+        self.hits += 1
+        return path
+
+    def add(self, lemma, query, downloaded_path=None, source_url=None):
+        """
+        Records a search result. The downloaded file (if any) is moved into the
+        content-addressed store. Returns the cached image path, or False.
+        """
+        lemma = normalize_keyword(lemma)
+        now = time.time()
+        image_hash = None
+        path = False
+
+        if downloaded_path:
+            digest = hashlib.sha256()
+            with open(downloaded_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            image_hash = digest.hexdigest()
+            path = self.image_path(image_hash)
+            if os.path.exists(path):
+                os.remove(downloaded_path)   # Same photo already cached for another keyword
+            else:
+                shutil.move(downloaded_path, path)
+            self.db.execute(
+                "INSERT OR REPLACE INTO images (hash, size, last_used) VALUES (?, ?, ?)",
+                (image_hash, os.path.getsize(path), now))
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO keywords (lemma, query, image_hash, source_url, fetched_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (lemma, query, image_hash, source_url, now, now))
+        self.db.commit()
+        return path
+
+    def register(self, paths):
+        """
+        Indexes image files put back into the store from outside (an artifact cache
+        restore of a visual plan), so they count towards max_bytes and their
+        last_used protects them while the job that restored them renders.
+        """
+        now = time.time()
+        for path in paths:
+            if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.image_dir) or not os.path.exists(path):
+                continue
+            image_hash = os.path.splitext(os.path.basename(path))[0]
+            self.db.execute(
+                "INSERT OR REPLACE INTO images (hash, size, last_used) VALUES (?, ?, ?)",
+                (image_hash, os.path.getsize(path), now))
+        self.db.commit()
+
+    def add_prepared(self, entries):
+        """Indexes broll_prep buffers [(path, source_hash)], new or reused, so evict() manages them too"""
+        now = time.time()
+        for path, source_hash in entries:
+            if os.path.exists(path):
+                self.db.execute(
+                    "INSERT OR REPLACE INTO prepared (path, source_hash, size, last_used) VALUES (?, ?, ?, ?)",
+                    (os.path.relpath(path, self.root), source_hash, os.path.getsize(path), now))
+        self.db.commit()
+
+    def evict(self, keep=(), grace=EVICT_GRACE_SECONDS):
+        """
+        Deletes least-recently-used images and prepared buffers until the store fits in
+        max_bytes. Images in `keep` (paths the current job's plan uses), the buffers cut
+        from them, and anything used within the last `grace` seconds (other jobs' plans,
+        not rendered yet) are never deleted, even if that leaves the store over budget.
+        """
+        total = self.db.execute(
+            "SELECT (SELECT COALESCE(SUM(size), 0) FROM images) + (SELECT COALESCE(SUM(size), 0) FROM prepared)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return total
+
+        keep = {os.path.splitext(os.path.basename(path))[0] for path in keep if path}
+        cutoff = time.time() - grace
+        for table, key, source_hash, size, _ in self.db.execute(
+                "SELECT 'images', hash, hash, size, last_used FROM images WHERE last_used < ? "
+                "UNION ALL SELECT 'prepared', path, source_hash, size, last_used FROM prepared WHERE last_used < ? "
+                "ORDER BY last_used ASC", (cutoff, cutoff)).fetchall():
+            if total <= self.max_bytes:
+                break
+            if source_hash in keep:
+                continue
+            if table == "images":
+                path = self.image_path(key)
+                self.db.execute("DELETE FROM images WHERE hash = ?", (key,))
+                self.db.execute("DELETE FROM keywords WHERE image_hash = ?", (key,))
+            else:
+                path = os.path.join(self.root, key)
+                self.db.execute("DELETE FROM prepared WHERE path = ?", (key,))
+            if os.path.exists(path):
+                os.remove(path)   # A render that already memory-mapped it keeps its copy (POSIX)
+            total -= size
+        self.db.commit()
+        return total
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import telemetry
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+PEXELS_SEARCH_URL = os.environ.get("PEXELS_API_URL", "https://api.pexels.com/v1/search")
+MAX_CONCURRENT_FETCHES = 8
+REQUEST_TIMEOUT = (5, 20)     # (connect, read) seconds
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0            # seconds, doubled on every retry unless Retry-After says otherwise
+MAX_RETRY_AFTER = 30          # seconds; a longer Retry-After (e.g. quota exhausted) gives up instead of waiting
+STREAM_CHUNK = 64 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# ==============================================================================
+
+
+class BrollFetcher:
+    """Resolves keywords to Pexels images over one pooled HTTP session, many at a time"""
+
+    def __init__(self, api_key, concurrency=MAX_CONCURRENT_FETCHES, timeout=REQUEST_TIMEOUT,
+                 search_url=PEXELS_SEARCH_URL):
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.search_url = search_url
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0}
+        self.empty_queries = set()   # Searches that succeeded but returned no photos
+        self.latency = {"search": telemetry.histogram("http.search"),
+                        "download": telemetry.histogram("http.download")}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _get(self, url, **kwargs):
+        """GET with per-request timeouts and exponential backoff on 429/5xx and network errors"""
+        for attempt in range(MAX_RETRIES + 1):
+            self._count("requests")
+            try:
+                r = self.session.get(url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == MAX_RETRIES:
+                    raise
+                r = None
+
+            if r is not None and r.status_code not in RETRY_STATUSES:
+                return r
+            if attempt == MAX_RETRIES:
+                return r
+
+            delay = BACKOFF_BASE * (2 ** attempt)
+            if r is not None:
+                if r.status_code == 429:
+                    self._count("rate_limited")
+                retry_after = r.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = float(retry_after)
+                    if delay > MAX_RETRY_AFTER:
+                        return r   # Don't hold a magic edit slot for an hour-long quota reset
+                r.close()
+            self._count("retries")
+            time.sleep(delay)
+
+    def search(self, query):
+        """Returns the 'large' image URL of the first Pexels hit, or None"""
+        with self.latency["search"].time():
+            r = self._get(self.search_url, params={"query": query, "per_page": 1},
+                          headers={"Authorization": self.api_key})
+        if r is None or r.status_code != 200:
+            return None
+        photos = r.json().get("photos")
+        if not photos:
+            with self._lock:
+                self.empty_queries.add(query)
+            return None
+        return photos[0]["src"]["large"]
+
+    def download(self, url, filename):
+        """Streams the image straight to disk; the file only appears once it is complete"""
+        r = self._get(url, stream=True)
+        if r is None or r.status_code != 200:
+            if r is not None:
+                r.close()
+            return False
+
+        partial = filename + ".part"
+        t0 = time.perf_counter()
+        try:
+            with open(partial, "wb") as f:
+                for chunk in r.iter_content(STREAM_CHUNK):
+                    f.write(chunk)
+        finally:
+            r.close()
+            self.latency["download"].observe(time.perf_counter() - t0 + r.elapsed.total_seconds())
+        os.replace(partial, filename)
+        return True
+
+    def fetch(self, query, filename):
+        """Downloads a relevant image for `query` to `filename`. Returns the image URL, or None."""
+        if not self.api_key:
+            return None
+        try:
+            img_url = self.search(query)
+            if img_url and self.download(img_url, filename):
+                return img_url
+        except Exception as e:
+            print(f"⚠️ Error downloading {query}: {e}")
+        return None
+
+    def fetch_many(self, jobs):
+        """Resolves [(query, filename), ...] concurrently. Returns {filename: image URL or None}."""
+        if not jobs:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(jobs))) as pool:
+            results = pool.map(lambda job: self.fetch(*job), jobs)
+            return {filename: url for (_, filename), url in zip(jobs, results)}
+
+    def close(self):
+        self.session.close()
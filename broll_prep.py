@@ -0,0 +1,102 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from broll_cache import BROLL_CACHE_DIR, BrollCache
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+PREPARED_DIR = os.path.join(BROLL_CACHE_DIR, "prepared")   # Indexed and evicted with the images (broll_cache.py)
+PREP_WORKERS = os.cpu_count() or 4
+# ==============================================================================
+
+
+def target_size(frame_w, ratio, width_pct=1.0):
+    """(width, height) of an overlay that spans `width_pct` of the frame at `ratio`"""
+    w = int(round(frame_w * width_pct))
+    return w, int(round(w / ratio))
+
+
+def crop_to_ratio(image, ratio):
+    """Center-crops a PIL image to the given width/height ratio"""
+    w, h = image.size
+    if w / h > ratio:
+        new_w = int(round(h * ratio))
+        left = (w - new_w) // 2
+        return image.crop((left, 0, left + new_w, h))
+    new_h = int(round(w / ratio))
+    top = (h - new_h) // 2
+    return image.crop((0, top, w, top + new_h))
+
+
+def prepare_image(image, size, ratio):
+    """Crops + scales a PIL image (or HxWx3 array) once, returning a ready-to-blit uint8 array"""
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    image = crop_to_ratio(image.convert("RGB"), ratio)
+    if image.size != size:
+        image = image.resize(size, Image.LANCZOS)
+    return np.asarray(image, dtype=np.uint8)
+
+
+def _source_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def prepared_path(source_hash, size, ratio):
+    w, h = size
+    return os.path.join(PREPARED_DIR, f"{source_hash[:32]}_{w}x{h}_r{ratio:.4f}.npy")
+
+
+def _prepare_one(src, size, ratio):
+    source_hash = _source_hash(src)
+    out = prepared_path(source_hash, size, ratio)
+    if os.path.exists(out):
+        return out, source_hash, True
+
+    with Image.open(src) as image:
+        image.draft("RGB", size)   # Lets JPEG decode at a reduced scale when the source is huge
+        array = prepare_image(image, size, ratio)
+
+    partial = f"{out}.{os.getpid()}-{threading.get_ident()}.part.npy"   # Unique per worker
+    np.save(partial, array)
+    os.replace(partial, out)
+    return out, source_hash, False
+
+
+def prepare_assets(sources, size, ratio, workers=PREP_WORKERS):
+    """
+    Decodes, crops and scales every B-roll source exactly once for this output geometry.
+    Results are cached as .npy keyed by source hash + geometry and returned as
+    {src: read-only memory-mapped uint8 array}. The buffers are recorded in the B-roll
+    cache index, which evicts them LRU within the same size budget as the images.
+    """
+    sources = sorted(set(s for s in sources if os.path.exists(s)))
+    if not sources:
+        return {}
+    os.makedirs(PREPARED_DIR, exist_ok=True)
+
+    # Pillow releases the GIL while decoding/resampling, so threads scale across cores
+    with ThreadPoolExecutor(max_workers=min(workers, len(sources))) as pool:
+        results = list(pool.map(lambda src: _prepare_one(src, size, ratio), sources))
+
+    prepared = {src: np.load(path, mmap_mode="r") for src, (path, _, _) in zip(sources, results)}
+    cache = BrollCache(os.path.dirname(PREPARED_DIR))
+    try:
+        cache.add_prepared((path, source_hash) for path, source_hash, _ in results)
+        cache.evict(keep=[source_hash for _, source_hash, _ in results])
+    finally:
+        cache.close()
+
+    hits = sum(1 for _, _, cached in results if cached)
+    print(f"   🧰 B-Roll prepared: {len(sources)} assets at {size[0]}x{size[1]} ({hits} cached)")
+    return prepared
@@ -0,0 +1,123 @@
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+DEFAULT_FONT_SIZE = 70
+DEFAULT_TEXT_COLOR = (255, 255, 0)     # yellow
+DEFAULT_STROKE_COLOR = (0, 0, 0)       # black
+DEFAULT_STROKE_WIDTH = 3
+
+# System font names used in the UI -> TrueType file names PIL can search for
+SYSTEM_FONT_FILES = {
+    "Arial": ["arial.ttf", "Arial.ttf", "LiberationSans-Regular.ttf", "DejaVuSans.ttf"],
+    "Arial-Bold": ["arialbd.ttf", "Arial Bold.ttf", "LiberationSans-Bold.ttf", "DejaVuSans-Bold.ttf"],
+    "Impact": ["impact.ttf", "Impact.ttf"],
+    "Courier New": ["cour.ttf", "Courier New.ttf", "LiberationMono-Regular.ttf", "DejaVuSansMono.ttf"],
+    "Verdana": ["verdana.ttf", "Verdana.ttf", "DejaVuSans.ttf"],
+    "Segoe UI": ["segoeui.ttf", "DejaVuSans.ttf"],
+    "Tahoma": ["tahoma.ttf", "Tahoma.ttf", "DejaVuSans.ttf"],
+}
+# ==============================================================================
+
+
+def load_font(font, size=DEFAULT_FONT_SIZE):
+    """Loads a font from a .ttf path or a system font name, falling back to PIL's default"""
+    candidates = [font] + SYSTEM_FONT_FILES.get(font, []) + SYSTEM_FONT_FILES["Arial"]
+    for candidate in candidates:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+
+    print(f"⚠️ Font '{font}' not found. Falling back to PIL default font.")
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1 has no sized default font
+        return ImageFont.load_default()
+
+
+class Bitmap:
+    """A pre-rasterized RGBA caption, stored ready for alpha blending into uint8 frames"""
+
+    def __init__(self, rgba):
+        rgba = np.asarray(rgba, dtype=np.float32)
+        alpha = rgba[:, :, 3:4] / 255.0
+        self.h, self.w = rgba.shape[:2]
+        self.premultiplied = rgba[:, :, :3] * alpha
+        self.inv_alpha = 1.0 - alpha
+
+    def blit(self, frame, x, y):
+        """Alpha-blends this bitmap into `frame` (H x W x 3, uint8) in place at top-left (x, y)"""
+        x, y = int(round(x)), int(round(y))
+        fh, fw = frame.shape[:2]
+
+        # Clip against the frame edges
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + self.w, fw), min(y + self.h, fh)
+        if x0 >= x1 or y0 >= y1:
+            return frame
+
+        bx0, by0 = x0 - x, y0 - y
+        bx1, by1 = bx0 + (x1 - x0), by0 + (y1 - y0)
+
+        region = frame[y0:y1, x0:x1, :3]
+        blended = region * self.inv_alpha[by0:by1, bx0:bx1] + self.premultiplied[by0:by1, bx0:bx1]
+        region[...] = blended.astype(np.uint8)
+        return frame
+
+
+class FontAtlas:
+    """Rasterizes a font once and caches one bitmap per (word, color) with the stroke baked in"""
+
+    def __init__(self, font, size=DEFAULT_FONT_SIZE, color=DEFAULT_TEXT_COLOR,
+                 stroke_color=DEFAULT_STROKE_COLOR, stroke_width=DEFAULT_STROKE_WIDTH):
+        self.font_name = font
+        self.size = size
+        self.color = color
+        self.stroke_color = stroke_color
+        self.stroke_width = stroke_width
+        self.font = load_font(font, size)
+        self._bitmaps = {}
+        self.hits = 0
+        self.misses = 0
+
+    def rasterize(self, text, color=None):
+        """Renders `text` to a tightly cropped RGBA array (no caching)"""
+        color = color or self.color
+        left, top, right, bottom = self.font.getbbox(text, stroke_width=self.stroke_width)
+        width, height = max(right - left, 1), max(bottom - top, 1)
+
+        image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        draw.text((-left, -top), text, font=self.font, fill=color,
+                  stroke_width=self.stroke_width, stroke_fill=self.stroke_color)
+        return np.array(image)
+
+    def get(self, text, color=None):
+        """Returns the cached Bitmap for `text`, rasterizing it on first use"""
+        key = (text, color or self.color)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            self.misses += 1
+            bitmap = Bitmap(self.rasterize(text, color))
+            self._bitmaps[key] = bitmap
+        else:
+            self.hits += 1
+        return bitmap
+
+    def preload(self, words, color=None):
+        """Rasterizes every unique word up front so rendering never hits the font engine"""
+        for word in set(words):
+            self.get(word, color)
+        return len(self._bitmaps)
+
+    def measure(self, text):
+        """Returns the (width, height) the rendered text will occupy"""
+        left, top, right, bottom = self.font.getbbox(text, stroke_width=self.stroke_width)
+        return right - left, bottom - top
+
+    def __len__(self):
+        return len(self._bitmaps)
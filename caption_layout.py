@@ -0,0 +1,220 @@
+import bisect
+import itertools
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw
+
+from caption_engine import (Bitmap, FontAtlas, load_font, DEFAULT_FONT_SIZE, DEFAULT_TEXT_COLOR,
+                            DEFAULT_STROKE_COLOR, DEFAULT_STROKE_WIDTH)
+from columnar import timed_words
+from compositor import Layer
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+PHRASE_GAP_SECONDS = 0.35     # A pause at least this long starts a new phrase
+MAX_PHRASE_WORDS = 5
+MAX_PHRASE_LINES = 2
+MAX_LINE_WIDTH_PCT = 0.8      # Lines wrap before this fraction of the frame width
+LINE_SPACING = 1.05           # Line advance as a multiple of the font's ascent + descent
+PHRASE_TEXT_COLOR = (255, 255, 255)        # white
+ACTIVE_WORD_COLOR = DEFAULT_TEXT_COLOR     # the word being spoken (yellow)
+PHRASE_CACHE_SIZE = 8         # Rasterized phrase bitmaps kept (frames arrive in time order)
+# ==============================================================================
+
+
+class Phrase:
+    """A run of words shown together, with its line breaks and word positions fixed up front"""
+
+    __slots__ = ("index", "words", "starts", "ends", "lines", "positions", "size")
+
+    def __init__(self, index, words, starts, ends, lines, positions, size):
+        self.index = index
+        self.words = words           # display text per word
+        self.starts = starts         # per-word start times (sorted)
+        self.ends = ends
+        self.lines = lines           # [[word index, ...], ...]
+        self.positions = positions   # (x, line top) per word inside the phrase bitmap, whole pixels
+        self.size = size             # (w, h) of the phrase bitmap
+
+    @property
+    def start(self):
+        return self.starts[0]
+
+    @property
+    def end(self):
+        return self.ends[-1]
+
+    def active_word(self, t):
+        """Index of the word being (or last) spoken at t, -1 before the first word"""
+        return bisect.bisect_right(self.starts, t) - 1
+
+
+class PhraseLayout:
+    """
+    Groups word segments into phrases and lays each one out once.
+
+    Word widths come from a per-word metrics cache, so wrapping a whole
+    transcript measures each distinct word a single time.
+    """
+
+    def __init__(self, font, frame_w, size=DEFAULT_FONT_SIZE, stroke_width=DEFAULT_STROKE_WIDTH,
+                 max_width_pct=MAX_LINE_WIDTH_PCT, max_words=MAX_PHRASE_WORDS, max_lines=MAX_PHRASE_LINES,
+                 gap_seconds=PHRASE_GAP_SECONDS):
+        self.font_name = font
+        self.size = size
+        self.font = load_font(font, size)
+        self.stroke_width = stroke_width
+        self.max_width = frame_w * max_width_pct
+        self.max_words = max_words
+        self.max_lines = max_lines
+        self.gap_seconds = gap_seconds
+        self.ascent, self.descent = self.font.getmetrics()
+        self.line_height = int(round((self.ascent + self.descent) * LINE_SPACING))
+        self.space = self.font.getlength(" ")
+        self._widths = {}
+
+    def width(self, word):
+        w = self._widths.get(word)
+        if w is None:
+            w = self._widths[word] = self.font.getlength(word)
+        return w
+
+    def _line_width(self, words, first, last):
+        return sum(self.width(w) for w in words[first:last]) + self.space * (last - first - 1)
+
+    def break_lines(self, words):
+        """
+        Line breaks as lists of word indices, or None if the words need more than max_lines.
+        Uses the fewest lines that fit, with the breaks that make the longest line shortest
+        (balanced lines instead of one dangling word).
+        """
+        n = len(words)
+        for count in range(1, min(self.max_lines, n) + 1):
+            best, best_width = None, None
+            for cuts in itertools.combinations(range(1, n), count - 1):
+                bounds = (0,) + cuts + (n,)
+                width = max(self._line_width(words, a, b) for a, b in zip(bounds, bounds[1:]))
+                if width <= self.max_width and (best is None or width < best_width):
+                    best, best_width = bounds, width
+            if best is not None:
+                return [list(range(a, b)) for a, b in zip(best, best[1:])]
+        return None
+
+    def _place(self, words, lines):
+        """Centers every line; returns per-word (x, line top) in whole pixels and the bitmap size"""
+        pad = self.stroke_width + 2   # Stroke and glyph overhang past the advance width
+        line_widths = [self._line_width(words, line[0], line[-1] + 1) for line in lines]
+        box_w = max(line_widths)
+        positions = [None] * len(words)
+        for row, (line, line_w) in enumerate(zip(lines, line_widths)):
+            x = pad + (box_w - line_w) / 2
+            for i in line:
+                positions[i] = (int(round(x)), pad + row * self.line_height)
+                x += self.width(words[i]) + self.space
+        size = (int(box_w + 2 * pad + 0.5),
+                int(self.ascent + self.descent + (len(lines) - 1) * self.line_height + 2 * pad + 0.5))
+        return positions, size
+
+    def group(self, word_segments):
+        """
+        Splits the transcript (a columnar.Table or word dicts) at pauses, sentence ends,
+        the word cap and the line budget
+        """
+        runs, current = [], []
+        for _, word, start, end in timed_words(word_segments):
+            word = word.strip()
+            if current:
+                prev_word, _, prev_end = current[-1]
+                if (start - prev_end >= self.gap_seconds or prev_word.endswith((".", "!", "?"))
+                        or len(current) >= self.max_words
+                        or self.break_lines([w for w, _, _ in current] + [word]) is None):
+                    runs.append(current)
+                    current = []
+            current.append((word, start, end))
+        if current:
+            runs.append(current)
+
+        phrases = []
+        for run in runs:
+            words = [w for w, _, _ in run]
+            # A single word wider than the line budget still gets its own one-line phrase
+            lines = self.break_lines(words) or [list(range(len(words)))]
+            positions, size = self._place(words, lines)
+            phrases.append(Phrase(len(phrases), words, [s for _, s, _ in run], [e for _, _, e in run],
+                                  lines, positions, size))
+        return phrases
+
+
+class PhraseAtlas:
+    """
+    One bitmap per phrase plus a highlighted bitmap per word, both rasterized on first use.
+
+    The spoken word is highlighted by blitting its cached highlight variant over
+    the phrase at the word's precomputed position: the glyphs and stroke are
+    identical, so the variant covers the base word exactly. Highlight variants
+    are shared by every phrase using the word. Only the most recent phrase bitmaps
+    are kept: the encoder walks the timeline forwards, so a phrase is not needed
+    again once it has ended.
+    """
+
+    def __init__(self, layout, color=PHRASE_TEXT_COLOR, active_color=ACTIVE_WORD_COLOR,
+                 stroke_color=DEFAULT_STROKE_COLOR, cache_size=PHRASE_CACHE_SIZE):
+        self.layout = layout
+        self.color = color
+        self.stroke_color = stroke_color
+        self.cache_size = cache_size
+        self.highlights = FontAtlas(layout.font_name, layout.size, color=active_color,
+                                    stroke_color=stroke_color, stroke_width=layout.stroke_width)
+        self._offsets = {}
+        self._bitmaps = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def rasterize(self, phrase):
+        image = Image.new("RGBA", phrase.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        font, stroke = self.layout.font, self.layout.stroke_width
+        for word, xy in zip(phrase.words, phrase.positions):
+            draw.text(xy, word, font=font, fill=self.color, stroke_width=stroke, stroke_fill=self.stroke_color)
+        return Bitmap(image)
+
+    def get(self, phrase):
+        bitmap = self._bitmaps.get(phrase.index)
+        if bitmap is not None:
+            self.hits += 1
+            self._bitmaps.move_to_end(phrase.index)
+            return bitmap
+        self.misses += 1
+        bitmap = self._bitmaps[phrase.index] = self.rasterize(phrase)
+        while len(self._bitmaps) > self.cache_size:
+            self._bitmaps.popitem(last=False)
+        return bitmap
+
+    def highlight(self, phrase, i):
+        """(bitmap, x, y) of word i's highlight variant, relative to the phrase bitmap"""
+        word = phrase.words[i]
+        offset = self._offsets.get(word)
+        if offset is None:
+            # FontAtlas bitmaps are cropped to the stroked bbox; this is where that crop starts
+            left, top, _, _ = self.layout.font.getbbox(word, stroke_width=self.layout.stroke_width)
+            offset = self._offsets[word] = (left, top)
+        x, y = phrase.positions[i]
+        return self.highlights.get(word), x + offset[0], y + offset[1]
+
+
+def phrase_layers(phrases, atlas, frame_w, y_pos, z=1):
+    """One compositor layer per phrase: the phrase bitmap, then the spoken word's highlight on top"""
+    y_pos = int(round(y_pos))   # Whole pixels, so phrase and highlight blits line up exactly
+
+    def make_draw(phrase, x):
+        def draw(frame, t):
+            atlas.get(phrase).blit(frame, x, y_pos)
+            i = phrase.active_word(t)
+            if i >= 0:
+                bitmap, dx, dy = atlas.highlight(phrase, i)
+                bitmap.blit(frame, x + dx, y_pos + dy)
+            return frame
+        return draw
+
+    return [Layer(p.start, p.end, make_draw(p, (frame_w - p.size[0]) // 2), z) for p in phrases]
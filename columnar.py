@@ -0,0 +1,340 @@
+"""
+Columnar storage for transcripts and visual plans.
+
+The JSON files stay the interchange format (they are what users edit and what
+the cache stores). Next to each one lives a `<file>.npz` sidecar holding the
+same rows as parallel arrays (float32 times, interned string tables), stamped
+with the JSON's size and mtime. Readers go through `open_table`, which
+memory-maps a fresh sidecar or rebuilds it from the JSON once.
+
+Usage:
+    python columnar.py transcription_data.json          # build/refresh the sidecar, print stats
+    python columnar.py transcription_data.json.npz --export out.json
+"""
+import argparse
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+SIDECAR_SUFFIX = ".npz"
+FORMAT_VERSION = 1
+# Stored as float32 and exported rounded to milliseconds (exact up to ~2.3 h, +-2 ms beyond)
+TIME_COLUMNS = ("start", "end", "duration")
+TIME_DECIMALS = 3
+WORD_BLOCK = 4096          # Rows timed_words converts at a time
+WORD_FIELDS = ("word", "start", "end")   # All the caption and planning stages read from a transcript row (timed_words)
+# ==============================================================================
+
+
+# --- WRITING ---
+
+def _kind(name, values):
+    """Column type from its non-missing values"""
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, bool) for v in present):
+        return "bool"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        if name in TIME_COLUMNS:
+            return "time"
+        return "int" if all(isinstance(v, int) for v in present) and len(present) == len(values) else "float"
+    if all(isinstance(v, str) for v in present):
+        return "str"
+    return "json"
+
+
+def _intern(texts):
+    """Row ids into a table of unique strings stored as one UTF-8 blob + offsets (-1 = missing)"""
+    table, ids = {}, np.empty(len(texts), dtype=np.int32)
+    for i, text in enumerate(texts):
+        ids[i] = -1 if text is None else table.setdefault(text, len(table))
+    blobs = [t.encode("utf-8") for t in table]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+    return ids, np.frombuffer(b"".join(blobs), dtype=np.uint8), offsets
+
+
+def _time_index(arrays, schema):
+    """Rows sorted by start (once), so range queries are two binary searches"""
+    if "start" not in arrays:
+        return
+    start = arrays["start"]
+    if "end" in arrays:
+        span = arrays["end"] - start
+    elif "duration" in arrays:
+        span = arrays["duration"]
+    else:
+        span = np.zeros_like(start)
+    finite = np.isfinite(start)
+    schema["max_span"] = float(np.nanmax(span[finite], initial=0.0)) if finite.any() else 0.0
+    schema["sorted"] = bool(finite.all() and np.all(np.diff(start) >= 0))
+    if not schema["sorted"]:
+        order = np.flatnonzero(finite)
+        order = order[np.argsort(start[order], kind="stable")].astype(np.int32)
+        arrays["__order__"] = order
+        arrays["__sorted_start__"] = start[order]
+
+
+def _columns(records):
+    """records -> (arrays, schema)"""
+    names = []
+    for record in records:
+        for key in record:
+            if key not in names:
+                names.append(key)
+
+    arrays, kinds = {}, {}
+    for name in names:
+        values = [r.get(name) for r in records]
+        kind = kinds[name] = _kind(name, values)
+        if kind in ("time", "float"):
+            dtype = np.float32 if kind == "time" else np.float64
+            arrays[name] = np.array([np.nan if v is None else v for v in values], dtype=dtype)
+        elif kind == "int":
+            arrays[name] = np.array(values, dtype=np.int64)
+        elif kind == "bool":
+            arrays[name] = np.array([-1 if v is None else int(v) for v in values], dtype=np.int8)
+        else:
+            texts = values if kind == "str" else [None if v is None else json.dumps(v) for v in values]
+            arrays[name], arrays[name + ".text"], arrays[name + ".offsets"] = _intern(texts)
+
+    schema = {"version": FORMAT_VERSION, "rows": len(records), "columns": kinds}
+    _time_index(arrays, schema)
+    return arrays, schema
+
+
+def save(records, path, source=None):
+    """Writes rows as an uncompressed .npz (members can be memory-mapped). Returns the loaded Table."""
+    arrays, schema = _columns(records)
+    if source:
+        st = os.stat(source)
+        schema["source"] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    arrays["__schema__"] = np.frombuffer(json.dumps(schema).encode("utf-8"), dtype=np.uint8)
+
+    tmp = f"{path}.{os.getpid()}.tmp"   # Parallel render workers may rebuild the same sidecar
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+    return Table(arrays, schema)
+
+
+# --- READING ---
+
+_HEADER_READERS = {(1, 0): np.lib.format.read_array_header_1_0, (2, 0): np.lib.format.read_array_header_2_0}
+
+
+def _mmap_members(path):
+    """Memory-maps every stored (uncompressed) .npy member of an .npz in place"""
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            name = info.filename[:-len(".npy")]
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(zf.open(info))
+                continue
+            # Local file header: fixed 30 bytes, then the name and extra field, then the .npy bytes
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            shape, fortran, dtype = _HEADER_READERS[np.lib.format.read_magic(f)](f)
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                         order="F" if fortran else "C")
+    return arrays
+
+
+class Table:
+    """Rows stored column by column; numeric columns are (memory-mapped) NumPy arrays"""
+
+    def __init__(self, arrays, schema):
+        self.arrays = arrays
+        self.schema = schema
+        self.kinds = schema["columns"]
+        self._strings = {}
+
+    @classmethod
+    def from_records(cls, records):
+        """In-memory table (no file), e.g. for range queries over derived rows"""
+        return cls(*_columns(list(records)))
+
+    def __len__(self):
+        return self.schema["rows"]
+
+    def column(self, name):
+        """Raw column: floats (NaN = missing), int8 bools (-1 = missing) or string ids (-1 = missing)"""
+        return self.arrays[name]
+
+    def strings(self, name):
+        """Interned string table of a str/json column (decoded once)"""
+        table = self._strings.get(name)
+        if table is None:
+            blob = self.arrays[name + ".text"].tobytes()
+            offsets = self.arrays[name + ".offsets"].tolist()
+            table = [blob[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+            if self.kinds[name] == "json":
+                table = [json.loads(t) for t in table]
+            self._strings[name] = table
+        return table
+
+    def values(self, name, rows=None):
+        """Python values of one column (None = missing), optionally for a subset of rows"""
+        data = self.arrays[name] if rows is None else self.arrays[name][rows]
+        kind = self.kinds[name]
+        if kind == "time":
+            return [None if v != v else round(v, TIME_DECIMALS) for v in data.tolist()]
+        if kind == "float":
+            return [None if v != v else v for v in data.tolist()]
+        if kind == "int":
+            return data.tolist()
+        if kind == "bool":
+            return [None if v < 0 else bool(v) for v in data.tolist()]
+        table = self.strings(name)
+        return [None if i < 0 else table[i] for i in data.tolist()]
+
+    def records(self, rows=None, fields=None):
+        """
+        JSON-shaped dicts (missing values are left out, like the original file).
+        `fields` limits them to those columns: the other columns are never decoded.
+        """
+        names = [name for name in self.kinds if fields is None or name in fields]
+        columns = [(name, self.values(name, rows)) for name in names]
+        count = len(self) if rows is None else len(rows)
+        out = [{} for _ in range(count)]
+        for name, values in columns:
+            for record, value in zip(out, values):
+                if value is not None:
+                    record[name] = value
+        return out
+
+    def __iter__(self):
+        return iter(self.records())
+
+    def overlapping(self, t0, t1):
+        """
+        Indices (in file order) of rows live during [t0, t1): start < t1 and end > t0,
+        where end is `end` or `start + duration`. Two binary searches over the
+        start-sorted rows, widened by the longest row, then an exact filter.
+        """
+        if "start" not in self.arrays:
+            return np.empty(0, dtype=np.intp)
+        if self.schema["sorted"]:
+            starts, order = self.arrays["start"], None
+        else:
+            starts, order = self.arrays["__sorted_start__"], self.arrays["__order__"]
+        lo = np.searchsorted(starts, t0 - self.schema["max_span"], side="left")
+        hi = np.searchsorted(starts, t1, side="left")
+        rows = np.arange(lo, hi) if order is None else np.sort(order[lo:hi])
+
+        start = self.arrays["start"][rows]
+        if "end" in self.arrays:
+            end = self.arrays["end"][rows]
+        elif "duration" in self.arrays:
+            end = start + self.arrays["duration"][rows]
+        else:
+            end = start
+        # NaN ends compare False, matching the JSON readers that skip words without timestamps
+        return rows[end > t0]
+
+    def between(self, t0, t1, fields=None):
+        return self.records(self.overlapping(t0, t1), fields)
+
+
+def timed_words(words):
+    """
+    (row, text, start, end) for every transcript row with a word and both times, in file order.
+    A Table is walked straight off its columns and interned word table, one row at a time,
+    so no per-row dicts or full-length lists are built; JSON-shaped dicts work too.
+    """
+    if not isinstance(words, Table) or any(words.kinds.get(name) != kind for name, kind in
+                                            zip(WORD_FIELDS, ("str", "time", "time"))):
+        rows = words.records() if isinstance(words, Table) else words
+        for i, segment in enumerate(rows):
+            word, start, end = segment.get("word"), segment.get("start"), segment.get("end")
+            if word and start is not None and end is not None:
+                yield i, word, start, end
+        return
+
+    texts, ids = words.strings("word"), words.column("word")
+    starts, ends = words.column("start"), words.column("end")
+    for a in range(0, len(words), WORD_BLOCK):   # Block-wise: bounded memory, no per-element mmap indexing
+        b = min(a + WORD_BLOCK, len(words))
+        for i, word_id, start, end in zip(range(a, b), ids[a:b].tolist(), starts[a:b].tolist(), ends[a:b].tolist()):
+            if word_id < 0 or start != start or end != end:   # Missing word or NaN time
+                continue
+            text = texts[word_id]
+            if text:
+                yield i, text, round(start, TIME_DECIMALS), round(end, TIME_DECIMALS)
+
+
+def load(path):
+    """Opens an .npz table without reading its columns (they are paged in on access)"""
+    arrays = _mmap_members(path)
+    schema = json.loads(arrays.pop("__schema__").tobytes().decode("utf-8"))
+    if schema.get("version") != FORMAT_VERSION:
+        raise ValueError(f"'{path}' is columnar format v{schema.get('version')}, expected v{FORMAT_VERSION}")
+    return Table(arrays, schema)
+
+
+def sidecar_path(json_path):
+    return json_path + SIDECAR_SUFFIX
+
+
+def open_table(json_path):
+    """
+    Table for a transcript/plan JSON: the memory-mapped sidecar if it matches the
+    JSON's size and mtime, otherwise the JSON is parsed once and the sidecar rebuilt.
+    """
+    cache = sidecar_path(json_path)
+    st = os.stat(json_path)
+    stamp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if os.path.exists(cache):
+        try:
+            table = load(cache)
+            if table.schema.get("source") == stamp:
+                return table
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    try:
+        return save(records, cache, source=json_path)
+    except OSError:
+        return Table.from_records(records)   # Read-only folder: still usable, just not cached
+
+
+def load_records(json_path):
+    """Drop-in for json.load on transcript/plan files (missing file -> [])"""
+    if not os.path.exists(json_path):
+        return []
+    return open_table(json_path).records()
+
+
+def export_json(table, json_path):
+    """Writes the rows back out in the original JSON layout"""
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(table.records(), f, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="A transcript/plan .json (builds its sidecar) or an .npz table")
+    parser.add_argument("--export", default=None, metavar="JSON", help="Write the table back out as JSON")
+    args = parser.parse_args()
+
+    table = load(args.path) if args.path.endswith(SIDECAR_SUFFIX) else open_table(args.path)
+    print(f"✅ {len(table)} rows | columns: " + ", ".join(f"{n} ({k})" for n, k in table.kinds.items()))
+    if args.export:
+        export_json(table, args.export)
+        print(f"📄 Exported to '{args.export}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import os
+import subprocess
+import time
+
+from PIL import ImageFont
+
+import columnar
+import render
+import telemetry
+from media import find_ffmpeg, probe
+from caption_engine import load_font, DEFAULT_FONT_SIZE, DEFAULT_STROKE_WIDTH, DEFAULT_TEXT_COLOR
+from caption_layout import PhraseLayout, PHRASE_TEXT_COLOR, ACTIVE_WORD_COLOR
+from zoom_engine import ZOOM_CROP, is_animated
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+ENCODE_PRESET = "ultrafast"
+ASS_FALLBACK_FONT = "Arial"   # Font name handed to libass when the caption font isn't a loadable TrueType file
+# ==============================================================================
+
+_filters = {}   # ffmpeg binary -> `ffmpeg -filters` output (probed once per process)
+
+
+class BackendUnavailable(RuntimeError):
+    """`--backend ffmpeg` was asked for explicitly but can't render this plan"""
+
+
+def _has_filter(ffmpeg, name):
+    if ffmpeg not in _filters:
+        _filters[ffmpeg] = subprocess.run([ffmpeg, "-hide_banner", "-filters"], capture_output=True, text=True).stdout
+    return f" {name} " in _filters[ffmpeg]
+
+
+def unsupported_reason(visual_events, ffmpeg):
+    """Why this plan can't go through the filter-graph backend (None if it can)"""
+    if not ffmpeg:
+        return "ffmpeg not found"
+    if any(e.get("is_placeholder") for e in visual_events):
+        return "placeholder B-roll cards are drawn in Python"
+    if any(e["type"] == "zoom" and (is_animated(e) or "center" in e) for e in visual_events):
+        return "animated / off-center zooms are resampled by zoom_engine"
+    if not _has_filter(ffmpeg, "subtitles"):
+        return "ffmpeg was built without libass (no 'subtitles' filter)"
+    return None
+
+
+# --- CAPTIONS AS AN ASS SUBTITLE TRACK ---
+
+def ass_font_name(font):
+    """Family name libass should look up; load_font's Pillow bitmap fallback has none"""
+    if isinstance(font, ImageFont.FreeTypeFont):
+        return font.getname()[0]
+    print(f"⚠️ Caption font is not a TrueType font, subtitles will use '{ASS_FALLBACK_FONT}'")
+    return ASS_FALLBACK_FONT
+
+
+def _ass_time(t):
+    cs = int(round(max(t, 0) * 100))
+    h, cs = divmod(cs, 360000)
+    m, cs = divmod(cs, 6000)
+    s, cs = divmod(cs, 100)
+    return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+def _ass_escape(text):
+    # ASS has no escape for override braces or backslashes, so swap them for look-alikes
+    return text.replace("\\", "/").replace("{", "(").replace("}", ")").replace("\n", " ")
+
+
+def _ass_colour(rgb):
+    r, g, b = rgb
+    return f"&H00{b:02X}{g:02X}{r:02X}"
+
+
+def _phrase_dialogues(phrases):
+    """One Dialogue per (phrase, active word): precomputed \\N breaks, the spoken word recolored inline"""
+    active, base = _ass_colour(ACTIVE_WORD_COLOR)[4:], _ass_colour(PHRASE_TEXT_COLOR)[4:]
+    for phrase in phrases:
+        for k, start in enumerate(phrase.starts):
+            end = phrase.starts[k + 1] if k + 1 < len(phrase.starts) else phrase.end
+            text = "\\N".join(
+                " ".join(f"{{\\c&H{active}&}}{_ass_escape(phrase.words[i])}{{\\c&H{base}&}}" if i == k
+                         else _ass_escape(phrase.words[i]) for i in line)
+                for line in phrase.lines)
+            yield start, end, text
+
+
+def write_ass(word_segments, ass_path, width, height, font_name, y_pos,
+              font_size=DEFAULT_FONT_SIZE, stroke_width=DEFAULT_STROKE_WIDTH, phrases=None):
+    """
+    Captions top-centered at y_pos (matches the MoviePy caption layout): one Dialogue
+    line per word, or with `phrases` (caption_layout) the same phrases and line breaks
+    as the MoviePy path with the spoken word highlighted.
+    """
+    colour = _ass_colour(PHRASE_TEXT_COLOR if phrases is not None else DEFAULT_TEXT_COLOR)
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "ScaledBorderAndShadow: yes",
+        "WrapStyle: 2",   # Only our own \\N breaks; libass must not re-wrap the precomputed lines
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        # Colours are &HAABBGGRR; black outline
+        f"Style: Caption,{font_name},{font_size},{colour},{colour},&H00000000,&H00000000,"
+        f"0,0,0,0,100,100,0,0,1,{stroke_width},0,8,0,0,{int(round(y_pos))},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    if phrases is not None:
+        for start, end, text in _phrase_dialogues(phrases):
+            lines.append(f"Dialogue: 0,{_ass_time(start)},{_ass_time(end)},Caption,,0,0,0,,{text}")
+    else:
+        for _, word, start, end in columnar.timed_words(word_segments):
+            lines.append(f"Dialogue: 0,{_ass_time(start)},{_ass_time(end)},Caption,,0,0,0,,{_ass_escape(word)}")
+
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _filter_path(path):
+    """Escapes a file path for use as a filter option value"""
+    path = os.path.abspath(path).replace("\\", "/")
+    return path.replace(":", "\\:").replace("'", "\\'")
+
+
+# --- FILTER GRAPH ---
+
+def build_filter_graph(meta, zoom_events, image_events, overlay_size, ass_path, fonts_dir):
+    """
+    Compiles the plan into a single -filter_complex graph:
+      zooms   -> split + crop/scale of the source, overlaid while a zoom is active
+      B-roll  -> each image (input 1..N) cropped/scaled once, looped, overlaid with enable=between()
+      captions-> subtitles filter over the generated ASS file
+    """
+    w, h, fps = meta["width"], meta["height"], meta["fps"]
+    ratio = render.OVERLAY_RATIO
+    chains = []
+    current = "0:v"
+
+    if zoom_events:
+        windows = "+".join(f"between(t,{e['start']:.3f},{e['start'] + e['duration']:.3f})" for e in zoom_events)
+        off = round((1 - ZOOM_CROP) / 2, 6)
+        chains.append(f"[0:v]split=2[base][zsrc]")
+        chains.append(f"[zsrc]crop=iw*{ZOOM_CROP:g}:ih*{ZOOM_CROP:g}:iw*{off:g}:ih*{off:g},scale={w}:{h}[zoomed]")
+        chains.append(f"[base][zoomed]overlay=0:0:enable='{windows}'[vz]")
+        current = "vz"
+
+    ow, oh = overlay_size
+    for i, event in enumerate(image_events, start=1):
+        chains.append(
+            f"[{i}:v]crop='min(iw,ih*{ratio})':'min(ih,iw/{ratio})',scale={ow}:{oh},setsar=1,"
+            f"loop=loop=-1:size=1:start=0,setpts=N/{fps}/TB[img{i}]")
+        end = event["start"] + event["duration"]
+        chains.append(
+            f"[{current}][img{i}]overlay=(W-w)/2:(H-h)/2:shortest=1:"
+            f"enable='between(t,{event['start']:.3f},{end:.3f})'[vi{i}]")
+        current = f"vi{i}"
+
+    chains.append(f"[{current}]subtitles=filename='{_filter_path(ass_path)}':"
+                  f"fontsdir='{_filter_path(fonts_dir)}'[vout]")
+    return ";\n".join(chains)
+
+
+def render_ffmpeg(video_path, json_path, visual_plan_path, output_filename="final_overlay_edit.mp4",
+                  settings_path="settings.json", required=False):
+    """
+    Renders the whole edit in one ffmpeg process. Returns False if the plan needs the
+    MoviePy path, or raises BackendUnavailable instead when `required` (explicit --backend ffmpeg).
+    """
+    t0 = time.time()
+    word_segments = columnar.open_table(json_path)   # Read column-wise by the caption code (timed_words)
+    visual_events = columnar.load_records(visual_plan_path)
+
+    ffmpeg = find_ffmpeg()
+    reason = unsupported_reason(visual_events, ffmpeg)
+    if reason:
+        if required:
+            raise BackendUnavailable(f"FFmpeg backend can't render this plan: {reason} (use --backend auto or moviepy)")
+        print(f"↩️ FFmpeg backend unavailable ({reason}). Falling back to MoviePy.")
+        return False
+
+    meta = probe(video_path)
+    settings = render.load_settings(settings_path)
+    print(f"🎬 FFmpeg backend | Font: {settings['font']} | {meta['width']}x{meta['height']} @ {meta['fps']}fps")
+
+    zoom_events = sorted((e for e in visual_events if e["type"] == "zoom"), key=lambda e: e["start"])
+    image_events = [e for e in visual_events if e["type"] == "image" and os.path.exists(e["src"])]
+    for event in visual_events:
+        if event["type"] == "image" and not event.get("is_placeholder") and not os.path.exists(event["src"]):
+            print(f"   ⚠️ B-Roll image for '{event['keyword']}' is missing ('{event['src']}'), skipping it")
+
+    y_pos = render.caption_y(settings, meta["height"])
+    font_path = settings["font_path"]
+    font = load_font(font_path)
+    fonts_dir = os.path.dirname(font_path) if os.path.exists(font_path) else "fonts"
+
+    ass_path = output_filename + ".ass"
+    graph_path = output_filename + ".filtergraph.txt"
+    phrases = None
+    if settings["caption_mode"] == "phrase":
+        phrases = PhraseLayout(font_path, meta["width"]).group(word_segments)
+    write_ass(word_segments, ass_path, meta["width"], meta["height"], ass_font_name(font), y_pos, phrases=phrases)
+
+    overlay_size = render.target_size(meta["width"], render.OVERLAY_RATIO, render.OVERLAY_WIDTH_PCT)
+    graph = build_filter_graph(meta, zoom_events, image_events, overlay_size, ass_path, fonts_dir)
+    with open(graph_path, "w", encoding="utf-8") as f:
+        f.write(graph)
+
+    cmd = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error", "-i", video_path]
+    for event in image_events:
+        cmd += ["-i", event["src"]]
+    cmd += [
+        "-filter_complex_script", graph_path,
+        "-map", "[vout]", "-map", "0:a?",
+        "-c:v", "libx264", "-preset", ENCODE_PRESET, "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-r", str(meta["fps"]),
+        output_filename,
+    ]
+    print(f"🔥 Running single-pass filter graph ({len(zoom_events)} zooms, {len(image_events)} images, "
+          f"{len(word_segments)} caption words)...")
+    try:
+        with telemetry.span("ffmpeg_graph", zooms=len(zoom_events), images=len(image_events),
+                            words=len(word_segments), frames=int(meta["duration"] * meta["fps"])) as info:
+            children_peak = telemetry.peak_rss_mb(children=True)
+            subprocess.run(cmd, check=True)
+            # RUSAGE_CHILDREN is the largest child this worker ever waited for: only a rise is this FFmpeg's
+            ffmpeg_peak = telemetry.peak_rss_mb(children=True)
+            if ffmpeg_peak is not None and (children_peak is None or ffmpeg_peak > children_peak):
+                info["ffmpeg_peak_rss_mb"] = ffmpeg_peak
+    finally:
+        for path in (ass_path, graph_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    print(f"✅ DONE! Saved as '{output_filename}' in {time.time() - t0:.2f}s")
+    return True
@@ -0,0 +1,148 @@
+import json
+import multiprocessing
+import os
+import time
+
+import columnar
+import telemetry
+from artifact_cache import hash_file, hash_inputs, code_version
+from caption_layout import PhraseLayout
+from media import probe
+from parallel_render import (ENCODE_CODEC, ENCODE_PRESET, count_frames, encode_frames, concat_chunks,
+                             source_timeline)
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+SEGMENT_SECONDS = 5   # Output is cut into fixed segments of this length; only changed ones re-render
+MANIFEST_NAME = "manifest.json"
+# ==============================================================================
+
+
+def plan_segments(duration, fps, segment_seconds=SEGMENT_SECONDS):
+    """Fixed [first, last) frame ranges; boundaries depend only on fps, so they stay put across edits"""
+    total = count_frames(duration, fps)
+    size = max(1, int(round(segment_seconds * fps)))
+    return [(first, min(first + size, total)) for first in range(0, total, size)]
+
+
+def segment_fingerprints(segments, fps, source, captions, visual_events, settings, code):
+    """
+    One hash per segment over everything that can change its pixels: the source
+    frame range, the zoom/image events and captions (words or whole phrases) live
+    inside it, the style settings and the render code. Image events hash the image
+    bytes, not the path. `captions` and `visual_events` are columnar Tables, so each
+    segment pulls its rows with a range query instead of scanning the transcript.
+    """
+    image_hashes = {}
+    for src in visual_events.strings("src") if "src" in visual_events.kinds else []:
+        if os.path.exists(src):
+            image_hashes[src] = hash_file(src)
+
+    fingerprints = []
+    for first, last in segments:
+        t0, t1 = first / fps, last / fps
+        words = captions.between(t0, t1)
+        events = [{**e, "src_hash": image_hashes.get(e.get("src"))} for e in visual_events.between(t0, t1)]
+        fingerprints.append(hash_inputs(
+            source=source, first=first, last=last, fps=fps, words=words, events=events,
+            settings=settings, code=code, encoder=[ENCODE_CODEC, ENCODE_PRESET],
+        ))
+    return fingerprints
+
+
+def _render_group(job):
+    """Worker entry point: builds the MoviePy graph once and encodes a list of segments with it"""
+    video_path, json_path, plan_path, settings_path, fps, ranges = job
+    from render import build_final_video
+    final_video, main_clip = build_final_video(video_path, json_path, plan_path, settings_path)
+    try:
+        with telemetry.span("render_segments", segments=len(ranges),
+                            frames=sum(last - first for first, last, _ in ranges)):
+            for first, last, out_path in ranges:
+                encode_frames(final_video, first, last, fps, out_path + ".part.mp4")
+                os.replace(out_path + ".part.mp4", out_path)
+    finally:
+        main_clip.close()
+        telemetry.flush()   # Pool workers never reach atexit
+    return len(ranges)
+
+
+def render_incremental(video_path, json_path, visual_plan_path, output_filename="final_overlay_edit.mp4",
+                       settings_path="settings.json", workers=1, segment_seconds=SEGMENT_SECONDS):
+    """
+    Renders the edit as fixed-length segments kept next to the output, re-encoding only
+    segments whose fingerprint changed since the last run, then stream-copies them together.
+    """
+    from render import RENDER_SOURCES, load_settings   # Editing any of them invalidates every segment
+
+    t0 = time.time()
+    meta = probe(video_path)
+    duration, fps = source_timeline(video_path)   # MoviePy's frame grid, as the serial render uses
+    st = os.stat(video_path)
+    source = {"path": os.path.abspath(video_path), "size": st.st_size, "mtime": st.st_mtime}
+
+    words = columnar.open_table(json_path)
+    plan = columnar.Table.from_records([])
+    if os.path.exists(visual_plan_path):
+        plan = columnar.open_table(visual_plan_path)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = code_version(*[os.path.join(here, name) for name in RENDER_SOURCES])
+    settings = load_settings(settings_path)
+    captions = words
+    if settings["caption_mode"] == "phrase":
+        # A phrase shows all its words at once, so one edited word touches every segment the phrase spans
+        phrases = PhraseLayout(settings["font_path"], meta["width"]).group(words)
+        captions = columnar.Table.from_records(
+            {"start": p.start, "end": p.end, "words": p.words, "starts": p.starts, "lines": p.lines}
+            for p in phrases)
+    segments = plan_segments(duration, fps, segment_seconds)
+    fingerprints = segment_fingerprints(segments, fps, source, captions, plan, settings, code)
+
+    segment_dir = output_filename + "_segments"
+    manifest_path = os.path.join(segment_dir, MANIFEST_NAME)
+    os.makedirs(segment_dir, exist_ok=True)
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            previous = {s["file"]: s["fingerprint"] for s in json.load(f)["segments"]}
+
+    entries, stale = [], []
+    for i, ((first, last), fingerprint) in enumerate(zip(segments, fingerprints)):
+        name = f"seg_{i:05d}.mp4"
+        path = os.path.join(segment_dir, name)
+        entries.append({"file": name, "first": first, "last": last, "fingerprint": fingerprint})
+        if previous.get(name) != fingerprint or not os.path.exists(path):
+            stale.append((first, last, path))
+
+    print(f"🧩 Incremental render: {len(stale)}/{len(segments)} segments changed "
+          f"({segment_seconds}s each)")
+
+    if stale:
+        # Contiguous groups, one per worker, so each worker builds the graph only once
+        groups = min(max(1, workers), len(stale))
+        size = -(-len(stale) // groups)
+        jobs = [(video_path, json_path, visual_plan_path, settings_path, fps, stale[i:i + size])
+                for i in range(0, len(stale), size)]
+        if len(jobs) == 1:
+            _render_group(jobs[0])
+        else:
+            with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+                pool.map(_render_group, jobs)
+
+    # Record the manifest before joining, so a failed concat doesn't redo the encode
+    with open(manifest_path, "w") as f:
+        json.dump({"fps": fps, "segment_seconds": segment_seconds, "segments": entries}, f, indent=2)
+
+    # Segments left over from a longer previous render
+    keep = {e["file"] for e in entries} | {MANIFEST_NAME}
+    for name in os.listdir(segment_dir):
+        if name not in keep:
+            os.remove(os.path.join(segment_dir, name))
+
+    print("🔗 Joining segments (stream copy)...")
+    with telemetry.span("concat", segments=len(entries), rerendered=len(stale)):
+        concat_chunks([os.path.join(segment_dir, e["file"]) for e in entries], video_path, output_filename)
+    print(f"✅ DONE! Saved as '{output_filename}' in {time.time() - t0:.2f}s")
+    return len(stale)
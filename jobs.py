@@ -0,0 +1,169 @@
+import os
+import queue
+import shutil
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+from media import PROBE_SUFFIX
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+JOBS_DIR = "jobs"
+MAX_QUEUED_JOBS = 20      # Uploads beyond this are rejected instead of piling up
+MAX_ACTIVE_JOBS = 4       # Jobs moving through the pipeline at once
+STAGE_LIMITS = {          # Concurrent jobs allowed inside each stage
+    "transcribe": 1,      # One warm whisper model, one job at a time
+    "analysis": 2,        # Footage curves for magic edit (FFmpeg decode + NumPy)
+    "magic_edit": 2,
+    "render": 2,
+}
+# ==============================================================================
+
+
+class Job:
+    """One upload and everything produced for it, isolated in its own workspace folder"""
+
+    def __init__(self, workspace, job_id=None):
+        self.id = job_id or os.path.basename(workspace)
+        self.workspace = workspace
+        self.settings = {}
+        self.use_magic_edit = True
+        self.profile_render = False
+        self.stage_wait = {}       # Seconds spent waiting for each stage's slot
+        self.meta = None           # media.probe() result, filled in by the pipeline
+        self.status = "new"        # new -> queued -> running -> done | failed
+        self.stage = None
+        self.progress = 0
+        self.message = ""
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def paths(self):
+        ws = self.workspace
+        return {
+            "input": os.path.join(ws, "input.mp4"),
+            "meta": os.path.join(ws, "input.mp4" + PROBE_SUFFIX),
+            "audio": os.path.join(ws, "audio_16k.f32"),
+            "settings": os.path.join(ws, "settings.json"),
+            "transcript": os.path.join(ws, "transcription_data.json"),
+            "analysis": os.path.join(ws, "analysis.npz"),
+            "plan": os.path.join(ws, "visual_plan.json"),
+            "broll_stats": os.path.join(ws, "broll_stats.json"),
+            "assets": os.path.join(ws, "assets"),
+            "output": os.path.join(ws, "final_overlay_edit.mp4"),
+            "log": os.path.join(ws, "process_log.txt"),
+            "telemetry": os.path.join(ws, "telemetry.jsonl"),
+            "profile": os.path.join(ws, "render.prof"),
+        }
+
+    def log(self, message):
+        with open(self.paths["log"], "a", encoding="utf-8") as log_file:
+            log_file.write(f"{message}\n")
+
+    def update(self, progress=None, message=None):
+        if progress is not None:
+            self.progress = progress
+        if message is not None:
+            self.message = message
+
+
+class JobScheduler:
+    """
+    Bounded job queue feeding a fixed pool of pipeline threads.
+
+    Each stage has its own semaphore, so e.g. only one job transcribes at a time
+    while several others render. `run_job(job, scheduler)` does the actual work
+    and wraps each stage in `scheduler.stage(job, name)`.
+    """
+
+    def __init__(self, run_job, jobs_dir=JOBS_DIR, max_active=MAX_ACTIVE_JOBS,
+                 max_queued=MAX_QUEUED_JOBS, stage_limits=STAGE_LIMITS):
+        self.run_job = run_job
+        self.jobs_dir = os.path.abspath(jobs_dir)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._waiting = []   # Job ids in queue order, for queue positions
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._slots = {name: threading.BoundedSemaphore(limit) for name, limit in stage_limits.items()}
+
+        for i in range(max_active):
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True).start()
+
+    def create_job(self, job_id=None):
+        """
+        Creates an empty workspace; the caller drops the upload into job.paths['input'].
+        A given job_id reopens that workspace if it exists (batch resume).
+        """
+        workspace = os.path.join(self.jobs_dir, job_id or uuid.uuid4().hex[:12])
+        os.makedirs(workspace, exist_ok=job_id is not None)
+        job_id = os.path.basename(workspace)
+        job = Job(workspace, job_id)
+        with self._lock:
+            self._jobs[job_id] = job
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def submit(self, job):
+        """Queues a job. Raises queue.Full when the backlog is at capacity."""
+        with self._lock:
+            job.status, job.stage, job.progress, job.error = "queued", None, 0, None
+            job.message = "Waiting in queue..."
+            self._queue.put_nowait(job)
+            self._waiting.append(job.id)
+
+    def wait(self):
+        """Blocks until every submitted job has finished"""
+        self._queue.join()
+
+    def queue_position(self, job):
+        """1-based position among jobs not yet started (0 once running)"""
+        with self._lock:
+            return self._waiting.index(job.id) + 1 if job.id in self._waiting else 0
+
+    @contextmanager
+    def stage(self, job, name):
+        """Holds one of the stage's slots for the duration of the block"""
+        job.stage = name
+        job.message = f"Waiting for a free {name} slot..."
+        t0 = time.time()
+        with self._slots[name]:
+            job.stage_wait[name] = time.time() - t0
+            yield
+
+    def remove(self, job):
+        """Deletes a finished job and its workspace"""
+        if job.status in ("queued", "running"):
+            return False
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        shutil.rmtree(job.workspace, ignore_errors=True)
+        return True
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._waiting.remove(job.id)
+            job.status = "running"
+            try:
+                self.run_job(job, self)
+                job.status = "done"
+            except Exception as e:
+                job.status, job.error = "failed", str(e)
+                job.log(f"❌ ERROR: {e}")
+                traceback.print_exc()
+            finally:
+                job.stage = None
+                job.finished = time.time()
+                self._queue.task_done()
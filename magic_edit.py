@@ -1,8 +1,13 @@
 import json
-import random
 import os
-import requests
-import spacy
+import argparse
+import bisect
+import sys
+import analysis as footage
+import columnar
+from broll_fetch import BrollFetcher
+from broll_cache import BrollCache, normalize_keyword
+import telemetry
 
 # ==============================================================================
 # 🔑 CONFIGURATION
@@ -11,112 +16,306 @@ PEXELS_API_KEY = "1KuMKILq9sVplvw3xq2J7Wo3GHn7paIIkpDvnLLGfAFSddfxNYUD9LP3"
 
 MIN_ZOOM_INTERVAL = 4   
 BROLL_DURATION = 2.5    
+MAX_CONCURRENT_FETCHES = 8   # Parallel Pexels lookups (keep low to respect the API rate limit)
+ZOOM_STYLE = "static"     # "static" = 0.7 punch-in, "ken_burns" = slow push-in (see zoom_engine.py)
+KEN_BURNS_ZOOM = (1.0, 1.3)   # zoom_from -> zoom_to for "ken_burns"
+ZOOM_DURATION = 3.0
+
+# Where zooms land, from the footage curves (analysis.py) instead of a coin flip
+ZOOM_EMPHASIS_DB = 3.0      # Zoom where speech is this much louder than the clip's median
+ZOOM_MAX_MOTION = 0.08      # ...and the shot is steady (mean frame change, 0..1)
+MAX_ZOOM_GAP = 12           # After this many seconds without an event, any steady, voiced moment zooms
+BROLL_SNAP_SECONDS = 0.5    # B-roll starts on a shot change this close to its keyword
+
+# How keywords are picked from the transcript:
+#   "pos"         -> single nouns / proper nouns (original behaviour)
+#   "noun_chunks" -> short noun phrases ("red sports car")
+#   "entities"    -> named entities ("London", "Elon Musk")
+KEYWORD_MODE = "pos"
+NLP_MODEL = "en_core_web_sm"
+NLP_BATCH_SIZE = 64
+MAX_SENTENCE_WORDS = 60   # Hard cap so run-on speech without punctuation stays a bounded Doc
 # ==============================================================================
 
-# 1. LOAD THE NLP BRAIN
-print("🧠 Loading NLP Model (en_core_web_sm)...")
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("❌ Model not found! Run: python -m spacy download en_core_web_sm")
-    exit()
+# 1. THE NLP BRAIN (loaded on first use, then kept for every later plan in this process)
+_nlp = None
+
+def get_nlp():
+    global _nlp
+    if _nlp is None:
+        print(f"🧠 Loading NLP Model ({NLP_MODEL})...")
+        with telemetry.span("nlp_load", model=NLP_MODEL):
+            import spacy
+            try:
+                _nlp = spacy.load(NLP_MODEL)
+            except OSError as e:
+                raise OSError(f"Model not found! Run: python -m spacy download {NLP_MODEL}") from e
+    return _nlp
 
 def download_image(query, filename):
     """Downloads a relevant image from Pexels"""
-    if not PEXELS_API_KEY:
-        return False 
-
-    headers = {'Authorization': PEXELS_API_KEY}
-    url = f"https://api.pexels.com/v1/search?query={query}&per_page=1"
-    
+    fetcher = BrollFetcher(PEXELS_API_KEY, concurrency=1)
     try:
-        r = requests.get(url, headers=headers)
-        if r.status_code != 200:
-            return False
-            
-        data = r.json()
-        if data.get('photos'):
-            img_url = data['photos'][0]['src']['large']
-            img_data = requests.get(img_url).content
-            with open(filename, 'wb') as f:
-                f.write(img_data)
-            return True
-    except Exception as e:
-        print(f"⚠️ Error downloading {query}: {e}")
-    return False
-
-def generate_visual_plan(json_path):
-    print("🎬 AI Director: analyzing speech patterns...")
-    
-    with open(json_path, "r") as f:
-        segments = json.load(f)
+        return bool(fetcher.fetch(query, filename))
+    finally:
+        fetcher.close()
+
+# Words that are technically nouns but we don't want images for
+BANNED_WORDS = ["thing", "way", "lot", "bit", "kind", "sort", "something", "anything", "nothing"]
+
+# Entity labels worth showing a picture of
+VISUAL_ENTITY_LABELS = {"PERSON", "NORP", "FAC", "ORG", "GPE", "LOC", "PRODUCT", "EVENT", "WORK_OF_ART"}
+
+# Pipeline components each mode actually needs; everything else is disabled during nlp.pipe
+MODE_COMPONENTS = {
+    "pos": {"tok2vec", "tagger", "attribute_ruler", "lemmatizer"},
+    "noun_chunks": {"tok2vec", "tagger", "attribute_ruler", "lemmatizer", "parser"},
+    "entities": {"tok2vec", "tagger", "attribute_ruler", "lemmatizer", "ner"},
+}
+
+def build_sentences(segments):
+    """
+    Rebuilds the transcript into sentences.
+    Returns a list of (text, word_starts, word_indices) where word_starts are the
+    character offsets of each word inside `text` and word_indices point back into `segments`.
+    """
+    sentences = []
+    text, starts, indices = "", [], []
 
+    for i, word, _, _ in columnar.timed_words(segments):
+        word = word.strip()
+        if not word:
+            continue
+        if text:
+            text += " "
+        starts.append(len(text))
+        indices.append(i)
+        text += word
+
+        if word.endswith((".", "!", "?")) or len(indices) >= MAX_SENTENCE_WORDS:
+            sentences.append((text, starts, indices))
+            text, starts, indices = "", [], []
+
+    if text:
+        sentences.append((text, starts, indices))
+    return sentences
+
+def _word_at(char_offset, word_starts, word_indices):
+    return word_indices[bisect.bisect_right(word_starts, char_offset) - 1]
+
+def _is_visual_token(token):
+    return (token.pos_ in ["NOUN", "PROPN"]) and (not token.is_stop) and (token.text.lower() not in BANNED_WORDS)
+
+def select_keywords(segments, mode=KEYWORD_MODE):
+    """
+    Runs the whole transcript through spaCy in one batched pass and returns
+    {segment_index: {"keyword", "lemma", "pos"}} for every word that should get B-roll.
+    """
+    nlp = get_nlp()
+    sentences = build_sentences(segments)
+    disabled = [name for name in nlp.pipe_names if name not in MODE_COMPONENTS[mode]]
+    docs = nlp.pipe((text for text, _, _ in sentences), batch_size=NLP_BATCH_SIZE, disable=disabled)
+
+    keywords = {}
+    for doc, (_, word_starts, word_indices) in zip(docs, sentences):
+        if mode == "pos":
+            spans = [doc[t.i:t.i + 1] for t in doc if _is_visual_token(t)]
+        elif mode == "noun_chunks":
+            spans = [chunk for chunk in doc.noun_chunks if _is_visual_token(chunk.root)]
+        else:
+            spans = [ent for ent in doc.ents if ent.label_ in VISUAL_ENTITY_LABELS]
+
+        for span in spans:
+            # Drop leading determiners/pronouns ("the car" -> "car")
+            tokens = [t for t in span if not (t.is_stop or t.is_punct)] or [span.root]
+            keyword = " ".join(t.text for t in tokens).strip(".,!?\"'")
+            if not keyword:
+                continue
+            index = _word_at(tokens[0].idx, word_starts, word_indices)
+            keywords.setdefault(index, {
+                "keyword": keyword,
+                "lemma": " ".join(t.lemma_.lower() for t in tokens),
+                "pos": span.root.pos_ if mode != "entities" else span.label_,
+            })
+    return keywords
+
+def wants_zoom(analysis, start, waited):
+    """Zoom decision for a word at `start`, `waited` seconds after the previous event"""
+    if analysis is None:
+        return True   # Transcript only: zoom as soon as MIN_ZOOM_INTERVAL allows
+    end = start + ZOOM_DURATION
+    # A zoom across a shot change, into dead air or over a moving camera looks broken
+    if analysis.has_cut(start, end) or analysis.silent_fraction(start, end) > 0.5:
+        return False
+    if analysis.mean_motion(start, end) > ZOOM_MAX_MOTION:
+        return False
+    emphasis = analysis.mean_loudness(start, start + 1.0) - analysis.median_loudness
+    return emphasis >= ZOOM_EMPHASIS_DB or waited >= MAX_ZOOM_GAP
+
+def plan_events(segments, keywords, resolved, analysis=None):
+    """
+    Walks the transcript and lays out image/zoom events.
+
+    `resolved` maps normalized keyword -> image path (False if there is no
+    image). Keywords not resolved yet are assumed to have an image and
+    returned in `missing`, so the caller can resolve them all at once and
+    plan again. `analysis` (analysis.Analysis, optional) places zooms on
+    steady, emphasized speech and snaps B-roll to shot changes; the plan is
+    a pure function of its inputs, so it can be cached.
+    Returns (visual_events, missing) with missing = {lemma: query}.
+    """
     visual_events = []
+    missing = {}
     last_event_time = 0
-    
-    if not os.path.exists("assets"):
-        os.makedirs("assets")
-
-    # Words that are technically nouns but we don't want images for
-    banned_words = ["thing", "way", "lot", "bit", "kind", "sort", "something", "anything", "nothing"]
-
-    for segment in segments:
-        word_text = segment['word'].strip(".,!?\"'")
-        start = segment['start']
-        
-        # 1. ANALYZE WORD WITH NLP
-        doc = nlp(word_text)
-        token = doc[0] # Get the token object
-
-        # RULES FOR SELECTING AN IMAGE:
-        # A. Must be a Noun (NOUN) or Proper Noun (PROPN)
+
+    for i, _, start, _ in columnar.timed_words(segments):
+
+        # RULES FOR SELECTING AN IMAGE (see select_keywords):
+        # A. Must be a Noun (NOUN) or Proper Noun (PROPN) / noun chunk / entity
         # B. Must NOT be a stop word (e.g., "it", "the")
         # C. Must NOT be in our banned list
         # D. Time since last image > 3 seconds
-        
-        is_visual = (token.pos_ in ["NOUN", "PROPN"]) and (not token.is_stop) and (word_text.lower() not in banned_words)
+        candidate = keywords.get(i)
+        is_visual = candidate is not None
 
         if is_visual and (start - last_event_time > 3):
-            print(f"   💡 AI detected subject: '{word_text}' ({token.pos_}) -> Fetching B-Roll...")
-            
-            image_filename = f"assets/{word_text}_{int(start)}.jpg"
-            
-            # Use the word itself as the search query
-            success = download_image(word_text, image_filename)
-            
-            if success:
+            word_text = candidate["keyword"]
+            lemma = normalize_keyword(candidate["lemma"])
+
+            # Use the keyword as the search query; the same lemma is only ever resolved once
+            image_path = resolved.get(lemma)
+            if image_path is None:
+                missing.setdefault(lemma, word_text)
+                image_path = True
+
+            if image_path:
+                cut = analysis.nearest_cut(start, BROLL_SNAP_SECONDS) if analysis is not None else None
+                if cut is not None and cut - last_event_time > 3:
+                    start = round(cut, 3)   # Cutting away on a shot change hides the B-roll cut
                 event = {
                     "type": "image",
                     "start": start,
                     "duration": BROLL_DURATION,
-                    "src": image_filename,
+                    "src": image_path,
                     "is_placeholder": False,
                     "keyword": word_text
                 }
                 visual_events.append(event)
                 last_event_time = start + BROLL_DURATION
-            else:
-                print(f"      (No good image found for '{word_text}', skipping)")
 
         # 2. ZOOM LOGIC (Fallback)
         elif (start - last_event_time > MIN_ZOOM_INTERVAL):
-            if random.random() > 0.6: # 40% chance
-                print(f"   🔍 Adding Smart Zoom at {start}s")
+            if wants_zoom(analysis, start, start - last_event_time):
                 event = {
                     "type": "zoom",
                     "start": start,
-                    "duration": 3.0 
+                    "duration": ZOOM_DURATION
                 }
+                if ZOOM_STYLE == "ken_burns":
+                    event["zoom_from"], event["zoom_to"] = KEN_BURNS_ZOOM
                 visual_events.append(event)
-                last_event_time = start + 3.0
+                last_event_time = start + ZOOM_DURATION
+
+    return visual_events, missing
 
-    with open("visual_plan.json", "w") as f:
+def generate_visual_plan(json_path, output_path="visual_plan.json", assets_dir="assets",
+                         stats_path="broll_stats.json", analysis_path=None):
+    print("🎬 AI Director: analyzing speech patterns...")
+    
+    segments = columnar.open_table(json_path)   # Walked column-wise (timed_words), never as per-word dicts
+    analysis = None
+    if analysis_path and os.path.exists(analysis_path):
+        analysis = footage.Analysis.load(analysis_path)
+        print(f"   🎞️ Footage analysis: {len(analysis.cuts)} shot changes, "
+              f"median loudness {analysis.median_loudness:.1f} dBFS")
+    elif analysis_path:
+        print(f"   ⚠️ '{analysis_path}' not found, placing zooms from the transcript only")
+
+    if not os.path.exists(assets_dir):
+        os.makedirs(assets_dir)
+
+    # 1. ANALYZE THE WHOLE TRANSCRIPT WITH NLP (one batched pass, with sentence context)
+    with telemetry.span("keyword_select", words=len(segments), mode=KEYWORD_MODE) as info:
+        keywords = select_keywords(segments)
+        info["keywords"] = len(keywords)
+
+    # 2. RESOLVE B-ROLL (shared cache first, then concurrent Pexels fetches)
+    # Plan optimistically, resolve every keyword the plan needs, then re-plan.
+    # A keyword without an image can free up the slot for a later one, hence the loop.
+    resolved = {}
+    cache = BrollCache()
+    fetcher = BrollFetcher(PEXELS_API_KEY, concurrency=MAX_CONCURRENT_FETCHES)
+    try:
+        with telemetry.span("broll_resolve") as info:
+            while True:
+                visual_events, missing = plan_events(segments, keywords, resolved, analysis)
+                if not missing:
+                    break
+
+                jobs, job_lemmas = [], []
+                for lemma, query in missing.items():
+                    cached = cache.lookup(lemma)
+                    if cached is None:
+                        jobs.append((query, os.path.join(assets_dir, f"download_{len(jobs)}.jpg")))
+                        job_lemmas.append(lemma)
+                    else:
+                        resolved[lemma] = cached
+
+                if jobs:
+                    print(f"   💡 AI detected {len(jobs)} new subjects -> Fetching B-Roll ({fetcher.concurrency} at a time)...")
+                results = fetcher.fetch_many(jobs)
+                for (query, filename), lemma in zip(jobs, job_lemmas):
+                    image_url = results[filename]
+                    if image_url:
+                        resolved[lemma] = cache.add(lemma, query, filename, image_url)
+                    else:
+                        print(f"      (No good image found for '{query}', skipping)")
+                        if query in fetcher.empty_queries:
+                            cache.add(lemma, query)   # Remember "no results" so the next job skips the search
+                        resolved[lemma] = False
+            cache.evict(keep=[e["src"] for e in visual_events if e["type"] == "image"])
+            info.update(cache_hits=cache.hits, cache_misses=cache.misses, **fetcher.stats)
+    finally:
+        fetcher.close()
+        cache.close()
+
+    lookups = cache.hits + cache.misses
+    print(f"   📦 B-Roll cache: {cache.hits}/{lookups} hits ({cache.hit_rate:.0%}) | "
+          f"HTTP: {fetcher.stats['requests']} requests, {fetcher.stats['retries']} retries, "
+          f"{fetcher.stats['rate_limited']} rate-limited")
+    with open(stats_path, "w") as f:
+        json.dump({"cache_hits": cache.hits, "cache_lookups": lookups, "cache_hit_rate": cache.hit_rate,
+                   **fetcher.stats}, f, indent=4)
+
+    for event in visual_events:
+        if event["type"] == "image":
+            print(f"   🖼️ B-Roll '{event['keyword']}' at {event['start']}s")
+        else:
+            print(f"   🔍 Adding Smart Zoom at {event['start']}s")
+
+    with open(output_path, "w") as f:
         json.dump(visual_events, f, indent=4)
     
     print(f"✅ Visual Plan Created with NLP! {len(visual_events)} events.")
 
-if __name__ == "__main__":
-    if os.path.exists("transcription_data.json"):
-        generate_visual_plan("transcription_data.json")
+def main(argv=None):
+    """CLI entry point; also what stage_pool workers call in-process"""
+    parser = argparse.ArgumentParser(description="Plan B-roll and zooms for a transcript.")
+    parser.add_argument("--transcript", default="transcription_data.json")
+    parser.add_argument("--output", default="visual_plan.json")
+    parser.add_argument("--assets", default="assets")
+    parser.add_argument("--stats", default="broll_stats.json")
+    parser.add_argument("--analysis", default=None, help="Footage curves from analysis.py (optional)")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.transcript):
+        generate_visual_plan(args.transcript, args.output, args.assets, args.stats, args.analysis)
     else:
-        print("❌ 'transcription_data.json' not found!")
\ No newline at end of file
+        print(f"❌ '{args.transcript}' not found!")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except OSError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
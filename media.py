@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import subprocess
+
+import numpy as np
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+AUDIO_SAMPLE_RATE = 16000        # What whisperx expects (mono float32)
+UPLOAD_CHUNK_SIZE = 8 * 1024**2  # Bytes copied per read when saving an upload
+PROBE_SUFFIX = ".probe.json"     # Cached ffprobe result, stored next to the video
+# ==============================================================================
+
+
+def find_ffmpeg():
+    """FFmpeg binary: $FFMPEG_BINARY, the one bundled with imageio-ffmpeg, or PATH"""
+    binary = os.environ.get("FFMPEG_BINARY")
+    if binary:
+        return binary
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return shutil.which("ffmpeg")
+
+
+def find_ffprobe():
+    """ffprobe from $FFPROBE_BINARY, next to the ffmpeg binary, or PATH (None if missing)"""
+    binary = os.environ.get("FFPROBE_BINARY")
+    if binary:
+        return binary
+    ffmpeg = find_ffmpeg()
+    if ffmpeg:
+        sibling = os.path.join(os.path.dirname(ffmpeg), os.path.basename(ffmpeg).replace("ffmpeg", "ffprobe"))
+        if os.path.isfile(sibling):
+            return sibling
+    return shutil.which("ffprobe")
+
+
+def save_upload(file_obj, dest, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Saves an upload atomically (.part then rename). In-memory uploads (Streamlit's
+    UploadedFile is a BytesIO) are written zero-copy from getbuffer(); other file
+    objects are streamed in chunks, never read into memory whole.
+    """
+    if hasattr(file_obj, "seek"):
+        file_obj.seek(0)
+    partial = dest + ".part"
+    with open(partial, "wb") as f:
+        if hasattr(file_obj, "getbuffer"):
+            with file_obj.getbuffer() as view:
+                f.write(view)
+        else:
+            shutil.copyfileobj(file_obj, f, chunk_size)
+    os.replace(partial, dest)
+    return dest
+
+
+# --- METADATA ---
+
+def _parse_rate(rate):
+    num, _, den = (rate or "0/1").partition("/")
+    den = float(den or 1)
+    return float(num) / den if den else 0.0
+
+
+def _ffprobe(video_path, ffprobe):
+    cmd = [ffprobe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", video_path]
+    info = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+    video = next(s for s in info["streams"] if s.get("codec_type") == "video")
+    fps = _parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate"))
+    duration = float(info["format"].get("duration") or video.get("duration") or 0)
+    return {
+        "width": int(video["width"]),
+        "height": int(video["height"]),
+        "fps": fps,
+        "duration": duration,
+        "has_audio": any(s.get("codec_type") == "audio" for s in info["streams"]),
+    }
+
+
+def _ffmpeg_infos(video_path):
+    # No ffprobe (imageio-ffmpeg only ships ffmpeg): let MoviePy parse `ffmpeg -i`
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+    infos = ffmpeg_parse_infos(video_path)
+    w, h = infos["video_size"]
+    return {
+        "width": w,
+        "height": h,
+        "fps": infos["video_fps"],
+        "duration": infos["duration"],
+        "has_audio": bool(infos.get("audio_found")),
+    }
+
+
+def probe(video_path, cache_path=None):
+    """
+    Returns {"width", "height", "fps", "duration", "frames", "has_audio"} from one
+    ffprobe call. The result is cached next to the video (keyed by size + mtime),
+    so every stage of a job reuses it instead of opening the file again.
+    """
+    cache_path = cache_path or video_path + PROBE_SUFFIX
+    st = os.stat(video_path)
+    stamp = {"size": st.st_size, "mtime": st.st_mtime}
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r") as f:
+                cached = json.load(f)
+            if cached.get("stamp") == stamp:
+                return cached["meta"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    ffprobe = find_ffprobe()
+    meta = _ffprobe(video_path, ffprobe) if ffprobe else _ffmpeg_infos(video_path)
+    meta["frames"] = int(meta["duration"] * meta["fps"]) if meta["fps"] else 0
+
+    try:
+        with open(cache_path, "w") as f:
+            json.dump({"stamp": stamp, "meta": meta}, f)
+    except OSError:
+        pass  # Read-only location: just don't cache
+    return meta
+
+
+# --- AUDIO ---
+
+def extract_audio(video_path, out_path, sample_rate=AUDIO_SAMPLE_RATE):
+    """Decodes the audio track once to raw mono float32 PCM (the same samples whisperx.load_audio returns)"""
+    if os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(video_path):
+        return out_path
+
+    partial = out_path + ".part"
+    cmd = [
+        find_ffmpeg(), "-y", "-nostdin", "-loglevel", "error", "-i", video_path,
+        "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", partial,
+    ]
+    subprocess.run(cmd, check=True)
+    os.replace(partial, out_path)
+    return out_path
+
+
+def load_audio(audio_path):
+    """Memory-maps an extracted track as a read-only float32 array (pages load on demand)"""
+    if os.path.getsize(audio_path) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(audio_path, dtype=np.float32, mode="r")
+
+
+def audio_samples(audio_path):
+    """Number of samples in an extracted track"""
+    return os.path.getsize(audio_path) // np.dtype(np.float32).itemsize
+
+
+def read_audio(audio_path, start=0, count=-1):
+    """Reads samples [start, start + count) into a fresh array (memory bounded by count, not file size)"""
+    return np.fromfile(audio_path, dtype=np.float32, count=count, offset=start * np.dtype(np.float32).itemsize)
@@ -0,0 +1,173 @@
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import time
+
+import numpy as np
+
+import columnar
+import telemetry
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+ENCODE_CODEC = "libx264"   # Every chunk MUST share codec settings for stream-copy concat
+ENCODE_PRESET = "ultrafast"
+AUDIO_CODEC = "aac"
+# ==============================================================================
+
+
+def source_timeline(video_path):
+    """
+    (duration, fps) exactly as the serial render sees them: MoviePy's own reading of the
+    source (create_video writes main_clip.duration at main_clip.fps), not ffprobe's, which
+    can differ for VFR sources and rounded rational rates.
+    """
+    from render import moviepy_editor
+    clip = moviepy_editor().VideoFileClip(video_path, audio=False)
+    try:
+        return clip.duration, clip.fps
+    finally:
+        clip.close()
+
+
+def frame_time(i, fps):
+    """Timestamp of frame i as the serial writer computes it (element i of np.arange(0, duration, 1.0 / fps))"""
+    return i * (1.0 / fps)
+
+
+def count_frames(duration, fps):
+    """Number of frames the serial path writes: len(np.arange(0, duration, 1.0 / fps)), without building it"""
+    return max(0, int(math.ceil(duration / (1.0 / fps))))
+
+
+def event_intervals(visual_events):
+    """Merged, sorted [start, end) intervals covered by zoom/image events"""
+    spans = sorted((e["start"], e["start"] + e["duration"]) for e in visual_events)
+    merged = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def plan_chunks(duration, fps, visual_events, workers):
+    """
+    Splits [0, total_frames) into up to `workers` frame ranges.
+
+    Boundaries sit on exact frame indices (so every chunk starts on its own
+    keyframe and no frame is rendered twice) and are nudged out of zoom and
+    B-roll events to the nearest event edge, so no visual cut lands on a seam.
+    """
+    total = count_frames(duration, fps)
+    intervals = event_intervals(visual_events)
+
+    boundaries = [0]
+    for k in range(1, workers):
+        b = int(round(total * k / workers))
+        for start, end in intervals:
+            if start * fps < b < end * fps:
+                before, after = int(math.floor(start * fps)), int(math.ceil(end * fps))
+                b = before if (b - before) <= (after - b) else after
+                break
+        if boundaries[-1] < b < total:
+            boundaries.append(b)
+    boundaries.append(total)
+
+    return [(boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)]
+
+
+def encode_frames(final_video, first, last, fps, out_path):
+    """Composites and encodes frames [first, last) of an assembled clip to a video-only file"""
+    from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+    writer = FFMPEG_VideoWriter(out_path, final_video.size, fps, codec=ENCODE_CODEC,
+                                preset=ENCODE_PRESET, threads=1)
+    encode = telemetry.histogram("frame.encode")
+    try:
+        for i in range(first, last):
+            frame = final_video.get_frame(frame_time(i, fps))
+            with encode.time():
+                writer.write_frame(np.asarray(frame, dtype=np.uint8))
+    finally:
+        writer.close()
+    return out_path
+
+
+def render_chunk(job):
+    """Worker entry point: composites and encodes frames [first, last) to a video-only file"""
+    video_path, json_path, plan_path, settings_path, first, last, fps, out_path = job
+
+    # Imported here so each spawned worker builds its own MoviePy graph
+    from render import build_final_video
+    final_video, main_clip = build_final_video(video_path, json_path, plan_path, settings_path)
+    try:
+        with telemetry.span("render_chunk", frames=last - first):
+            return encode_frames(final_video, first, last, fps, out_path)
+    finally:
+        main_clip.close()
+        telemetry.flush()   # Pool workers never reach atexit
+
+
+def concat_chunks(chunk_paths, audio_source, output_filename):
+    """
+    Joins chunks with the concat demuxer (no re-encode) and muxes the original audio back in.
+    Chunks cover the same frame timestamps as the serial path and composite the same input
+    frames, but each is a separate x264 encode (GOP and rate control restart per chunk) and
+    the audio is re-encoded and trimmed with -shortest, so the output is NOT bit- or
+    frame-identical to a serial render; expect small encoder differences around chunk joins.
+    """
+    from moviepy.config import get_setting
+    list_path = output_filename + ".concat.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in chunk_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    cmd = [
+        get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-i", audio_source,
+        "-map", "0:v:0", "-map", "1:a:0?",
+        "-c:v", "copy", "-c:a", AUDIO_CODEC, "-shortest",
+        output_filename,
+    ]
+    try:
+        subprocess.run(cmd, check=True)
+    finally:
+        os.remove(list_path)
+
+
+def render_parallel(video_path, json_path, visual_plan_path, output_filename, workers,
+                    settings_path="settings.json"):
+    t0 = time.time()
+    duration, fps = source_timeline(video_path)   # Same frame grid as the serial create_video
+
+    visual_events = columnar.load_records(visual_plan_path)
+
+    chunks = plan_chunks(duration, fps, visual_events, workers)
+    print(f"🧩 Parallel render: {len(chunks)} chunks across {workers} workers")
+
+    chunk_dir = output_filename + "_chunks"
+    os.makedirs(chunk_dir, exist_ok=True)
+    jobs = [
+        (video_path, json_path, visual_plan_path, settings_path, first, last, fps,
+         os.path.join(chunk_dir, f"chunk_{i:04d}.mp4"))
+        for i, (first, last) in enumerate(chunks)
+    ]
+
+    try:
+        # 'spawn' gives every worker a clean interpreter (no forked ffmpeg readers)
+        with multiprocessing.get_context("spawn").Pool(min(workers, len(jobs))) as pool:
+            chunk_paths = pool.map(render_chunk, jobs)
+
+        print("🔗 Joining chunks (stream copy)...")
+        with telemetry.span("concat", chunks=len(chunk_paths)):
+            concat_chunks(chunk_paths, video_path, output_filename)
+    finally:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    print(f"✅ DONE! Saved as '{output_filename}' in {time.time() - t0:.2f}s")
@@ -0,0 +1,254 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import columnar
+import media
+import stage_pool
+import telemetry
+import transcribe_worker
+from artifact_cache import ArtifactCache, CACHE_DIR, hash_file, code_version, read_constants
+from broll_cache import BrollCache, BROLL_CACHE_DIR
+from render import RENDER_SOURCES
+
+# Scripts, fonts and the shared caches live next to this file; job files live in each workspace
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _script(name):
+    return os.path.join(APP_DIR, name)
+
+
+def _run_stage(job, stage, script, *args):
+    # The script appends its own spans/histograms to the job's telemetry file
+    if stage_pool.ENABLED:
+        # Same CLI, run in a warm interpreter that already has spaCy/MoviePy imported
+        report = stage_pool.run(stage, script[:-len(".py")], args, job.paths["telemetry"])
+        job.log(f" - Worker: pid {report['pid']}, job #{report['jobs']} in this interpreter "
+                f"(preload {report['preload_s']:.2f}s)")
+        return
+    env = dict(os.environ, **{telemetry.ENV_PATH: job.paths["telemetry"], telemetry.ENV_STAGE: stage})
+    subprocess.run([sys.executable, _script(script), *args], check=True, cwd=APP_DIR, env=env)
+
+
+def _marker(job, stage):
+    return os.path.join(job.workspace, f".{stage}.done")
+
+
+def _restore(job, cache, stage, key, outputs, base_dir="."):
+    """
+    "resumed" if an earlier run of this workspace already finished the stage with
+    the same inputs (its marker holds the key and the outputs are still there),
+    "hit" if the artifact cache has it, otherwise False.
+    """
+    marker = _marker(job, stage)
+    if os.path.exists(marker) and all(os.path.exists(p) for p in outputs.values()):
+        with open(marker, "r") as f:
+            if f.read() == key:
+                return "resumed"
+    return "hit" if cache.restore(key, outputs, base_dir=base_dir) else False
+
+
+def _mark_done(job, stage, key):
+    """Stage marker: lets a rerun after a crash skip straight past finished stages"""
+    with open(_marker(job, stage), "w") as f:
+        f.write(key)
+
+
+def _record_stage(job, stage, t0, cache_hit):
+    """One wall-clock record per pipeline stage, next to the stage's own internal spans"""
+    telemetry.emit("stage", stage, job.paths["telemetry"], stage,
+                   ms=round((time.time() - t0) * 1000, 2), cache_hit=bool(cache_hit),
+                   slot_wait_ms=round(job.stage_wait.get(stage, 0) * 1000, 2))
+
+
+def analyze_metadata(job):
+    """STEP 0: one ffprobe call, cached in the workspace for every later stage"""
+    try:
+        job.meta = media.probe(job.paths["input"], job.paths["meta"])
+        job.log(f"VIDEO METADATA:")
+        job.log(f" - Duration: {job.meta['duration']:.2f} seconds")
+        job.log(f" - FPS: {job.meta['fps']}")
+        job.log(f" - Total Frames: {job.meta['frames']}")
+        job.log(f" - Resolution: {job.meta['width']}x{job.meta['height']}")
+        job.log("-" * 30)
+    except Exception as e:
+        job.log(f"⚠️ Could not analyze video metadata: {e}")
+
+
+def run_analysis(job, scheduler, cache, video_hash):
+    """Footage curves for zoom/B-roll placement, cached per input video. Returns their hash (None if unavailable)."""
+    paths = job.paths
+    t0 = time.time()
+    analysis_key = cache.key(
+        "analysis", video=video_hash, code=code_version(_script("analysis.py")),
+        **read_constants(_script("analysis.py"), ["ANALYSIS_WIDTH", "ANALYSIS_FPS", "HISTOGRAM_BINS"]))
+    job.log(f"STEP 2a: FOOTAGE ANALYSIS")
+    analysis_hit = _restore(job, cache, "analysis", analysis_key, {"analysis.npz": paths["analysis"]})
+    try:
+        if analysis_hit:
+            job.log(f" - Cache: {analysis_hit.upper()} ({analysis_key})")
+        else:
+            with scheduler.stage(job, "analysis"):
+                job.update(36, "🎞️ Analyzing shots, motion and loudness...")
+                audio = ["--audio", paths["audio"]] if os.path.exists(paths["audio"]) else []
+                _run_stage(job, "analysis", "analysis.py", "--input", paths["input"], "--output", paths["analysis"],
+                           *audio)
+            cache.store(analysis_key, {"analysis.npz": paths["analysis"]})
+            job.log(f" - Cache: MISS ({analysis_key})")
+        _mark_done(job, "analysis", analysis_key)
+    except (subprocess.CalledProcessError, stage_pool.StageError, OSError):
+        job.log("⚠️ WARNING: Footage analysis failed, zooms will follow the transcript only.")
+        if os.path.exists(paths["analysis"]):
+            os.remove(paths["analysis"])
+        return None
+    _record_stage(job, "analysis", t0, analysis_hit)
+    job.log(f" - Execution Time: {time.time() - t0:.2f} seconds")
+    return hash_file(paths["analysis"])
+
+
+def run_job(job, scheduler):
+    """Runs transcribe -> magic edit -> render for one workspace, reusing cached stage outputs"""
+    paths = job.paths
+    for stale in ("log", "telemetry", "profile"):
+        if os.path.exists(paths[stale]):
+            os.remove(paths[stale])
+    job.stage_wait = {}
+
+    start_total_time = time.time()
+    job.log("=== MIRAGE AI PROCESSING LOG ===")
+    job.log(f"JOB: {job.id}")
+    analyze_metadata(job)
+
+    # Every stage is keyed by a hash of its inputs; re-styling only re-renders
+    cache = ArtifactCache(os.path.join(APP_DIR, CACHE_DIR))
+    video_hash = hash_file(paths["input"])
+
+    # 1. SAVE SETTINGS
+    with open(paths["settings"], "w") as f:
+        json.dump(job.settings, f)
+
+    # 2. TRANSCRIBE (Step 1)
+    t0 = time.time()
+    transcribe_key = cache.key(
+        "transcribe", video=video_hash, code=code_version(_script("transcribe.py")),
+        **read_constants(_script("transcribe.py"), ["MODEL_NAME", "COMPUTE_TYPE", "BATCH_SIZE", "DEVICE"]))
+    transcript_out = {"transcription_data.json": paths["transcript"]}
+    job.log(f"STEP 1: TRANSCRIPTION")
+    transcribe_hit = _restore(job, cache, "transcribe", transcribe_key, transcript_out)
+    if transcribe_hit:
+        job.log(f" - Cache: {transcribe_hit.upper()} ({transcribe_key})")
+    else:
+        # Decode the audio once; the worker memory-maps it instead of decoding the video again
+        job.update(3, "🔊 Extracting audio...")
+        audio_path = None
+        if job.meta is None or job.meta["has_audio"]:
+            audio_path = media.extract_audio(paths["input"], paths["audio"])
+        with scheduler.stage(job, "transcribe"):
+            job.update(5, "🎧 AI is listening (Transcribing)...")
+            report = transcribe_worker.submit(paths["input"], paths["transcript"], audio_path,
+                                              telemetry_path=paths["telemetry"])
+        cache.store(transcribe_key, transcript_out)
+        job.log(f" - Cache: MISS ({transcribe_key})")
+        job.log(f" - Worker: {'warm' if report['warm'] else 'cold'} (model load {report['model_load_time']:.2f}s)")
+    _mark_done(job, "transcribe", transcribe_key)
+    _record_stage(job, "transcribe", t0, transcribe_hit)
+    job.log(f" - Execution Time: {time.time() - t0:.2f} seconds")
+
+    # Count detected words (also builds the columnar sidecar every later stage reads)
+    job.log(f" - Words Detected: {len(columnar.open_table(paths['transcript']))}")
+    job.update(33)
+    transcript_hash = hash_file(paths["transcript"])
+
+    # 3. MAGIC EDIT (Step 2 - Optional)
+    if job.use_magic_edit:
+        analysis_hash = run_analysis(job, scheduler, cache, video_hash)
+        t0 = time.time()
+        magic_key = cache.key(
+            "magic_edit", transcript=transcript_hash, analysis=analysis_hash,
+            code=code_version(_script("magic_edit.py")),
+            **read_constants(_script("magic_edit.py"), ["MIN_ZOOM_INTERVAL", "BROLL_DURATION", "ZOOM_DURATION",
+                                                        "ZOOM_EMPHASIS_DB", "ZOOM_MAX_MOTION", "MAX_ZOOM_GAP",
+                                                        "BROLL_SNAP_SECONDS"]))
+        job.log(f"STEP 2: MAGIC EDIT")
+        try:
+            magic_hit = _restore(job, cache, "magic_edit", magic_key, {"visual_plan.json": paths["plan"]},
+                                 base_dir=APP_DIR)
+            if magic_hit:
+                job.log(f" - Cache: {magic_hit.upper()} ({magic_key})")
+                # The restored images are back in broll_cache/images: index them so the
+                # B-roll cache accounts for them and won't evict them before this job renders
+                plan = columnar.open_table(paths["plan"])
+                srcs = plan.strings("src") if "src" in plan.kinds else []
+                broll = BrollCache(os.path.join(APP_DIR, BROLL_CACHE_DIR))
+                try:
+                    broll.register(os.path.join(APP_DIR, src) for src in srcs if src)
+                finally:
+                    broll.close()
+            else:
+                with scheduler.stage(job, "magic_edit"):
+                    job.update(40, "🧠 AI Director is finding B-Roll...")
+                    _run_stage(job, "magic_edit", "magic_edit.py", "--transcript", paths["transcript"], "--output", paths["plan"],
+                               "--assets", paths["assets"], "--stats", paths["broll_stats"],
+                               "--analysis", paths["analysis"])
+                # Cache the plan together with the B-roll images it points at
+                plan = columnar.open_table(paths["plan"])
+                srcs = plan.strings("src") if "src" in plan.kinds else []
+                plan_files = {src: os.path.join(APP_DIR, src) for src in srcs
+                              if src and os.path.exists(os.path.join(APP_DIR, src))}
+                plan_files["visual_plan.json"] = paths["plan"]
+                cache.store(magic_key, plan_files)
+                job.log(f" - Cache: MISS ({magic_key})")
+            _mark_done(job, "magic_edit", magic_key)
+            _record_stage(job, "magic_edit", t0, magic_hit)
+            job.log(f" - Execution Time: {time.time() - t0:.2f} seconds")
+
+            # Count visual events
+            job.log(f" - Visual Events Planned: {len(columnar.open_table(paths['plan']))}")
+            if os.path.exists(paths["broll_stats"]):
+                with open(paths["broll_stats"], "r") as f:
+                    broll_stats = json.load(f)
+                job.log(f" - B-Roll Cache: {broll_stats['cache_hits']}/{broll_stats['cache_lookups']} hits "
+                        f"({broll_stats['cache_hit_rate']:.0%}), {broll_stats['requests']} HTTP requests")
+        except (subprocess.CalledProcessError, stage_pool.StageError, OSError):
+            job.log("⚠️ WARNING: Magic Edit failed or was skipped.")
+            if os.path.exists(paths["plan"]):
+                os.remove(paths["plan"])
+    else:
+        # If disabled, remove old visual plan to prevent using old images
+        if os.path.exists(paths["plan"]):
+            os.remove(paths["plan"])
+        job.log("STEP 2: MAGIC EDIT (Skipped by User)")
+    job.update(66)
+
+    # 4. RENDER (Step 3)
+    t0 = time.time()
+    plan_hash = hash_file(paths["plan"]) if os.path.exists(paths["plan"]) else None
+    render_key = cache.key(
+        "render", video=video_hash, transcript=transcript_hash, plan=plan_hash, settings=job.settings,
+        code=code_version(*[_script(s) for s in RENDER_SOURCES]))
+    render_out = {"final_overlay_edit.mp4": paths["output"]}
+    job.log(f"STEP 3: RENDERING")
+    # A profiling run always renders, otherwise there is nothing to profile
+    render_hit = not job.profile_render and _restore(job, cache, "render", render_key, render_out)
+    if render_hit:
+        job.log(f" - Cache: {render_hit.upper()} ({render_key})")
+    else:
+        with scheduler.stage(job, "render"):
+            job.update(70, "🔥 Rendering final video (This takes time)...")
+            profile = ["--profile", paths["profile"]] if job.profile_render else []
+            _run_stage(job, "render", "render.py", "--input", paths["input"], "--transcript", paths["transcript"],
+                       "--plan", paths["plan"], "--settings", paths["settings"], "--output", paths["output"],
+                       *profile)
+        cache.store(render_key, render_out)
+        job.log(f" - Cache: MISS ({render_key})")
+    _mark_done(job, "render", render_key)
+    _record_stage(job, "render", t0, render_hit)
+    job.log(f" - Execution Time: {time.time() - t0:.2f} seconds")
+
+    # Final Stats
+    job.log("-" * 30)
+    job.log(f"TOTAL PROCESS TIME: {time.time() - start_total_time:.2f} seconds")
+    job.update(100, "✅ DONE! Processing Complete.")
@@ -1,8 +1,15 @@
 import json
 import os
-import sys
-from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip, ImageClip, ColorClip, concatenate_videoclips
-from moviepy.config import change_settings
+import argparse
+import cProfile
+import numpy as np
+import columnar
+from caption_engine import FontAtlas
+from caption_layout import PhraseLayout, PhraseAtlas, phrase_layers
+from compositor import TimelineCompositor, image_layer, bitmap_layer
+from broll_prep import prepare_assets, prepare_image, target_size
+from zoom_engine import zoom_filter
+import telemetry
 
 # ==============================================================================
 # ⚙️ CONFIGURATION
@@ -10,24 +17,24 @@ from moviepy.config import change_settings
 IMAGEMAGICK_BINARY = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
 OVERLAY_RATIO = 4/3       
 OVERLAY_WIDTH_PCT = 1.0   
+# Every module that decides what the rendered file looks like (frames, frame grid, encode, concat).
+# Part of the render cache key (pipeline.py) and of each incremental segment's fingerprint.
+RENDER_SOURCES = ["render.py", "ffmpeg_render.py", "parallel_render.py", "incremental_render.py",
+                  "caption_engine.py", "caption_layout.py", "compositor.py", "broll_prep.py", "zoom_engine.py",
+                  "columnar.py", "media.py"]
 # ==============================================================================
 
-if not os.path.exists(IMAGEMAGICK_BINARY):
-    print("❌ ImageMagick path incorrect.")
-    sys.exit(1)
-else:
-    change_settings({"IMAGEMAGICK_BINARY": IMAGEMAGICK_BINARY})
-
-# --- LOAD SETTINGS FROM FRONTEND ---
-DEFAULT_SETTINGS = {"font": "Arial", "position": 0.8}
-if os.path.exists("settings.json"):
-    with open("settings.json", "r") as f:
-        USER_SETTINGS = json.load(f)
-else:
-    USER_SETTINGS = DEFAULT_SETTINGS
-
-SELECTED_FONT_NAME = USER_SETTINGS.get("font", "Arial")
-CAPTION_POSITION_Y = USER_SETTINGS.get("position", 0.8)
+def moviepy_editor():
+    """
+    Imports MoviePy on first use. The FFmpeg backend (which reuses this module's
+    helpers) and a plain `import render` never pay for it.
+    """
+    import moviepy.editor
+    from moviepy.config import change_settings
+    # Captions are rasterized in-process by caption_engine, so ImageMagick is optional
+    if os.path.exists(IMAGEMAGICK_BINARY):
+        change_settings({"IMAGEMAGICK_BINARY": IMAGEMAGICK_BINARY})
+    return moviepy.editor
 
 # --- 🅰️ FONT MAPPING LOGIC ---
 # Maps the "Friendly Name" from the UI to the actual "File Path"
@@ -49,37 +56,62 @@ FONT_MAPPING = {
     "Tahoma": "Tahoma"
 }
 
-# Resolve the actual path/name to use
-# If the name isn't in the map, default to 'Arial'
-FONT_PATH = FONT_MAPPING.get(SELECTED_FONT_NAME, "Arial")
-
-def crop_to_ratio(clip, target_ratio):
-    w, h = clip.size
-    current_ratio = w / h
-    if current_ratio > target_ratio:
-        new_w = h * target_ratio
-        return clip.crop(x1=w/2 - new_w/2, width=new_w, height=h)
-    else:
-        new_h = w / target_ratio
-        return clip.crop(y1=h/2 - new_h/2, width=w, height=new_h)
-
-def apply_zoom(clip):
-    w, h = clip.size
-    return clip.crop(x1=w*0.15, y1=h*0.15, width=w*0.7, height=h*0.7).resize((w, h))
-
-def create_video(video_path, json_path, visual_plan_path):
-    print(f"🎬 Starting Render with Font: {SELECTED_FONT_NAME} | Path: {FONT_PATH}")
-    
-    with open(json_path, "r") as f:
-        word_segments = json.load(f)
+# --- LOAD SETTINGS FROM FRONTEND ---
+# caption_mode: "phrase" = a few words at a time with the spoken word highlighted, "word" = one word at a time
+DEFAULT_SETTINGS = {"font": "Arial", "position": 0.8, "caption_mode": "phrase"}
+
+def load_settings(settings_path="settings.json"):
+    """Reads the job's style settings and resolves the font name to a path"""
+    settings = dict(DEFAULT_SETTINGS)
+    if settings_path and os.path.exists(settings_path):
+        with open(settings_path, "r") as f:
+            settings.update(json.load(f))
+
+    # Resolve the actual path/name to use
+    # If the name isn't in the map, default to 'Arial'
+    font_path = FONT_MAPPING.get(settings["font"], "Arial")
+    bundled = os.path.join(os.path.dirname(os.path.abspath(__file__)), font_path)
+    settings["font_path"] = bundled if os.path.exists(bundled) else font_path
+    return settings
+
+def caption_y(settings, frame_h):
+    """Caption top edge in pixels (position is a fraction of the height, or absolute pixels)"""
+    position = settings["position"]
+    return frame_h * position if isinstance(position, float) else position
+
+def make_placeholder_frame(keyword, atlas, size=(640, 480), color=(100, 0, 0)):
+    """Builds a solid placeholder card with the keyword drawn in the middle"""
+    w, h = size
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    frame[:, :] = color
+    bitmap = atlas.get(keyword, color=(255, 255, 255))
+    return bitmap.blit(frame, (w - bitmap.w) / 2, (h - bitmap.h) / 2)
+
+def make_caption_layers(word_segments, atlas, frame_w, y_pos):
+    """One compositor layer per spoken word, each pointing at a cached atlas bitmap"""
+    layers = []
+    for _, word, start, end in columnar.timed_words(word_segments):
+        bitmap = atlas.get(word)
+        layers.append(bitmap_layer(bitmap, start, end, (frame_w - bitmap.w) / 2, y_pos, z=1))
+    return layers
+
+def apply_zoom(clip, event=None):
+    """Static punch-in or Ken Burns push-in, resampled through a precomputed zoom_engine map"""
+    return clip.fl(zoom_filter(event or {}, clip.size))
+
+def build_final_video(video_path, json_path, visual_plan_path, settings_path="settings.json"):
+    """Assembles the full edit (zooms + B-roll + captions) as a lazy clip; nothing is encoded yet"""
+    settings = load_settings(settings_path)
+    print(f"🎬 Starting Render with Font: {settings['font']} | Path: {settings['font_path']}")
     
-    visual_events = []
-    if os.path.exists(visual_plan_path):
-        with open(visual_plan_path, "r") as f:
-            visual_events = json.load(f)
-
-    main_clip = VideoFileClip(video_path)
-    final_layers = [] 
+    word_segments = columnar.open_table(json_path)   # Read column-wise by the caption code (timed_words)
+    visual_events = columnar.load_records(visual_plan_path)
+
+    editor = moviepy_editor()
+    with telemetry.span("open_source"):
+        main_clip = editor.VideoFileClip(video_path)
+    overlay_layers = [] 
+    atlas = FontAtlas(settings["font_path"], size=70)
     
     # 1. ZOOMS
     print("✂️ Processing Zooms...")
@@ -94,70 +126,123 @@ def create_video(video_path, json_path, visual_plan_path):
         if start > last_t:
             clips.append(main_clip.subclip(last_t, start))
         zoom_part = main_clip.subclip(start, min(end, main_clip.duration))
-        zoom_part = apply_zoom(zoom_part) 
+        zoom_part = apply_zoom(zoom_part, event)
         clips.append(zoom_part)
         last_t = end
     if last_t < main_clip.duration:
         clips.append(main_clip.subclip(last_t, main_clip.duration))
-    base_track = concatenate_videoclips(clips) if clips else main_clip
-    final_layers.append(base_track)
+    base_track = editor.concatenate_videoclips(clips) if clips else main_clip
 
     # 2. B-ROLL
     print("🖼️ Overlaying B-Roll...")
     image_events = [e for e in visual_events if e['type'] == 'image']
+    overlay_size = target_size(main_clip.w, OVERLAY_RATIO, OVERLAY_WIDTH_PCT)
+    # Decode + crop + scale every asset once (in parallel, cached on disk)
+    with telemetry.span("broll_prepare", images=len(image_events)):
+        prepared = prepare_assets([e['src'] for e in image_events if not e.get('is_placeholder')],
+                                  overlay_size, OVERLAY_RATIO)
     for event in image_events:
         start = event['start']
         duration = event['duration']
         if event.get('is_placeholder'):
-            img_clip = ColorClip(size=(640, 480), color=(100,0,0), duration=duration)
-            txt = TextClip(f"{event['keyword']}", fontsize=50, color='white').set_position('center').set_duration(duration)
-            img_clip = CompositeVideoClip([img_clip, txt])
-        elif os.path.exists(event['src']):
-            img_clip = ImageClip(event['src']).set_duration(duration)
+            placeholder = make_placeholder_frame(f"{event['keyword']}", atlas)
+            image = prepare_image(placeholder, overlay_size, OVERLAY_RATIO)
+        elif event['src'] in prepared:
+            image = prepared[event['src']]
         else:
+            print(f"   ⚠️ B-Roll image for '{event['keyword']}' is missing ('{event['src']}'), skipping it")
             continue
-        
-        img_clip = crop_to_ratio(img_clip, OVERLAY_RATIO)
-        target_width = main_clip.w * OVERLAY_WIDTH_PCT
-        img_clip = img_clip.resize(width=target_width).set_start(start).set_position(('center', 'center'))
-        final_layers.append(img_clip)
+
+        # The compositor pastes this ready uint8 buffer on every live frame
+        x = (main_clip.w - image.shape[1]) / 2
+        y = (main_clip.h - image.shape[0]) / 2
+        overlay_layers.append(image_layer(image, start, start + duration, x, y, z=0))
 
     # 3. CAPTIONS
-    print(f"📝 Generating Captions ({SELECTED_FONT_NAME})...")
-    if isinstance(CAPTION_POSITION_Y, float):
-        y_pos = main_clip.h * CAPTION_POSITION_Y
+    print(f"📝 Generating Captions ({settings['font']})...")
+    y_pos = caption_y(settings, main_clip.h)
+
+    if settings["caption_mode"] == "phrase":
+        # Line breaks and positions are fixed here; bitmaps are drawn lazily as the encoder reaches them
+        with telemetry.span("caption_layout", words=len(word_segments)) as info:
+            layout = PhraseLayout(settings["font_path"], main_clip.w, size=atlas.size)
+            phrases = layout.group(word_segments)
+            overlay_layers.extend(phrase_layers(phrases, PhraseAtlas(layout), main_clip.w, y_pos))
+            info["phrases"] = len(phrases)
+        print(f"   🅰️ Caption layout ready: {len(word_segments)} words in {len(phrases)} phrases")
     else:
-        y_pos = CAPTION_POSITION_Y
-
-    for segment in word_segments:
-        word = segment.get("word")
-        start = segment.get("start")
-        end = segment.get("end")
-        if word:
-            try:
-                # Use FONT_PATH (which might be "fonts/Komika.ttf" OR "Arial")
-                txt_clip = (TextClip(word, fontsize=70, font=FONT_PATH, 
-                                     color='yellow', stroke_color='black', stroke_width=3)
-                            .set_position(('center', y_pos))
-                            .set_start(start)
-                            .set_end(end))
-                final_layers.append(txt_clip)
-            except Exception as e:
-                print(f"⚠️ Font '{FONT_PATH}' failed. Fallback to Arial. Error: {e}")
-                txt_clip = (TextClip(word, fontsize=70, font='Arial', 
-                                     color='yellow', stroke_color='black', stroke_width=3)
-                            .set_position(('center', y_pos))
-                            .set_start(start)
-                            .set_end(end))
-                final_layers.append(txt_clip)
+        with telemetry.span("caption_atlas", words=len(word_segments)) as info:
+            overlay_layers.extend(make_caption_layers(word_segments, atlas, main_clip.w, y_pos))
+            info["unique_bitmaps"] = len(atlas)
+        print(f"   🅰️ Caption atlas ready: {len(atlas)} unique word bitmaps")
 
     print("🔥 Compositing Final Video...")
-    final_video = CompositeVideoClip(final_layers).set_duration(main_clip.duration)
-    
-    output_filename = "final_overlay_edit.mp4"
-    final_video.write_videofile(output_filename, codec="libx264", audio_codec="aac", fps=main_clip.fps, preset="ultrafast", threads=4)
+    compositor = TimelineCompositor(overlay_layers)
+    print(f"   🧮 Timeline indexed: {len(compositor)} overlay layers")
+    final_video = base_track.fl(compositor.composite).set_duration(main_clip.duration)
+    return final_video, main_clip
+
+def create_video(video_path, json_path, visual_plan_path, output_filename="final_overlay_edit.mp4",
+                 settings_path="settings.json"):
+    final_video, main_clip = build_final_video(video_path, json_path, visual_plan_path, settings_path)
+    # Per-frame source/zoom/overlay histograms are recorded by the filters; this span is their sum + encode
+    with telemetry.span("write_video", frames=int(main_clip.duration * main_clip.fps)):
+        final_video.write_videofile(output_filename, codec="libx264", audio_codec="aac", fps=main_clip.fps, preset="ultrafast", threads=4)
     print(f"✅ DONE! Saved as '{output_filename}'")
 
+def main(argv=None):
+    """CLI entry point; also what stage_pool workers call in-process"""
+    parser = argparse.ArgumentParser(description="Render the final edit.")
+    parser.add_argument("--input", default="input.mp4")
+    parser.add_argument("--transcript", default="transcription_data.json")
+    parser.add_argument("--plan", default="visual_plan.json")
+    parser.add_argument("--settings", default="settings.json")
+    parser.add_argument("--output", default="final_overlay_edit.mp4")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Render the timeline in N parallel chunks (1 = serial)")
+    parser.add_argument("--backend", choices=["auto", "ffmpeg", "moviepy"], default="moviepy",
+                        help="'moviepy' (default) is the reference renderer; 'ffmpeg' compiles the plan into "
+                             "one filter graph (frames never enter Python, captions via ASS, so they look "
+                             "slightly different) and fails if the plan or FFmpeg build can't take it; "
+                             "'auto' uses ffmpeg when the plan allows, else MoviePy")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep fixed-length segments next to the output and re-encode only the ones "
+                             "whose words/events/settings changed since the last render")
+    parser.add_argument("--profile", default=None, metavar="PATH",
+                        help="Write a cProfile dump of this process to PATH (open with snakeviz or "
+                             "`python -m pstats`; parallel workers are not included)")
+    args = parser.parse_args(argv)
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+
+    try:
+        if os.path.exists(args.transcript):
+            rendered = False
+            if args.incremental:
+                from incremental_render import render_incremental
+                render_incremental(args.input, args.transcript, args.plan, args.output, args.settings,
+                                   workers=args.workers)
+                rendered = True
+            elif args.backend in ("auto", "ffmpeg"):
+                from ffmpeg_render import render_ffmpeg
+                rendered = render_ffmpeg(args.input, args.transcript, args.plan, args.output, args.settings,
+                                         required=args.backend == "ffmpeg")
+            if not rendered and args.workers > 1:
+                from parallel_render import render_parallel
+                render_parallel(args.input, args.transcript, args.plan, args.output,
+                                workers=args.workers, settings_path=args.settings)
+            elif not rendered:
+                create_video(args.input, args.transcript, args.plan, args.output, args.settings)
+        else:
+            print(f"❌ '{args.transcript}' not found!")
+    finally:
+        # Disabled even on failure: a pooled worker must not keep profiling the next job
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"🔬 Profile written to '{args.profile}'")
+
 if __name__ == "__main__":
-    if os.path.exists("transcription_data.json"):
-        create_video("input.mp4", "transcription_data.json", "visual_plan.json")
\ No newline at end of file
+    main()
@@ -0,0 +1,140 @@
+import concurrent.futures
+import importlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from jobs import STAGE_LIMITS
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+POOL_WORKERS = None         # Warm interpreters per stage; None = one per scheduler slot of that stage
+POOLED_STAGES = ("analysis", "magic_edit", "render")   # Stages pipeline.py runs on these pools (one each)
+MAX_TASKS_PER_WORKER = 25   # Recycle a worker after this many jobs to bound leaks (Python 3.11+)
+# Stage module -> function that loads its heavy dependencies; run once per worker of that stage's pool
+PRELOAD = {
+    "magic_edit": "get_nlp",         # spaCy + en_core_web_sm
+    "render": "moviepy_editor",      # MoviePy / imageio
+}
+ENABLED = os.environ.get("MIRAGE_STAGE_POOL", "1") != "0"   # 0 = one fresh subprocess per stage
+# ==============================================================================
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class StageError(RuntimeError):
+    pass
+
+
+# --- WORKER SIDE (long-lived spawned interpreter) ---
+
+_worker = {"jobs": 0, "preload_s": 0.0}
+
+
+def _preload(app_dir, preload):
+    """Pool initializer: same cwd as the subprocess path, heavy imports paid before any job arrives"""
+    os.chdir(app_dir)
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    t0 = time.time()
+    for module_name, loader in preload.items():
+        try:
+            getattr(importlib.import_module(module_name), loader)()
+        except Exception as e:   # A missing model must not break the pool; the stage reports it when it runs
+            print(f"⚠️ Stage pool could not preload {module_name}: {e}")
+    _worker["preload_s"] = time.time() - t0
+
+
+def _ping():
+    return {"pid": os.getpid(), **_worker}
+
+
+def _run(module_name, argv, telemetry_path, stage):
+    import telemetry
+    telemetry.configure(telemetry_path, stage)
+    sys.argv = [module_name + ".py", *argv]   # What the script would see as a subprocess
+    t0 = time.time()
+    try:
+        importlib.import_module(module_name).main(argv)
+    except SystemExit as e:   # argparse errors and explicit exits
+        if e.code:
+            raise StageError(f"{module_name} exited with status {e.code}")
+    except Exception as e:
+        # Re-raised as a plain StageError: arbitrary library exceptions don't always unpickle in the parent
+        raise StageError(f"{module_name} failed: {type(e).__name__}: {e}") from None
+    finally:
+        telemetry.configure(None)   # Flushes this job's histograms to its own file
+    _worker["jobs"] += 1
+    return {"pid": os.getpid(), "elapsed": time.time() - t0, **_worker}
+
+
+# --- CLIENT SIDE (used by pipeline.py) ---
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def workers_for(stage_limits):
+    """
+    {stage: workers}: one per scheduler slot, so a job holding its stage slot never queues
+    again, invisibly, for a worker (that wait would be reported as stage time, not slot wait).
+    Each stage has its own pool preloading only its own dependencies, so the render slots
+    don't each carry a spaCy model and the magic edit slots don't each carry MoviePy.
+    """
+    return {stage: POOL_WORKERS or max(1, stage_limits.get(stage, 1)) for stage in POOLED_STAGES}
+
+
+_workers = workers_for(STAGE_LIMITS)
+
+
+def size_for(stage_limits):
+    """Resizes the pools for a scheduler with non-default limits (batch.py); call before submitting work"""
+    global _workers
+    workers = workers_for(stage_limits)
+    if workers != _workers:
+        _workers = workers
+        shutdown()   # Recreated at the new sizes on next use
+
+
+def get_pool(stage):
+    """The stage's pool, created on first use"""
+    with _lock:
+        pool = _pools.get(stage)
+        if pool is None:
+            kwargs = {"max_tasks_per_child": MAX_TASKS_PER_WORKER} if sys.version_info >= (3, 11) else {}
+            preload = {stage: PRELOAD[stage]} if stage in PRELOAD else {}
+            pool = _pools[stage] = concurrent.futures.ProcessPoolExecutor(
+                _workers.get(stage, 1), mp_context=multiprocessing.get_context("spawn"),
+                initializer=_preload, initargs=(APP_DIR, preload), **kwargs)
+        return pool
+
+
+def warm_up():
+    """Starts every worker now (they spawn on demand), so the first job doesn't pay the preload"""
+    return [get_pool(stage).submit(_ping) for stage, n in _workers.items() for _ in range(n)]
+
+
+def shutdown(stage=None):
+    """Stops one stage's pool, or all of them"""
+    with _lock:
+        stages = [stage] if stage is not None else list(_pools)
+        pools = [_pools.pop(s) for s in stages if s in _pools]
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run(stage, module_name, argv, telemetry_path=None):
+    """
+    Runs `<module_name>.main(argv)` in a warm worker and blocks until it's done.
+    Returns {"pid", "elapsed", "jobs", "preload_s"}; raises StageError on failure.
+    """
+    try:
+        return get_pool(stage).submit(_run, module_name, list(argv), telemetry_path, stage).result()
+    except BrokenProcessPool as e:
+        # A worker died (segfault, OOM kill): start over with a fresh pool for the stage's next job
+        shutdown(stage)
+        raise StageError(f"Stage worker crashed while running {module_name}: {e}")
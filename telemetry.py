@@ -0,0 +1,262 @@
+import atexit
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+ENV_PATH = "MIRAGE_TELEMETRY"   # JSONL file every process of a job appends to
+ENV_STAGE = "MIRAGE_STAGE"      # Stage name stamped on each record
+# Histogram bucket upper bounds in ms (1-2-5 steps); the last bucket is open-ended
+BUCKETS_MS = [0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+RSS_SAMPLE_SECONDS = 0.05   # Peak sampling interval where the kernel's high-water mark can't be reset
+# ==============================================================================
+
+_lock = threading.Lock()
+_state = {"path": os.environ.get(ENV_PATH), "stage": os.environ.get(ENV_STAGE)}
+_histograms = {}
+_peak = {"mode": None, "sampled": 0.0}   # mode: None (process lifetime), "kernel" (VmHWM reset) or "sampler"
+
+
+def configure(path, stage=None):
+    """Points this process at a job's telemetry file (None disables recording)"""
+    flush()
+    _state["path"], _state["stage"] = path, stage
+    if path:
+        reset_peak_rss()   # A reused worker (stage_pool, transcribe_worker) starts each job's peak afresh
+    # Inherited by spawned render workers; cleared so a reused process doesn't leak into the next job
+    for key, value in ((ENV_PATH, path), (ENV_STAGE, stage)):
+        if value:
+            os.environ[key] = value
+        else:
+            os.environ.pop(key, None)
+
+
+def enabled():
+    return bool(_state["path"])
+
+
+def rss_mb():
+    """Current resident memory of this process in MB, None if unknown"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024**2
+    except ImportError:
+        return None
+
+
+def _kernel_peak_mb():
+    """VmHWM (Linux): the process's peak RSS since start or since the last clear_refs reset"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _sample_peak():
+    while _peak["mode"] == "sampler":
+        current = rss_mb()
+        if current is not None and current > _peak["sampled"]:
+            _peak["sampled"] = current
+        time.sleep(RSS_SAMPLE_SECONDS)
+
+
+def reset_peak_rss():
+    """
+    Starts a new high-water mark for job_peak_rss_mb(): resets the kernel's VmHWM
+    ("5" > /proc/self/clear_refs, Linux), else polls rss_mb() on a background thread.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        _peak["mode"] = "kernel"
+        return
+    except OSError:
+        pass
+    _peak["sampled"] = rss_mb() or 0.0
+    if _peak["mode"] != "sampler" and rss_mb() is not None:
+        _peak["mode"] = "sampler"
+        threading.Thread(target=_sample_peak, daemon=True).start()
+
+
+def job_peak_rss_mb():
+    """
+    Peak RSS in MB since this process was pointed at the current job (configure), None if
+    unknown. A process that never reset it (one fresh subprocess per job) reports its lifetime peak.
+    """
+    if _peak["mode"] == "sampler":
+        return max(_peak["sampled"], rss_mb() or 0.0)
+    peak = _kernel_peak_mb()
+    return peak if peak is not None else peak_rss_mb()
+
+
+def peak_rss_mb(children=False):
+    """
+    Peak resident memory of this process (or its largest finished child) in MB, None if unknown.
+    This is a lifetime high-water mark (it includes every earlier job of a reused worker);
+    per-job records use job_peak_rss_mb().
+    """
+    try:
+        import resource
+    except ImportError:
+        if children:
+            return None
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1024**2
+        except (ImportError, AttributeError):
+            return None
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024**2 if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB on Linux
+
+
+def emit(record_type, name, path=None, stage=None, **fields):
+    """Appends one record; path/stage default to this process's configuration"""
+    path = path or _state["path"]
+    if not path:
+        return
+    record = {"type": record_type, "name": name, "stage": stage or _state["stage"], "pid": os.getpid(),
+              "ts": round(time.time(), 3), **fields}
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+@contextmanager
+def span(name, path=None, stage=None, **attrs):
+    """Times a block and records it with the job's peak RSS so far and the current RSS at the end"""
+    t0 = time.perf_counter()
+    try:
+        yield attrs   # The block may add attributes (e.g. counts) before the record is written
+    finally:
+        emit("span", name, path, stage, ms=round((time.perf_counter() - t0) * 1000, 2),
+             peak_rss_mb=job_peak_rss_mb(), rss_mb=rss_mb(), **attrs)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; cheap enough to call once per frame"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()   # HTTP latencies arrive from several threads
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds):
+        ms = seconds * 1000
+        i = bisect.bisect_left(BUCKETS_MS, ms)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    @contextmanager
+    def time(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+    def emit(self):
+        if self.count:
+            emit("histogram", self.name, count=self.count, total_ms=round(self.total_ms, 2),
+                 max_ms=round(self.max_ms, 2), buckets=self.counts)
+
+
+def histogram(name):
+    """Process-wide histogram by name, written out by flush()"""
+    with _lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram(name)
+        return _histograms[name]
+
+
+def flush():
+    """Writes and resets every histogram plus this process's peak RSS for the job"""
+    with _lock:
+        pending = [h for h in _histograms.values() if h.count]
+    for hist in pending:
+        hist.emit()
+        hist.reset()
+    if pending:
+        emit("process", "peak_rss", peak_rss_mb=job_peak_rss_mb())
+
+
+atexit.register(flush)
+
+
+# --- READING (used by the UI) ---
+
+def _percentile(counts, count, q):
+    target = q * count
+    seen = 0
+    for i, n in enumerate(counts):
+        seen += n
+        if seen >= target:
+            return BUCKETS_MS[i] if i < len(BUCKETS_MS) else float("inf")
+    return float("inf")
+
+
+def summarize(path):
+    """
+    Folds a job's JSONL into {"stages": [...], "spans": [...], "histograms": {...},
+    "peak_rss_mb": {stage: MB}}.
+    peak_rss_mb is the highest per-job high-water mark any of the stage's processes
+    reported (job_peak_rss_mb), so memory allocated and freed inside a span counts.
+    Histograms from several processes (parallel render workers) are merged by name;
+    percentiles are bucket upper bounds.
+    """
+    stages, spans, merged, peaks = [], [], {}, {}
+    if not path or not os.path.exists(path):
+        return {"stages": stages, "spans": spans, "histograms": merged, "peak_rss_mb": peaks}
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A process killed mid-write leaves a partial line
+            stage = record.get("stage") or "app"
+            if record.get("peak_rss_mb") is not None:
+                peaks[stage] = max(peaks.get(stage, 0), record["peak_rss_mb"])
+
+            if record["type"] == "stage":
+                stages.append(record)
+            elif record["type"] == "span":
+                spans.append(record)
+            elif record["type"] == "histogram":
+                h = merged.setdefault(record["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                                       "buckets": [0] * (len(BUCKETS_MS) + 1)})
+                h["count"] += record["count"]
+                h["total_ms"] += record["total_ms"]
+                h["max_ms"] = max(h["max_ms"], record["max_ms"])
+                h["buckets"] = [a + b for a, b in zip(h["buckets"], record["buckets"])]
+
+    for h in merged.values():
+        h["mean_ms"] = h["total_ms"] / h["count"]
+        for q in (50, 90, 99):
+            h[f"p{q}_ms"] = _percentile(h["buckets"], h["count"], q / 100)
+    return {"stages": stages, "spans": spans, "histograms": merged, "peak_rss_mb": peaks}
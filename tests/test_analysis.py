@@ -0,0 +1,58 @@
+"""analysis.stream_frames: FFmpeg's stderr can't stall the frame pipe."""
+import os
+import stat
+import sys
+import threading
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+import analysis  # noqa: E402
+
+W, H, FRAMES = 4, 2, 5
+
+FAKE_FFMPEG = f"""#!{sys.executable}
+import os, sys
+sys.stderr.write("warning: corrupt packet\\n" * 20000)   # ~460 KB, far past a pipe buffer
+sys.stderr.flush()
+sys.stdout.buffer.write(bytes(range({W * H})) * {FRAMES})
+sys.exit(int(os.environ.get("FAKE_FFMPEG_EXIT", "0")))
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    path = tmp_path / "ffmpeg"
+    path.write_text(FAKE_FFMPEG)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("FFMPEG_BINARY", str(path))
+    return monkeypatch
+
+
+def collect(chunk_frames=2):
+    """Runs stream_frames in a thread so a deadlock fails the test instead of hanging it"""
+    result = {}
+
+    def run():
+        try:
+            result["frames"] = sum(len(chunk) for chunk in analysis.stream_frames("in.mp4", (W, H),
+                                                                                  chunk_frames=chunk_frames))
+        except RuntimeError as e:
+            result["error"] = str(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(30)
+    assert not thread.is_alive(), "stream_frames deadlocked on FFmpeg's stderr"
+    return result
+
+
+def test_verbose_stderr_does_not_block_frames(fake_ffmpeg):
+    assert collect() == {"frames": FRAMES}
+
+
+def test_failure_reports_stderr(fake_ffmpeg):
+    fake_ffmpeg.setenv("FAKE_FFMPEG_EXIT", "1")
+    error = collect()["error"]
+    assert "could not decode 'in.mp4'" in error and "corrupt packet" in error
@@ -0,0 +1,24 @@
+"""batch.load_entries: manifest names can't escape --out."""
+import json
+import os
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+import batch  # noqa: E402
+
+
+def test_manifest_names_stay_inside_out(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([
+        {"input": "a.mp4", "name": "../escape"},
+        {"input": "b.mp4", "name": ".."},
+        {"input": "c.mp4", "name": "/abs/path"},
+        {"input": "d.mp4", "name": "talk (final)"},
+        "sub/escape.mp4",
+    ]))
+    names = [e["name"] for e in batch.load_entries(str(manifest), {}, True)]
+    assert names == ["escape", "_..", "path", "talk__final_", "escape_2"]
+    out = tmp_path / "out"
+    for name in names:
+        assert os.path.dirname(os.path.abspath(out / name)) == str(out)
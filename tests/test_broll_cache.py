@@ -0,0 +1,75 @@
+"""BrollCache eviction and re-registration of restored images."""
+import os
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from broll_cache import BrollCache  # noqa: E402
+
+
+def add_image(cache, tmp_path, lemma, payload, last_used):
+    download = tmp_path / f"{lemma}.download"
+    download.write_bytes(payload)
+    path = cache.add(lemma, lemma, str(download), f"https://example.com/{lemma}.jpg")
+    cache.db.execute("UPDATE images SET last_used = ? WHERE hash = ?",
+                     (last_used, os.path.splitext(os.path.basename(path))[0]))
+    cache.db.commit()
+    return path
+
+
+def test_evict_spares_kept_and_recent_images(tmp_path):
+    cache = BrollCache(str(tmp_path / "cache"), max_bytes=150)
+    old = time.time() - 7 * 24 * 3600
+    try:
+        kept = add_image(cache, tmp_path, "car", b"a" * 100, old)
+        stale = add_image(cache, tmp_path, "dog", b"b" * 100, old + 1)
+        recent = add_image(cache, tmp_path, "sun", b"c" * 100, time.time())
+        assert cache.evict(keep=[kept], grace=3600) == 200
+    finally:
+        cache.close()
+    assert os.path.exists(kept) and os.path.exists(recent)
+    assert not os.path.exists(stale)
+
+
+def test_register_indexes_restored_images(tmp_path):
+    cache = BrollCache(str(tmp_path / "cache"), max_bytes=0)
+    try:
+        restored = cache.image_path("f" * 64)
+        with open(restored, "wb") as f:
+            f.write(b"x" * 10)
+        cache.register([restored, str(tmp_path / "elsewhere.jpg")])
+        assert cache.db.execute("SELECT hash, size FROM images").fetchall() == [("f" * 64, 10)]
+        assert cache.evict() == 10   # Just restored: inside the grace period
+        assert cache.evict(grace=-1) == 0
+    finally:
+        cache.close()
+    assert not os.path.exists(restored)
+
+
+def test_prepared_buffers_share_the_lru_budget(tmp_path, monkeypatch):
+    import broll_prep
+    from PIL import Image
+
+    root = tmp_path / "cache"
+    monkeypatch.setattr(broll_prep, "PREPARED_DIR", str(root / "prepared"))
+    sources = []
+    for i, color in enumerate([(255, 0, 0), (0, 255, 0)]):
+        src = tmp_path / f"src{i}.jpg"
+        Image.new("RGB", (64, 48), color).save(src)
+        sources.append(str(src))
+
+    prepared = broll_prep.prepare_assets(sources, (40, 30), 4 / 3)
+    assert len(prepared) == 2
+    cache = BrollCache(str(root), max_bytes=0)
+    try:
+        rows = cache.db.execute("SELECT path, size FROM prepared").fetchall()
+        assert len(rows) == 2 and all(size == 40 * 30 * 3 + 128 for _, size in rows)
+        assert cache.evict() == 2 * rows[0][1]   # Just used: inside the grace period
+        kept = broll_prep._source_hash(sources[0])
+        assert cache.evict(keep=[kept], grace=-1) == rows[0][1]
+        remaining = cache.db.execute("SELECT source_hash FROM prepared").fetchall()
+    finally:
+        cache.close()
+    assert remaining == [(kept,)]
+    assert len(os.listdir(root / "prepared")) == 1
@@ -0,0 +1,126 @@
+"""BrollFetcher against the local stand-in Pexels server (benchmarks/stub_pexels.py)."""
+import os
+import sys
+import time
+import types
+
+import pytest
+import requests
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.join(REPO, "benchmarks"))
+import broll_fetch  # noqa: E402
+from broll_fetch import BrollFetcher  # noqa: E402
+from stub_pexels import start_stub_server  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        server = start_stub_server(**kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records backoff delays instead of sleeping through them"""
+    delays = []
+    monkeypatch.setattr(broll_fetch, "time", types.SimpleNamespace(sleep=delays.append,
+                                                                   perf_counter=time.perf_counter))
+    return delays
+
+
+def make_fetcher(server, **kwargs):
+    return BrollFetcher("test-key", search_url=f"{server.base_url}/v1/search", **kwargs)
+
+
+def test_retry_after_backs_off_and_counts(stub, sleeps):
+    server = stub(rate_limit_first=2, retry_after="3")
+    fetcher = make_fetcher(server)
+    try:
+        assert fetcher.search("ocean") == f"{server.base_url}/images/ocean.jpg"
+    finally:
+        fetcher.close()
+    assert sleeps == [3.0, 3.0]
+    assert fetcher.stats == {"requests": 3, "retries": 2, "rate_limited": 2}
+
+
+def test_long_retry_after_gives_up(stub, sleeps):
+    server = stub(rate_limit_first=1, retry_after=str(broll_fetch.MAX_RETRY_AFTER + 1))
+    fetcher = make_fetcher(server)
+    try:
+        assert fetcher.search("ocean") is None
+    finally:
+        fetcher.close()
+    assert sleeps == []
+    assert fetcher.stats == {"requests": 1, "retries": 0, "rate_limited": 1}
+
+
+def test_request_timeout(stub, sleeps, monkeypatch):
+    monkeypatch.setattr(broll_fetch, "MAX_RETRIES", 1)
+    server = stub(latency=0.5)
+    fetcher = make_fetcher(server, timeout=(1, 0.1))
+    try:
+        with pytest.raises(requests.Timeout):
+            fetcher.search("ocean")
+        assert fetcher.fetch("ocean", "unused.jpg") is None   # fetch() swallows it
+    finally:
+        fetcher.close()
+    assert fetcher.stats["retries"] == 2
+    assert len(sleeps) == 2
+
+
+def test_empty_result_is_recorded(stub):
+    server = stub(empty_queries=["nothing"])
+    fetcher = make_fetcher(server)
+    try:
+        assert fetcher.search("nothing") is None
+        assert fetcher.search("ocean") is not None
+    finally:
+        fetcher.close()
+    assert fetcher.empty_queries == {"nothing"}
+
+
+def test_download_streams_to_part_then_renames(stub, tmp_path, monkeypatch):
+    server = stub()
+    target = str(tmp_path / "ocean.jpg")
+    renames = []
+    replace = os.replace
+
+    def record(src, dst):
+        assert os.path.exists(src) and not os.path.exists(dst)
+        renames.append((src, dst))
+        replace(src, dst)
+
+    monkeypatch.setattr(broll_fetch.os, "replace", record)
+    fetcher = make_fetcher(server)
+    try:
+        url = fetcher.fetch("ocean", target)
+    finally:
+        fetcher.close()
+    assert url == f"{server.base_url}/images/ocean.jpg"
+    assert renames == [(target + ".part", target)]
+    assert not os.path.exists(target + ".part")
+    with open(target, "rb") as f:
+        assert f.read() == server.image_bytes("/images/ocean.jpg")
+
+
+def test_fetch_many_respects_concurrency(stub, tmp_path):
+    server = stub(latency=0.1)
+    fetcher = make_fetcher(server, concurrency=2)
+    jobs = [(f"query{i}", str(tmp_path / f"img{i}.jpg")) for i in range(6)]
+    try:
+        results = fetcher.fetch_many(jobs)
+    finally:
+        fetcher.close()
+    assert all(results[filename] for _, filename in jobs)
+    assert server.max_in_flight == 2
@@ -0,0 +1,42 @@
+"""columnar tables: field subsets and range queries agree with the JSON rows."""
+import json
+import os
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.join(REPO, "benchmarks"))
+import columnar  # noqa: E402
+from fixtures import make_transcript  # noqa: E402
+
+
+def test_records_fields_and_overlapping(tmp_path):
+    path = str(tmp_path / "transcript.json")
+    make_transcript(path, 120)
+    with open(path, "r") as f:
+        rows = json.load(f)
+    table = columnar.open_table(path)
+
+    assert table.records() == rows
+    assert table.records(fields=columnar.WORD_FIELDS) == [
+        {k: v for k, v in row.items() if k in columnar.WORD_FIELDS} for row in rows]
+    for t in (0.0, 33.3, 119.0):
+        expected = [r for r in rows if "start" in r and r["start"] < t + 5 and r["end"] > t]
+        assert table.between(t, t + 5) == expected
+
+
+def test_timed_words_reads_columns_like_the_rows(tmp_path):
+    path = str(tmp_path / "transcript.json")
+    make_transcript(path, 60)
+    with open(path, "r") as f:
+        rows = json.load(f)
+    rows[3].pop("start")        # WhisperX leaves some tokens (numbers) untimed
+    rows[5]["word"] = ""
+    rows[7].pop("word")
+    with open(path, "w") as f:
+        json.dump(rows, f)
+
+    table = columnar.open_table(path)
+    from_columns = list(columnar.timed_words(table))
+    assert from_columns == list(columnar.timed_words(rows))
+    assert [i for i, _, _, _ in from_columns[:6]] == [0, 1, 2, 4, 6, 8]
@@ -0,0 +1,54 @@
+"""ffmpeg_render: explicit backend requests, filter probing and the ASS font name."""
+import json
+import os
+import sys
+import types
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+import ffmpeg_render  # noqa: E402
+from caption_engine import load_font  # noqa: E402
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch):
+    """Counts `ffmpeg -filters` probes; the fake build has no libass"""
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        return types.SimpleNamespace(stdout=" ... scale             V->V       Scale the input video size.\n")
+
+    monkeypatch.setattr(ffmpeg_render.subprocess, "run", run)
+    monkeypatch.setattr(ffmpeg_render, "_filters", {})
+    monkeypatch.setattr(ffmpeg_render, "find_ffmpeg", lambda: "/opt/ffmpeg")
+    return calls
+
+
+def write_inputs(tmp_path):
+    transcript, plan = tmp_path / "t.json", tmp_path / "p.json"
+    transcript.write_text(json.dumps([{"word": "hi", "start": 0.0, "end": 0.5}]))
+    plan.write_text(json.dumps([{"type": "zoom", "start": 0.0, "duration": 1.0}]))
+    return str(transcript), str(plan)
+
+
+def test_filters_are_probed_once_per_binary(fake_ffmpeg):
+    for _ in range(3):
+        assert "libass" in ffmpeg_render.unsupported_reason([], "/opt/ffmpeg")
+    assert len(fake_ffmpeg) == 1
+
+
+def test_explicit_ffmpeg_fails_instead_of_falling_back(fake_ffmpeg, tmp_path):
+    transcript, plan = write_inputs(tmp_path)
+    assert ffmpeg_render.render_ffmpeg("in.mp4", transcript, plan, str(tmp_path / "out.mp4")) is False
+    with pytest.raises(ffmpeg_render.BackendUnavailable, match="libass"):
+        ffmpeg_render.render_ffmpeg("in.mp4", transcript, plan, str(tmp_path / "out.mp4"), required=True)
+
+
+def test_ass_font_name_guards_the_default_font():
+    font = load_font("no-such-font.ttf")
+    expected = font.getname()[0] if hasattr(font, "getname") else ffmpeg_render.ASS_FALLBACK_FONT
+    assert ffmpeg_render.ass_font_name(font) == expected
+    assert ffmpeg_render.ass_font_name(types.SimpleNamespace()) == ffmpeg_render.ASS_FALLBACK_FONT
@@ -0,0 +1,42 @@
+"""parallel_render: chunks cover exactly the serial render's frame grid."""
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+import parallel_render  # noqa: E402
+import render  # noqa: E402
+
+EVENTS = [{"type": "zoom", "start": 1.2, "duration": 1.5}, {"type": "image", "start": 4.9, "duration": 2.0}]
+
+
+@pytest.mark.parametrize("fps", [30000 / 1001, 24000 / 1001, 25.0, 60000 / 1001, 29.97])
+@pytest.mark.parametrize("duration", [10.01, 12.345, 7.0])
+@pytest.mark.parametrize("workers", [1, 3, 8])
+def test_chunk_timestamps_match_serial(fps, duration, workers):
+    serial = np.arange(0, duration, 1.0 / fps).tolist()   # What MoviePy's write_videofile iterates
+    chunks = parallel_render.plan_chunks(duration, fps, EVENTS, workers)
+    chunked = [parallel_render.frame_time(i, fps) for first, last in chunks for i in range(first, last)]
+    assert parallel_render.count_frames(duration, fps) == len(serial)
+    assert chunked == serial
+
+
+def test_timeline_comes_from_moviepy_not_ffprobe(monkeypatch):
+    closed = []
+
+    class FakeClip:
+        duration, fps = 10.01, 29.97   # MoviePy's reading; ffprobe would say 30000/1001
+
+        def __init__(self, path, audio=True):
+            assert path == "in.mp4"
+
+        def close(self):
+            closed.append(True)
+
+    monkeypatch.setattr(render, "moviepy_editor", lambda: types.SimpleNamespace(VideoFileClip=FakeClip))
+    assert parallel_render.source_timeline("in.mp4") == (10.01, 29.97)
+    assert closed == [True]
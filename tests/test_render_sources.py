@@ -0,0 +1,29 @@
+"""render.RENDER_SOURCES covers every local module the render stage's output depends on."""
+import ast
+import os
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from render import RENDER_SOURCES  # noqa: E402
+
+# Imported by render modules but can't change the rendered file
+NOT_OUTPUT = {"telemetry", "artifact_cache", "broll_cache"}
+
+
+def local_imports(name):
+    with open(os.path.join(REPO, name), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.add(node.module.split(".")[0])
+    return {m for m in modules if os.path.exists(os.path.join(REPO, m + ".py"))}
+
+
+def test_render_sources_are_closed_under_imports():
+    listed = {name[:-len(".py")] for name in RENDER_SOURCES}
+    missing = {m for name in RENDER_SOURCES for m in local_imports(name)} - listed - NOT_OUTPUT
+    assert not missing, f"add {sorted(missing)} to render.RENDER_SOURCES (or NOT_OUTPUT)"
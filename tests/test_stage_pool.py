@@ -0,0 +1,28 @@
+"""stage_pool: one pool per stage, sized to its slots, preloading only its own dependencies."""
+import os
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+import batch  # noqa: E402
+import stage_pool  # noqa: E402
+
+
+def test_pools_follow_each_stage_slots(monkeypatch):
+    monkeypatch.setattr(stage_pool, "_workers", stage_pool._workers)
+    limits = batch.stage_limits(32)
+    stage_pool.size_for(limits)
+    assert stage_pool._workers == {"analysis": 8, "magic_edit": 2, "render": 16}
+
+
+def test_stage_runs_in_its_own_pool_without_other_preloads(monkeypatch):
+    monkeypatch.setattr(stage_pool, "PRELOAD", {"render": "no_such_loader"})
+    try:
+        report = stage_pool.run("analysis", "analysis", ["--help"])
+        assert report["jobs"] == 1
+        assert list(stage_pool._pools) == ["analysis"]
+        assert stage_pool._pools["analysis"]._initargs == (stage_pool.APP_DIR, {})   # Nothing to preload
+        assert stage_pool.get_pool("render")._initargs == (stage_pool.APP_DIR, {"render": "no_such_loader"})
+    finally:
+        stage_pool.shutdown()
+    assert stage_pool._pools == {}
@@ -0,0 +1,43 @@
+"""telemetry: per-job peak RSS in a reused process."""
+import os
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+import telemetry  # noqa: E402
+
+pytestmark = pytest.mark.skipif(telemetry.rss_mb() is None, reason="no RSS source on this platform")
+
+
+def run_job(path, allocate_mb):
+    telemetry.configure(path, "render")
+    with telemetry.span("work"):
+        block = bytearray(allocate_mb * 1024 * 1024)   # Allocated and freed inside the span
+        block[::4096] = b"x" * len(block[::4096])
+        del block
+    telemetry.configure(None)
+    return telemetry.summarize(path)["peak_rss_mb"]["render"]
+
+
+@pytest.mark.parametrize("force_sampler", [False, True])
+def test_peak_is_per_job_and_sees_freed_memory(tmp_path, monkeypatch, force_sampler):
+    if force_sampler:
+        real_open = open
+
+        def no_clear_refs(path, *args, **kwargs):
+            if path == "/proc/self/clear_refs":
+                raise PermissionError(path)
+            return real_open(path, *args, **kwargs)
+
+        monkeypatch.setattr("builtins.open", no_clear_refs)
+        monkeypatch.setattr(telemetry, "RSS_SAMPLE_SECONDS", 0.001)
+    try:
+        baseline = telemetry.rss_mb()
+        big = run_job(str(tmp_path / "big.jsonl"), 200)
+        small = run_job(str(tmp_path / "small.jsonl"), 1)
+    finally:
+        telemetry._peak["mode"] = None
+    assert big > baseline + 150
+    assert small < big - 150
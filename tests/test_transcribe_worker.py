@@ -0,0 +1,57 @@
+"""transcribe_worker accept loop: bad clients are dropped without stopping the server."""
+import os
+import queue
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+import transcribe_worker  # noqa: E402
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="AF_UNIX socket")
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcribe_worker, "_authkey", b"right-key")
+    monkeypatch.setattr(transcribe_worker, "REQUEST_TIMEOUT", 0.5)
+    address = str(tmp_path / "w.sock")
+    listener = Listener(address, family="AF_UNIX")
+    jobs = queue.Queue()
+    threading.Thread(target=transcribe_worker._accept_loop, args=(listener, jobs, {"warm": False}),
+                     daemon=True).start()
+    yield address, jobs
+    listener.close()
+
+
+def ping(address, key=b"right-key"):
+    with Client(address, family="AF_UNIX", authkey=key) as conn:
+        conn.send({"type": "ping"})
+        return conn.recv()
+
+
+def test_bad_clients_do_not_stop_the_server(server):
+    address, jobs = server
+    with pytest.raises(AuthenticationError):
+        ping(address, key=b"stale-key")
+
+    with Client(address, family="AF_UNIX", authkey=b"right-key") as conn:
+        conn.send(["not", "a", "dict"])
+        with pytest.raises(EOFError):
+            conn.recv()
+
+    silent = Client(address, family="AF_UNIX", authkey=b"right-key")   # Never sends
+    t0 = time.perf_counter()
+    assert ping(address)["ok"]   # Answered while the silent client is still connected
+    assert time.perf_counter() - t0 < 0.5
+    silent.close()
+
+    with Client(address, family="AF_UNIX", authkey=b"right-key") as conn:
+        conn.send({"video_path": "x.mp4", "output": "x.json"})
+        _, job = jobs.get(timeout=2)
+    assert job["video_path"] == "x.mp4"
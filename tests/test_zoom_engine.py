@@ -0,0 +1,45 @@
+"""zoom_engine._Axis: in-place sampling maps match the plain formula and don't allocate per frame."""
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from zoom_engine import _Axis  # noqa: E402
+
+
+def reference(n_out, n_src, channels, start, length, offset):
+    pos = np.clip((np.arange(n_out, dtype=np.float32) + 0.5) * np.float32(length / n_out)
+                  + np.float32(start - 0.5), 0, n_src - 1)
+    base = np.floor(pos).astype(np.intp)
+    w1 = np.repeat(((pos - base) * 256).astype(np.uint16), channels)
+    lane = np.tile(np.arange(channels), n_out)
+    i0 = np.repeat((base - offset) * channels, channels) + lane
+    i1 = np.repeat((np.minimum(base + 1, n_src - 1) - offset) * channels, channels) + lane
+    return i0, i1, 256 - w1, w1
+
+
+def test_fill_matches_reference():
+    for n_out, n_src, channels, start, length, offset in [(1080, 1920, 3, 100.3, 1344.0, 99),
+                                                          (720, 720, 1, 0.0, 504.0, 0),
+                                                          (64, 50, 3, 7.7, 30.1, 7)]:
+        axis = _Axis(n_out, n_src, channels)
+        axis.fill(start, length, offset)
+        for got, want in zip((axis.i0, axis.i1, axis.w0, axis.w1),
+                             reference(n_out, n_src, channels, start, length, offset)):
+            np.testing.assert_array_equal(got, want)
+
+
+def test_fill_reuses_its_buffers():
+    axis = _Axis(1920, 1920, 3)
+    axis.fill(10.0, 1344.0, 9)
+    tracemalloc.start()
+    try:
+        for i in range(50):   # A Ken Burns zoom refills every frame
+            axis.fill(10.0 + i * 0.1, 1344.0 - i, 9)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 1920 * 3 * 8   # Below one index array: nothing frame-sized is allocated
@@ -1,84 +1,276 @@
-import torch # Must be imported first
 import os
 import gc
+import argparse
 import json
-import typing # <--- NEW IMPORT NEEDED FOR THE FIX
-import omegaconf
-
-# --- 🛠️ NUCLEAR FIX FOR PYTORCH 2.6 ---
-# 1. Whitelist ALL the classes causing errors (including typing.Any)
-try:
-    from omegaconf.listconfig import ListConfig
-    from omegaconf.dictconfig import DictConfig
-    from omegaconf.base import ContainerMetadata 
-    
-    # This is the "Magic List" that stops the errors
-    torch.serialization.add_safe_globals([
-        ListConfig, 
-        DictConfig, 
-        ContainerMetadata,
-        typing.Any # <--- The specific fix for your new error
-    ])
-except ImportError:
-    pass
-except AttributeError:
-    pass
-
-# 2. Monkey Patch torch.load to force weights_only=False globally
-# This overrides the new strict security setting
-original_load = torch.load
-def safe_load(*args, **kwargs):
-    # FORCE False. This overrides the library's internal default.
-    kwargs['weights_only'] = False
-    return original_load(*args, **kwargs)
-torch.load = safe_load
-# ------------------------------------------------
-
-# NOW import the heavy libraries (After the fix is applied)
-import whisperx
-
-def run_batch_transcription(video_path):
-    device = "cpu"
-    print(f"🚀 Loading 'BASE' Model on {device}...")
+import tempfile
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np
+import media
+import telemetry
 
-    # 1. Load Model
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+DEVICE = "cpu"
+MODEL_NAME = "base"
+COMPUTE_TYPE = "int8"
+BATCH_SIZE = 4
+CPU_THREADS = 4         # CTranslate2 + torch threads; int8 on CPU stops scaling past physical cores
+ALIGN_CACHE_SIZE = 2    # Align models kept warm (one per language)
+
+# Streaming: audio is cut into bounded windows at the quietest point near each limit
+WINDOW_SECONDS = 300         # Max audio held in memory per transcribe/align pass
+MIN_WINDOW_FRACTION = 0.6    # Cuts are searched in the last 40% of each window
+VAD_FRAME_MS = 30            # Energy frame size
+MIN_SILENCE_SECONDS = 0.3    # Cuts land in the middle of a quiet run at least this long
+SILENCE_RMS = 0.003          # Windows whose loudest frame is below this are skipped (~ -50 dBFS)
+# ==============================================================================
+
+_whisperx = None
+
+
+def _patch_torch(torch):
+    """
+    --- 🛠️ NUCLEAR FIX FOR PYTORCH 2.6 ---
+    torch.load now defaults to weights_only=True, which the pyannote/whisperx
+    checkpoints can't load. Must run before whisperx is imported.
+    """
+    # 1. Whitelist ALL the classes causing errors (including typing.Any)
     try:
-        model = whisperx.load_model("base", device, compute_type="int8")
-    except Exception as e:
-        print(f"❌ Error loading model: {e}")
+        import typing
+        from omegaconf.listconfig import ListConfig
+        from omegaconf.dictconfig import DictConfig
+        from omegaconf.base import ContainerMetadata
+
+        torch.serialization.add_safe_globals([ListConfig, DictConfig, ContainerMetadata, typing.Any])
+    except (ImportError, AttributeError):
+        pass
+
+    # 2. Monkey Patch torch.load to force weights_only=False globally
+    original_load = torch.load
+
+    def safe_load(*args, **kwargs):
+        # FORCE False. This overrides the library's internal default.
+        kwargs['weights_only'] = False
+        return original_load(*args, **kwargs)
+    torch.load = safe_load
+
+
+def load_whisperx():
+    """
+    Imports torch + whisperx on first use. They cost seconds of import time that
+    the VAD/windowing helpers (and anything that merely imports this module) don't need.
+    """
+    global _whisperx
+    if _whisperx is None:
+        with telemetry.span("import_whisperx"):
+            import torch  # Must be imported (and patched) first
+            _patch_torch(torch)
+            import whisperx
+        _whisperx = whisperx
+    return _whisperx
+
+def load_asr_model(model_name=MODEL_NAME, device=DEVICE, compute_type=COMPUTE_TYPE, threads=CPU_THREADS):
+    print(f"🚀 Loading '{model_name.upper()}' Model on {device} ({threads} threads)...")
+    whisperx = load_whisperx()
+    import torch
+    torch.set_num_threads(threads)  # Alignment (wav2vec2) runs on torch
+    with telemetry.span("model_load", model=model_name, compute_type=compute_type, threads=threads):
+        return whisperx.load_model(model_name, device, compute_type=compute_type, threads=threads)
+
+class AlignModelCache:
+    """Keeps the most recently used align models loaded, evicting the least recently used"""
+
+    def __init__(self, max_size=ALIGN_CACHE_SIZE, device=DEVICE):
+        self.max_size = max_size
+        self.device = device
+        self._models = OrderedDict()
+
+    def get(self, language_code):
+        if language_code in self._models:
+            self._models.move_to_end(language_code)
+            return self._models[language_code]
+
+        print(f"⚡ Loading align model for '{language_code}'...")
+        with telemetry.span("align_model_load", language=language_code):
+            self._models[language_code] = load_whisperx().load_align_model(language_code=language_code, device=self.device)
+        while len(self._models) > self.max_size:
+            evicted, _ = self._models.popitem(last=False)
+            print(f"♻️ Evicting align model for '{evicted}'")
+            gc.collect()
+        return self._models[language_code]
+
+    def clear(self):
+        self._models.clear()
+        gc.collect()
+
+# --- VOICE ACTIVITY WINDOWS ---
+
+def frame_rms(samples, sample_rate=media.AUDIO_SAMPLE_RATE):
+    """RMS energy per VAD frame"""
+    frame = int(sample_rate * VAD_FRAME_MS / 1000)
+    n = len(samples) // frame
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:n * frame].reshape(n, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+def find_cut(audio_path, lo, hi, sample_rate=media.AUDIO_SAMPLE_RATE):
+    """Sample index in [lo, hi) at the center of the quietest MIN_SILENCE_SECONDS run"""
+    rms = frame_rms(media.read_audio(audio_path, lo, hi - lo), sample_rate)
+    k = max(1, int(MIN_SILENCE_SECONDS * 1000 / VAD_FRAME_MS))
+    if len(rms) < k:
+        return hi
+    quiet = np.convolve(rms, np.ones(k) / k, mode="valid")
+    frame = int(sample_rate * VAD_FRAME_MS / 1000)
+    return lo + (int(np.argmin(quiet)) + k // 2) * frame
+
+def speech_windows(audio_path, window_seconds=WINDOW_SECONDS, sample_rate=media.AUDIO_SAMPLE_RATE):
+    """
+    Yields (start, end) sample ranges of at most window_seconds, split on pauses.
+    Only the search region near each cut is read, so this is O(window) memory.
+    """
+    total = media.audio_samples(audio_path)
+    max_len = int(window_seconds * sample_rate)
+    start = 0
+    while total - start > max_len:
+        cut = find_cut(audio_path, start + int(max_len * MIN_WINDOW_FRACTION), start + max_len, sample_rate)
+        yield start, cut
+        start = cut
+    if start < total:
+        yield start, total
+
+class WordWriter:
+    """Appends word segments to a JSON array on disk as windows finish (same layout as json.dump(indent=4))"""
+
+    def __init__(self, path):
+        self.count = 0
+        self._f = open(path, "w", encoding="utf-8")
+        self._f.write("[")
+
+    def write(self, words):
+        for word in words:
+            self._f.write(",\n" if self.count else "\n")
+            self._f.write("    " + json.dumps(word, indent=4).replace("\n", "\n    "))
+            self.count += 1
+        self._f.flush()
+
+    def close(self):
+        self._f.write("\n]" if self.count else "]")
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _offset_words(words, offset):
+    for word in words:
+        for key in ("start", "end"):
+            if word.get(key) is not None:
+                word[key] = round(word[key] + offset, 3)
+    return words
+
+def transcribe_audio(audio_path, model, align_cache, output_filename="transcription_data.json", device=DEVICE,
+                     batch_size=BATCH_SIZE, window_seconds=WINDOW_SECONDS):
+    """
+    Transcribes + aligns an extracted 16 kHz track window by window, appending words to
+    output_filename as each window finishes. Peak memory is bounded by window_seconds.
+    Returns the number of words.
+    """
+    sample_rate = media.AUDIO_SAMPLE_RATE
+    language = None
+    inference = telemetry.histogram("window.transcribe")
+    alignment = telemetry.histogram("window.align")
+    with telemetry.span("inference", audio_seconds=round(media.audio_samples(audio_path) / sample_rate, 2)) as info, \
+            WordWriter(output_filename) as writer:
+        for start, end in speech_windows(audio_path, window_seconds, sample_rate):
+            audio = media.read_audio(audio_path, start, end - start)
+            if frame_rms(audio, sample_rate).max(initial=0) < SILENCE_RMS:
+                continue
+
+            offset = start / sample_rate
+            print(f"🎧 Window {offset:.0f}s - {end / sample_rate:.0f}s")
+            # The language is detected on the first window with speech and reused for the rest
+            with inference.time():
+                result = model.transcribe(audio, batch_size=batch_size, language=language)
+            language = language or result["language"]
+            if not result["segments"]:
+                continue
+
+            model_a, metadata = align_cache.get(language)
+            with alignment.time():
+                result = load_whisperx().align(result["segments"], model_a, metadata, audio, device,
+                                        return_char_alignments=False)
+            writer.write(_offset_words(result["word_segments"], offset))
+            del audio, result
+            gc.collect()
+        info["words"] = writer.count
+    return writer.count
+
+@contextmanager
+def extracted_audio(video_path, audio_path=None):
+    """Yields a 16 kHz track for the video: the given one if it exists, else a temporary extraction"""
+    if audio_path and os.path.exists(audio_path):
+        yield audio_path
         return
+    fd, tmp_path = tempfile.mkstemp(suffix=".f32")
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        yield media.extract_audio(video_path, tmp_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
-    # 2. Transcribe
+def transcribe_file(video_path, model, align_cache, output_filename="transcription_data.json", device=DEVICE,
+                    audio_path=None, batch_size=BATCH_SIZE):
+    """Transcribes + aligns one file with already-loaded models. Returns the number of words."""
     print(f"🎧 Processing: {video_path}")
-    audio = whisperx.load_audio(video_path)
-    result = model.transcribe(audio, batch_size=4)
-    
-    # Cleanup 1
-    del model
-    gc.collect()
+    with extracted_audio(video_path, audio_path) as track:
+        words = transcribe_audio(track, model, align_cache, output_filename, device, batch_size)
 
-    # 3. Align
-    print("⚡ Aligning text...")
-    model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=device)
-    result = whisperx.align(result["segments"], model_a, metadata, audio, device, return_char_alignments=False)
+    print(f"✅ Success! {words} words saved to '{output_filename}'")
+    return words
 
-    # Cleanup 2
-    del model_a
-    gc.collect()
+def run_batch_transcription(video_path, output_filename="transcription_data.json", audio_path=None,
+                            batch_size=BATCH_SIZE, threads=CPU_THREADS):
+    device = DEVICE
 
-    # 4. Save to JSON
-    output_filename = "transcription_data.json"
-    with open(output_filename, "w", encoding="utf-8") as f:
-        json.dump(result["word_segments"], f, indent=4)
-    
-    print(f"✅ Success! Data saved to '{output_filename}'")
+    # 1. Load Model
+    try:
+        model = load_asr_model(device=device, threads=threads)
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        return
+
+    # 2. Transcribe + align window by window (one align model kept for the run)
+    align_cache = AlignModelCache(max_size=1, device=device)
+    transcribe_file(video_path, model, align_cache, output_filename, device, audio_path, batch_size)
+
+    # Cleanup
+    del model
+    align_cache.clear()
     print("👉 Now run: python render.py")
 
-if __name__ == "__main__":
-    VIDEO_FILE = "input.mp4" 
+def main(argv=None):
+    """CLI entry point (the app itself goes through transcribe_worker, which keeps the model loaded)"""
+    parser = argparse.ArgumentParser(description="Transcribe a video to word-level timestamps.")
+    parser.add_argument("--input", default="input.mp4")
+    parser.add_argument("--output", default="transcription_data.json")
+    parser.add_argument("--audio", default=None, help="Pre-extracted 16 kHz mono float32 track (see media.py)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--threads", type=int, default=CPU_THREADS)
+    args = parser.parse_args(argv)
+    VIDEO_FILE = args.input
     
     if os.path.exists(VIDEO_FILE):
-        run_batch_transcription(VIDEO_FILE)
+        run_batch_transcription(VIDEO_FILE, args.output, args.audio, args.batch_size, args.threads)
     else:
         print(f"❌ Could not find file: {VIDEO_FILE}")
-        print("Please rename your video to 'input.mp4' and put it in this folder.")
\ No newline at end of file
+        print("Please rename your video to 'input.mp4' and put it in this folder.")
+
+if __name__ == "__main__":
+    main()
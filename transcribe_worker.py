@@ -0,0 +1,244 @@
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+# Socket, auth key and lock live in a directory only this user can open (0700)
+RUNTIME_DIR = os.path.join(tempfile.gettempdir(), f"mirage-{os.getuid() if hasattr(os, 'getuid') else 'user'}")
+if sys.platform == "win32":
+    WORKER_ADDRESS = r"\\.\pipe\mirage_transcribe_" + os.environ.get("USERNAME", "user")
+    WORKER_FAMILY = "AF_PIPE"
+else:
+    WORKER_ADDRESS = os.path.join(RUNTIME_DIR, "transcribe.sock")
+    WORKER_FAMILY = "AF_UNIX"
+
+AUTHKEY_ENV = "MIRAGE_WORKER_AUTHKEY"   # Overrides the random key generated on first use
+STARTUP_TIMEOUT = 120   # seconds to wait for a freshly spawned worker to accept jobs
+REQUEST_TIMEOUT = 10    # seconds a connected client gets to send its request before it's dropped
+# ==============================================================================
+
+AUTHKEY_PATH = os.path.join(RUNTIME_DIR, "authkey")
+LOCK_PATH = os.path.join(RUNTIME_DIR, "transcribe.lock")
+
+
+class TranscriptionError(RuntimeError):
+    pass
+
+
+def runtime_dir():
+    """Creates the private runtime directory, refusing one another user could have planted or opened up"""
+    os.makedirs(RUNTIME_DIR, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        st = os.lstat(RUNTIME_DIR)
+        if st.st_uid != os.getuid() or st.st_mode & 0o077 or not os.path.isdir(RUNTIME_DIR):
+            raise TranscriptionError(f"'{RUNTIME_DIR}' must be a directory owned by you with mode 0700")
+    return RUNTIME_DIR
+
+
+_authkey = None
+
+
+def authkey():
+    """Random per-install key (0600 file in the runtime dir), created by whichever process needs it first"""
+    global _authkey
+    if _authkey is None:
+        if os.environ.get(AUTHKEY_ENV):
+            _authkey = os.environ[AUTHKEY_ENV].encode()
+            return _authkey
+        runtime_dir()
+        if not os.path.exists(AUTHKEY_PATH):
+            partial = f"{AUTHKEY_PATH}.{os.getpid()}"
+            fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            try:
+                os.link(partial, AUTHKEY_PATH)   # Atomic and never overwrites: concurrent starters agree on one key
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(partial)
+        with open(AUTHKEY_PATH, "r") as f:
+            _authkey = f.read().strip().encode()
+    return _authkey
+
+
+def _lock_instance():
+    """Exclusive lock held for the worker's lifetime; returns None if another worker already holds it"""
+    handle = open(LOCK_PATH, "a+")
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+# --- SERVER SIDE (long-lived process) ---
+
+def _handle_client(conn, jobs, status):
+    """
+    One connection, on its own thread: authenticates it, reads the request, answers
+    pings directly and queues real jobs for the model thread. Anything a client
+    does wrong (bad key, garbage, silence) only drops that client.
+    """
+    try:
+        key = authkey()
+        deliver_challenge(conn, key)
+        answer_challenge(conn, key)
+        if not conn.poll(REQUEST_TIMEOUT):
+            raise TimeoutError(f"no request within {REQUEST_TIMEOUT}s")
+        job = conn.recv()
+        if not isinstance(job, dict):
+            raise TypeError(f"expected a dict request, got {type(job).__name__}")
+        if job.get("type") == "ping":
+            conn.send({"ok": True, "queued": jobs.qsize(), **status})
+            conn.close()
+        else:
+            jobs.put((conn, job))
+    except Exception as e:
+        print(f"⚠️ Dropped client connection: {e!r}")
+        conn.close()
+
+
+def _accept_loop(listener, jobs, status):
+    """Accepts connections and hands each to its own handler, so one slow or bad client can't stall the rest"""
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError as e:
+            print(f"⚠️ Accept failed: {e}")
+            continue
+        threading.Thread(target=_handle_client, args=(conn, jobs, status), daemon=True).start()
+
+
+def serve():
+    """Loads whisperx once and serves transcription jobs back to back until killed"""
+    runtime_dir()
+    lock = _lock_instance()
+    if lock is None:   # Two ensure_worker() calls raced; the other worker serves both
+        print("👂 A transcription worker is already running")
+        return
+    # Holding the lock means no live worker owns this socket; it's left over from a crash
+    if WORKER_FAMILY == "AF_UNIX" and os.path.exists(WORKER_ADDRESS):
+        os.remove(WORKER_ADDRESS)
+
+    # No authkey here: accept() would run the handshake inline; _handle_client runs it per connection
+    listener = Listener(WORKER_ADDRESS, family=WORKER_FAMILY)
+    jobs = queue.Queue()
+    status = {"warm": False}
+    threading.Thread(target=_accept_loop, args=(listener, jobs, status), daemon=True).start()
+    print(f"👂 Transcription worker listening on {WORKER_ADDRESS}")
+
+    # Heavy imports happen once, in this process only
+    import telemetry
+    import transcribe
+    model = None
+    align_cache = transcribe.AlignModelCache()
+
+    while True:
+        conn, job = jobs.get()
+        telemetry.configure(job.get("telemetry"), "transcribe")
+        try:
+            warm = model is not None
+            t0 = time.time()
+            if model is None:
+                model = transcribe.load_asr_model()
+                status["warm"] = True
+            load_time = time.time() - t0
+
+            words = transcribe.transcribe_file(job["video_path"], model, align_cache, job["output"],
+                                               audio_path=job.get("audio_path"))
+            conn.send({
+                "ok": True,
+                "words": words,
+                "warm": warm,
+                "model_load_time": load_time,
+                "elapsed": time.time() - t0,
+            })
+        except Exception as e:
+            print(f"❌ Job failed: {e}")
+            try:
+                conn.send({"ok": False, "error": str(e)})
+            except OSError:
+                pass
+        finally:
+            telemetry.configure(None)   # Flushes this job's histograms to its own file
+            conn.close()
+
+
+# --- CLIENT SIDE (used by app.py) ---
+
+def _connect():
+    return Client(WORKER_ADDRESS, family=WORKER_FAMILY, authkey=authkey())
+
+
+def ping():
+    """Returns the worker's status, or None if no worker is running"""
+    try:
+        with _connect() as conn:
+            conn.send({"type": "ping"})
+            return conn.recv()
+    except (OSError, EOFError, AuthenticationError):
+        return None
+
+
+def ensure_worker():
+    """Starts the background worker if nothing is listening yet"""
+    if ping() is not None:
+        return False
+
+    print("🚀 Starting transcription worker...")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcribe_worker.py")
+    kwargs = {"cwd": os.getcwd()}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    subprocess.Popen([sys.executable, script], **kwargs)
+
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if ping() is not None:
+            return True
+        time.sleep(0.2)
+    raise TranscriptionError("Transcription worker did not start in time.")
+
+
+def submit(video_path, output="transcription_data.json", audio_path=None, telemetry_path=None):
+    """Sends one job to the warm worker and blocks until it's done. Returns the worker's report."""
+    ensure_worker()
+    job = {
+        "type": "transcribe",
+        "video_path": os.path.abspath(video_path),
+        "output": os.path.abspath(output),
+        "audio_path": os.path.abspath(audio_path) if audio_path else None,
+        "telemetry": os.path.abspath(telemetry_path) if telemetry_path else None,
+    }
+    try:
+        with _connect() as conn:
+            conn.send(job)
+            report = conn.recv()
+    except (OSError, EOFError) as e:
+        raise TranscriptionError(f"Lost connection to transcription worker: {e}")
+
+    if not report.get("ok"):
+        raise TranscriptionError(report.get("error", "unknown error"))
+    return report
+
+
+if __name__ == "__main__":
+    serve()
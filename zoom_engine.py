@@ -0,0 +1,190 @@
+import time
+
+import numpy as np
+
+import telemetry
+
+try:
+    import cv2
+except ImportError:  # Optional: the NumPy path below produces the same bilinear result
+    cv2 = None
+
+# ==============================================================================
+# ⚙️ CONFIGURATION
+# ==============================================================================
+ZOOM_CROP = 0.7       # Static punch-in: center crop of 70% of the frame, scaled back up
+USE_OPENCV = True     # Use cv2.warpAffine when OpenCV is installed
+# ==============================================================================
+
+
+def zoom_factor(event, t):
+    """
+    Zoom factor (1.0 = full frame) at time t seconds into a zoom event.
+    Events with `zoom_from` / `zoom_to` ease between the two (Ken Burns);
+    plain events hold the static 1 / ZOOM_CROP punch-in.
+    """
+    static = 1.0 / ZOOM_CROP
+    start = event.get("zoom_from", static)
+    end = event.get("zoom_to", start)
+    if start == end:
+        return start
+    p = min(max(t / event["duration"], 0.0), 1.0) if event.get("duration") else 1.0
+    p = p * p * (3 - 2 * p)  # smoothstep: no jolt at either end
+    return start + (end - start) * p
+
+
+def is_animated(event):
+    return event.get("zoom_from", event.get("zoom_to")) != event.get("zoom_to", event.get("zoom_from"))
+
+
+def crop_rect(size, zoom, center=(0.5, 0.5)):
+    """(x, y, w, h) of the source region shown at this zoom, kept inside the frame"""
+    w, h = size
+    cw, ch = w / zoom, h / zoom
+    x = min(max(center[0] * w - cw / 2, 0.0), w - cw)
+    y = min(max(center[1] * h - ch / 2, 0.0), h - ch)
+    return x, y, cw, ch
+
+
+class _Axis:
+    """Preallocated bilinear sample positions along one axis (index pairs + 8-bit weights)"""
+
+    def __init__(self, n_out, n_src, channels=1):
+        self.n_src = n_src
+        self.channels = channels
+        self.centers = np.arange(n_out, dtype=np.float32) + 0.5
+        self.pos = np.empty(n_out, dtype=np.float32)
+        self.floor = np.empty(n_out, dtype=np.float32)
+        self.base = np.empty(n_out, dtype=np.intp)
+        self.index = np.empty(n_out, dtype=np.intp)   # Scratch for (base - offset) * channels
+        # Interleaved axes (x with RGB) get one entry per output sample *and* channel
+        self.i0 = np.empty(n_out * channels, dtype=np.intp)
+        self.i1 = np.empty(n_out * channels, dtype=np.intp)
+        self.w0 = np.empty(n_out * channels, dtype=np.uint16)
+        self.w1 = np.empty(n_out * channels, dtype=np.uint16)
+        self._lane = np.tile(np.arange(channels, dtype=np.intp), n_out)
+
+    def fill(self, start, length, offset=0):
+        """Recomputes the maps in place for source span [start, start + length), indices relative to offset"""
+        n_out, c = len(self.centers), self.channels
+        np.multiply(self.centers, length / n_out, out=self.pos)
+        np.add(self.pos, start - 0.5, out=self.pos)
+        np.clip(self.pos, 0, self.n_src - 1, out=self.pos)
+        np.floor(self.pos, out=self.floor)
+        self.base[:] = self.floor
+        np.subtract(self.pos, self.floor, out=self.pos)   # float32 - float32: no float64 temporary
+        np.multiply(self.pos, 256, out=self.pos)
+
+        i0, i1 = self.i0.reshape(n_out, c), self.i1.reshape(n_out, c)
+        np.subtract(self.base, offset, out=self.index)
+        np.multiply(self.index, c, out=self.index)
+        i0[:] = self.index[:, None]
+        np.add(self.base, 1, out=self.base)
+        np.minimum(self.base, self.n_src - 1, out=self.base)
+        np.subtract(self.base, offset, out=self.index)
+        np.multiply(self.index, c, out=self.index)
+        i1[:] = self.index[:, None]
+        self.i0 += self._lane
+        self.i1 += self._lane
+        self.w1.reshape(n_out, c)[:] = self.pos[:, None]
+        np.subtract(256, self.w1, out=self.w0)
+
+
+class ZoomMap:
+    """
+    Crop-and-scale of uint8 frames with every buffer allocated once per geometry.
+
+    `set_rect` recomputes the sampling maps in O(width + height); for a static
+    zoom it runs once, for Ken Burns once per frame. `apply` is then a fixed
+    sequence of gathers and fixed-point blends into preallocated arrays.
+    """
+
+    def __init__(self, src_size, out_size=None, channels=3, use_opencv=None):
+        self.src_w, self.src_h = src_size
+        self.out_w, self.out_h = out_size or src_size
+        self.channels = channels
+        self.use_opencv = (USE_OPENCV if use_opencv is None else use_opencv) and cv2 is not None
+        self.rect = None
+        self.out = np.empty((self.out_h, self.out_w, channels), dtype=np.uint8)
+
+        if self.use_opencv:
+            self._matrix = np.zeros((2, 3), dtype=np.float64)
+        else:
+            self._ys = _Axis(self.out_h, self.src_h)
+            self._xs = _Axis(self.out_w, self.src_w, channels)
+            # Rows are handled as flat (width * channels) lines so every pass is a 2-D contiguous op
+            line = self.src_w * channels
+            self._rows_a = np.empty((self.out_h, line), dtype=np.uint8)
+            self._rows_b = np.empty((self.out_h, line), dtype=np.uint8)
+            self._vert = np.empty((self.out_h, line), dtype=np.uint16)
+            self._tmp = np.empty((self.out_h, line), dtype=np.uint16)
+            self._cols_a = np.empty((self.out_h, self.out_w * channels), dtype=np.uint16)
+            self._cols_b = np.empty_like(self._cols_a)
+
+    def set_rect(self, x, y, w, h):
+        if self.rect == (x, y, w, h):
+            return
+        self.rect = (x, y, w, h)
+        if self.use_opencv:
+            # Output -> source affine (used with WARP_INVERSE_MAP), pixel centers aligned
+            sx, sy = w / self.out_w, h / self.out_h
+            self._matrix[0, 0], self._matrix[0, 2] = sx, x + 0.5 * sx - 0.5
+            self._matrix[1, 1], self._matrix[1, 2] = sy, y + 0.5 * sy - 0.5
+            return
+
+        # Only the source columns the crop touches are blended vertically
+        self._x_lo = max(int(np.floor(x - 0.5)), 0)
+        self._x_hi = min(int(np.ceil(x + w + 0.5)) + 1, self.src_w)
+        self._ys.fill(y, h)
+        self._xs.fill(x, w, offset=self._x_lo)
+
+    def apply(self, frame):
+        """Returns the zoomed frame (a reused buffer: copy it if you need to keep it)"""
+        if self.use_opencv:
+            return cv2.warpAffine(frame, self._matrix, (self.out_w, self.out_h), dst=self.out,
+                                  flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                                  borderMode=cv2.BORDER_REPLICATE)
+
+        ys, xs, c = self._ys, self._xs, self.channels
+        span = (self._x_hi - self._x_lo) * c
+        src = np.ascontiguousarray(frame).reshape(self.src_h, self.src_w * c)[:, self._x_lo * c:self._x_lo * c + span]
+        rows_a, rows_b = self._rows_a[:, :span], self._rows_b[:, :span]
+        vert, tmp = self._vert[:, :span], self._tmp[:, :span]
+
+        # Vertical pass: blend the two source rows around each output row
+        np.take(src, ys.i0, axis=0, out=rows_a, mode="clip")
+        np.take(src, ys.i1, axis=0, out=rows_b, mode="clip")
+        np.multiply(rows_a, ys.w0[:, None], out=vert)
+        np.multiply(rows_b, ys.w1[:, None], out=tmp)
+        np.add(vert, tmp, out=vert)
+        np.right_shift(vert, 8, out=vert)
+
+        # Horizontal pass on the blended rows
+        np.take(vert, xs.i0, axis=1, out=self._cols_a, mode="clip")
+        np.take(vert, xs.i1, axis=1, out=self._cols_b, mode="clip")
+        np.multiply(self._cols_a, xs.w0, out=self._cols_a)
+        np.multiply(self._cols_b, xs.w1, out=self._cols_b)
+        np.add(self._cols_a, self._cols_b, out=self._cols_a)
+        np.right_shift(self._cols_a, 8, out=self._cols_a)
+        np.copyto(self.out.reshape(self.out_h, self.out_w * c), self._cols_a, casting="unsafe")
+        return self.out
+
+
+def zoom_filter(event, size, center=(0.5, 0.5)):
+    """MoviePy `fl` filter for one zoom event; t is local to the event's subclip"""
+    zoom_map = ZoomMap(size)
+    center = tuple(event.get("center", center))
+    animated = is_animated(event)
+    if not animated:
+        zoom_map.set_rect(*crop_rect(size, zoom_factor(event, 0), center))
+    timing = telemetry.histogram("frame.zoom")
+
+    def apply(get_frame, t):
+        frame = get_frame(t)
+        t0 = time.perf_counter()
+        if animated:
+            zoom_map.set_rect(*crop_rect(size, zoom_factor(event, t), center))
+        out = zoom_map.apply(frame)
+        timing.observe(time.perf_counter() - t0)
+        return out
+    return apply